@@ -5,18 +5,37 @@
 BaseApi (基类)
 """
 import inspect
+import sys
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
 import os
 
+if TYPE_CHECKING:
+    import aiohttp
+    import httpx
 
-EXCLUDE_METHODS = ['get_capabilities', 'get_api_info', 'source_name', 'get_source_info']
+    from .cache import ResponseCache
+    from .rate_limit import RateLimiter
+    from .retry import RetryExecutor
+    from .session import SessionManager
+
+
+EXCLUDE_METHODS = [
+    'get_capabilities', 'get_api_info', 'source_name', 'get_source_info',
+    'bind_session_manager', 'bind_response_cache', 'bind_rate_limiter', 'bind_retry_executor',
+]
 
 class BaseAPI(ABC):
     """
     数据源基类
     所有数据源都需要继承此类并实现相关方法
     """
+
+    _session_manager: Optional["SessionManager"] = None
+    _response_cache: Optional["ResponseCache"] = None
+    _rate_limiter: Optional["RateLimiter"] = None
+    _retry_executor: Optional["RetryExecutor"] = None
+
     @abstractmethod
     def __init__(self, config: Dict[str, Any]):
         """
@@ -50,7 +69,29 @@ class BaseAPI(ABC):
     def get_capabilities(self) -> List[Dict[str, Any]]:
         """
         获取数据源所有能力的描述
-        通过扫描实例方法及其文档字符串自动获取能力描述
+        优先从数据源清单中读取，清单中没有或已失效时扫描实例方法生成并写入清单
+
+        Returns:
+            List[Dict[str, Any]]: 数据源提供的所有方法的描述列表
+        """
+        from .manifest import get_manifest_cache, module_path
+
+        module_name = type(self).__module__
+        path = module_path(sys.modules.get(module_name))
+        if path is None:
+            return self._scan_capabilities()
+
+        cache = get_manifest_cache()
+        capabilities = cache.get_field(module_name, path, self.source_name, "capabilities")
+        if capabilities is None:
+            capabilities = self._scan_capabilities()
+            base_entry = {"class_name": type(self).__name__, "source_name": self.source_name, **self.get_api_info()}
+            cache.set_field(module_name, path, self.source_name, "capabilities", capabilities, base_entry)
+        return capabilities
+
+    def _scan_capabilities(self) -> List[Dict[str, Any]]:
+        """
+        通过扫描实例方法及其文档字符串获取能力描述
 
         Returns:
             List[Dict[str, Any]]: 数据源提供的所有方法的描述列表
@@ -82,4 +123,192 @@ class BaseAPI(ABC):
                         "doc": doc  # 完整的文档字符串
                     }
                     capabilities.append(capability)
-        return capabilities
\ No newline at end of file
+        return capabilities
+
+    def bind_session_manager(self, session_manager: "SessionManager"):
+        """
+        绑定共享的会话管理器，由 ApiClient 在加载数据源时调用
+
+        Args:
+            session_manager: 会话管理器
+        """
+        self._session_manager = session_manager
+
+    def bind_response_cache(self, response_cache: "ResponseCache"):
+        """
+        绑定共享的响应缓存，由 ApiClient 在加载数据源时调用
+
+        Args:
+            response_cache: 响应缓存
+        """
+        self._response_cache = response_cache
+
+    def _get_response_cache(self) -> "ResponseCache":
+        """
+        获取响应缓存，未绑定时使用默认缓存
+
+        Returns:
+            ResponseCache: 响应缓存
+        """
+        from .cache import get_default_response_cache
+
+        return self._response_cache or get_default_response_cache()
+
+    def bind_rate_limiter(self, rate_limiter: "RateLimiter"):
+        """
+        绑定共享的限流器，由 ApiClient 在加载数据源时调用
+
+        Args:
+            rate_limiter: 限流器
+        """
+        self._rate_limiter = rate_limiter
+
+    def _get_rate_limiter(self) -> "RateLimiter":
+        """
+        获取限流器，未绑定时使用默认限流器
+
+        Returns:
+            RateLimiter: 限流器
+        """
+        from .rate_limit import get_default_rate_limiter
+
+        return self._rate_limiter or get_default_rate_limiter()
+
+    async def _acquire_rate_limit(self, headers: Optional[Dict[str, str]]) -> Optional[str]:
+        """
+        按请求头中的 X-Original-Host 等待限流令牌
+
+        Args:
+            headers: 请求头
+
+        Returns:
+            Optional[str]: 上游 host，没有 X-Original-Host 时返回 None
+        """
+        host = (headers or {}).get("X-Original-Host")
+        if host:
+            await self._get_rate_limiter().acquire(host)
+        return host
+
+    def _record_rate_limit(self, host: Optional[str], status: int, retry_after: Optional[str]):
+        """
+        把响应状态反馈给限流器，429 时按 Retry-After 退避
+
+        Args:
+            host: 上游 host
+            status: HTTP 状态码
+            retry_after: 响应头 Retry-After
+        """
+        if host:
+            self._get_rate_limiter().record(host, status, retry_after)
+
+    def bind_retry_executor(self, retry_executor: "RetryExecutor"):
+        """
+        绑定共享的重试执行器，由 ApiClient 在加载数据源时调用
+
+        Args:
+            retry_executor: 重试执行器
+        """
+        self._retry_executor = retry_executor
+
+    async def _with_retry(self, call: Callable[[], Awaitable[Any]], idempotent: bool = True) -> Any:
+        """
+        按当前方法（current_method，未设置时为数据源）的策略执行请求，可重试的错误带抖动退避重试，开启对冲时慢请求会再发一次
+
+        Args:
+            call: 无参的协程函数，每次调用发送一次请求
+            idempotent: 请求是否幂等，非幂等请求只发送一次
+
+        Returns:
+            Any: call 的结果
+        """
+        from .call_context import current_method
+        from .retry import get_default_retry_executor
+
+        executor = self._retry_executor or get_default_retry_executor()
+        return await executor.run(current_method.get() or self.source_name, call, idempotent)
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """
+        获取当前事件循环上的共享会话，未绑定会话管理器时使用默认管理器
+
+        Returns:
+            aiohttp.ClientSession: 共享会话，不要关闭
+        """
+        from .session import get_default_session_manager
+
+        manager = self._session_manager or get_default_session_manager()
+        return manager.get_session()
+
+    def _get_httpx_client(self) -> "httpx.AsyncClient":
+        """
+        获取当前事件循环上的共享 httpx 客户端，未绑定会话管理器时使用默认管理器
+
+        Returns:
+            httpx.AsyncClient: 共享客户端，不要关闭
+        """
+        from .session import get_default_session_manager
+
+        manager = self._session_manager or get_default_session_manager()
+        return manager.get_httpx_client()
+
+    async def _aclose(self):
+        """
+        释放数据源持有的后台任务等资源，由 ApiClient.close 在关闭会话前调用
+
+        默认什么都不做，持有后台任务的数据源需要覆盖
+        """
+        pass
+
+    async def _request_json(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+        content_type: Optional[str] = "application/json",
+        idempotent: Optional[bool] = None,
+    ) -> Any:
+        """
+        通过共享会话发送请求并解析 JSON 响应
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            headers: 请求头
+            params: 查询参数
+            json: JSON 请求体
+            data: 原始请求体
+            timeout: 总超时时间（秒）
+            content_type: 期望的响应 Content-Type，None 表示不校验
+            idempotent: 请求是否幂等，决定失败时能否重试，None 时按 HTTP 方法判断
+
+        Returns:
+            Any: 解析后的 JSON 数据
+
+        Raises:
+            asyncio.TimeoutError: 请求超时
+            aiohttp.ClientError: 请求失败或响应状态码异常
+        """
+        import aiohttp
+
+        from .retry import IDEMPOTENT_METHODS
+
+        kwargs: Dict[str, Any] = {"headers": headers, "params": params, "json": json, "data": data}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        async def send() -> Any:
+            session = self._get_session()
+            host = await self._acquire_rate_limit(headers)
+            async with session.request(method, url, **kwargs) as response:
+                self._record_rate_limit(host, response.status, response.headers.get("Retry-After"))
+                response.raise_for_status()
+                return await response.json(content_type=content_type)
+
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        return await self._with_retry(send, idempotent)
@@ -4,15 +4,20 @@ Booking.com flight search data source implementation
 
 import asyncio
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
+from .pagination import gather_pages
 
 logger = logging.getLogger("booking_source")
 
+# 日期矩阵搜索最多的日期组合数
+MAX_DATE_MATRIX_CELLS = 100
+
 
 class BookingSource(BaseAPI):
     """Booking.com data source"""
@@ -29,6 +34,9 @@ class BookingSource(BaseAPI):
             "X-Biz-Id": "matrix-agent",
             "X-Request-Timeout": str(config["timeout"] - 5),
         }
+        self.max_concurrency = config.get("fan_out_concurrency", 8)
+        # 后台预取酒店详情的任务，保存引用避免被垃圾回收
+        self._prefetch_tasks: Set[asyncio.Future] = set()
 
     @property
     def source_name(self) -> str:
@@ -52,6 +60,7 @@ class BookingSource(BaseAPI):
             "description": "Booking.com data source, providing flight search and hotel search services",
         }
 
+    @cached(ttl=300)
     async def search_flights(
         self,
         from_code: str,
@@ -160,11 +169,7 @@ class BookingSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -233,6 +238,147 @@ class BookingSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def search_flights_date_matrix(
+        self,
+        from_code: str,
+        to_code: str,
+        depart_start: str,
+        depart_end: str,
+        return_start: Optional[str] = None,
+        return_end: Optional[str] = None,
+        stops: str = "none",
+        adults: int = 1,
+        children: Optional[str] = None,
+        cabin_class: str = "ECONOMY",
+        currency_code: str = "USD",
+        include_offers: bool = False,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Search flights for every combination of departure and return dates in the given windows and return the cheapest price of each combination.
+        Useful for flexible-date searches; at most 100 date combinations are searched.
+
+        Args:
+            from_code(str): Departure airport code, e.g.: PEK
+            to_code(str): Destination airport code, e.g.: CAN
+            depart_start(str): First departure date, format: YYYY-MM-DD
+            depart_end(str): Last departure date (inclusive), format: YYYY-MM-DD
+            return_start(Optional[str]): First return date, format: YYYY-MM-DD, omit for one-way flights
+            return_end(Optional[str]): Last return date (inclusive), format: YYYY-MM-DD, default is return_start
+            stops(str): Number of stops, options: none, 0, 1, 2
+            adults(int): Number of adults, default is 1
+            children(Optional[str]): Children's ages, comma separated, e.g.: 0,17 (optional)
+            cabin_class(str): Cabin class, options: ECONOMY, PREMIUM_ECONOMY, BUSINESS, FIRST
+            currency_code(str): Currency code, default USD
+            include_offers(bool): Whether to include the full flight list of every combination, default is False.
+                The full list of one combination can also be fetched later with search_flights(sort="CHEAPEST", ...) using the same dates, which is served from cache
+            max_concurrency(Optional[int]): Maximum number of searches sent at the same time, default: 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the cheapest price grid, e.g.
+            {
+                "success": True,                   # Whether successful
+                "data": {                          # If successful, contains the following fields
+                    "depart_dates": ["2025-04-19", "2025-04-20"],  # Grid rows
+                    "return_dates": ["2025-04-26", "2025-04-27"],  # Grid columns, [null] for one-way flights
+                    "currency": "USD",             # Currency of the prices
+                    "cheapest": [                  # cheapest[i][j]: cheapest price departing depart_dates[i] and returning return_dates[j],
+                        [512.3, 498.0],            # null if the return date is before the departure date, the search failed or no flight was found
+                        [530.1, null]
+                    ],
+                    "failed": [                    # Combinations whose search failed
+                        {"depart_date": "2025-04-20", "return_date": "2025-04-27", "error": "..."}
+                    ],
+                    "offers": {                    # Only with include_offers, "depart_date/return_date" ("depart_date" for one-way) -> flights in search_flights format
+                        "2025-04-19/2025-04-26": [...]
+                    }
+                }
+            }
+        """
+
+        # Example:
+        #     >>> from external_api.data_sources.client import get_client
+        #     >>> client = get_client()
+        #     >>> result = await client.booking.search_flights_date_matrix(
+        #     ...     from_code="PEK",
+        #     ...     to_code="CAN",
+        #     ...     depart_start="2025-04-19",
+        #     ...     depart_end="2025-04-21",
+        #     ...     return_start="2025-04-26",
+        #     ...     return_end="2025-04-28",
+        #     ... )
+        #     >>> if result["success"]:
+        #     ...     print(result["data"]["cheapest"])
+        try:
+            depart_dates = _date_range(depart_start, depart_end)
+            return_dates: List[Optional[str]] = _date_range(return_start, return_end or return_start) if return_start else [None]
+            if not depart_dates or not return_dates:
+                return {"success": False, "error": "Date window end must not be before its start"}
+
+            # 返程早于去程的组合不搜索
+            cells = [(d, r) for d in depart_dates for r in return_dates if r is None or r >= d]
+            if len(cells) > MAX_DATE_MATRIX_CELLS:
+                return {
+                    "success": False,
+                    "error": f"Too many date combinations: {len(cells)}, at most {MAX_DATE_MATRIX_CELLS} are allowed, please narrow the date windows",
+                }
+
+            semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+            async def search_cell(depart_date: str, return_date: Optional[str]) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.search_flights(
+                        from_code=from_code,
+                        to_code=to_code,
+                        depart_date=depart_date,
+                        return_date=return_date,
+                        stops=stops,
+                        adults=adults,
+                        children=children,
+                        sort="CHEAPEST",
+                        cabin_class=cabin_class,
+                        currency_code=currency_code,
+                    )
+
+            results = await asyncio.gather(*[search_cell(d, r) for d, r in cells])
+
+            cheapest: Dict[Tuple[str, Optional[str]], float] = {}
+            failed = []
+            offers = {}
+            currency = currency_code
+            for (depart_date, return_date), result in zip(cells, results):
+                if not result["success"]:
+                    failed.append({"depart_date": depart_date, "return_date": return_date, "error": result["error"]})
+                    continue
+                flights = result["data"]["flights"]
+                if flights:
+                    best = min(flights, key=lambda flight: flight["price"]["amount"])
+                    cheapest[(depart_date, return_date)] = best["price"]["amount"]
+                    currency = best["price"]["currency"]
+                if include_offers:
+                    offers[f"{depart_date}/{return_date}" if return_date else depart_date] = flights
+
+            if failed and len(failed) == len(cells):
+                return {"success": False, "error": failed[0]["error"]}
+
+            data = {
+                "depart_dates": depart_dates,
+                "return_dates": return_dates,
+                "currency": currency,
+                "cheapest": [[cheapest.get((d, r)) for r in return_dates] for d in depart_dates],
+                "failed": failed,
+            }
+            if include_offers:
+                data["offers"] = offers
+            return {"success": True, "data": data}
+
+        except Exception as e:
+            error_msg = f"Error occurred while searching flights: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
+    @cached(ttl=86400)
     async def _search_hotel_destinations(self, query: str) -> Dict[str, Any]:
         """
         Search for hotel destinations
@@ -280,11 +426,7 @@ class BookingSource(BaseAPI):
 
             # 发送请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -325,6 +467,7 @@ class BookingSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=600)
     async def _search_hotels_by_destid(
         self,
         dest_id: str,
@@ -449,11 +592,7 @@ class BookingSource(BaseAPI):
 
             # 发送请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -520,6 +659,8 @@ class BookingSource(BaseAPI):
         currency_code: str = "USD",
         sort_by: str = "bayesian_review_score",
         categories_filter: Optional[str] = None,
+        pages: int = 1,
+        prefetch_details: bool = False,
     ) -> Dict[str, Any]:
         """
         Search for hotels by destination name
@@ -547,6 +688,12 @@ class BookingSource(BaseAPI):
             categories_filter(Optional[str]): Star rating filter, options:
                 - class::1: One star, ..., class::5: Five stars
                 - Multiple selection allowed, comma separated, e.g.: class::1,class::2
+            pages(int): Number of result pages to fetch concurrently, starting at page_number, default is 1
+            prefetch_details(bool): Whether to start fetching the details of the returned hotels in the background, default is False.
+                The hotels are returned without waiting. The prefetch warms search_hotel_details for each hotel_id with this search's
+                arrival_date, departure_date, adults, children_age, room_qty, languagecode and currency_code; a later call with exactly
+                those arguments returns the prefetched details or waits for the running fetch. search_hotel_details defaults to
+                currency_code EUR, so pass this search's currency_code (default USD) explicitly to hit the prefetched details
 
         Returns:
             Dict[str, Any]: Dictionary containing hotel search results, e.g.
@@ -575,7 +722,8 @@ class BookingSource(BaseAPI):
                                 "price_per_night": 879.39 # Price per night
                             }
                         }
-                    ]
+                    ],
+                    "missing_pages": []            # Pages that failed after retrying, e.g. [{"page": 2, "error": "..."}]
                 }
             }
         """
@@ -608,26 +756,44 @@ class BookingSource(BaseAPI):
             dest_id = destination["dest_id"]
             search_type = destination["search_type"].upper()
 
-            # 搜索酒店
-            hotels_result = await self._search_hotels_by_destid(
-                dest_id=dest_id,
-                search_type=search_type,
-                arrival_date=arrival_date,
-                departure_date=departure_date,
-                adults=adults,
-                children_age=children_age,
-                room_qty=room_qty,
-                page_number=page_number,
-                price_min=price_min,
-                price_max=price_max,
-                languagecode=languagecode,
-                currency_code=currency_code,
-                sort_by=sort_by,
-                categories_filter=categories_filter,
-            )
-
-            if not hotels_result["success"]:
-                return hotels_result
+            # 搜索酒店，多页并发请求
+            async def fetch_page(page):
+                result = await self._search_hotels_by_destid(
+                    dest_id=dest_id,
+                    search_type=search_type,
+                    arrival_date=arrival_date,
+                    departure_date=departure_date,
+                    adults=adults,
+                    children_age=children_age,
+                    room_qty=room_qty,
+                    page_number=page[0],
+                    price_min=price_min,
+                    price_max=price_max,
+                    languagecode=languagecode,
+                    currency_code=currency_code,
+                    sort_by=sort_by,
+                    categories_filter=categories_filter,
+                )
+                if result["success"]:
+                    return {"success": True, "data": result["data"]["hotels"]}
+                return result
+
+            page_numbers = range(page_number, page_number + max(1, pages))
+            page_results = await gather_pages(fetch_page, [(page, 0) for page in page_numbers], self.max_concurrency)
+            if page_results.all_failed:
+                return {"success": False, "error": page_results.missing_pages[0]["error"]}
+
+            if prefetch_details:
+                self._prefetch_hotel_details(
+                    [hotel["hotel_id"] for hotel in page_results.data],
+                    arrival_date=arrival_date,
+                    departure_date=departure_date,
+                    adults=adults,
+                    children_age=children_age,
+                    room_qty=room_qty,
+                    languagecode=languagecode,
+                    currency_code=currency_code,
+                )
 
             # 在返回结果中添加目的地信息
             return {
@@ -638,7 +804,8 @@ class BookingSource(BaseAPI):
                         "dest_id": destination["dest_id"],
                         "search_type": destination["search_type"],
                     },
-                    "hotels": hotels_result["data"]["hotels"],
+                    "hotels": page_results.data,
+                    "missing_pages": page_results.missing_pages,
                 },
             }
 
@@ -648,6 +815,250 @@ class BookingSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def search_hotels_by_dest_names(
+        self,
+        searches: List[Dict[str, str]],
+        top_destinations: int = 1,
+        pages: int = 1,
+        adults: int = 1,
+        children_age: Optional[str] = None,
+        room_qty: int = 1,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        languagecode: str = "en-us",
+        currency_code: str = "USD",
+        sort_by: str = "bayesian_review_score",
+        categories_filter: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Search hotels for many destinations and date ranges at once, e.g. for every city of an itinerary.
+        Destinations are resolved concurrently and each hotel search starts as soon as its destination is resolved.
+
+        Args:
+            searches(List[Dict[str, str]]): Searches to run, each with "dest_name", "arrival_date" and "departure_date" (YYYY-MM-DD),
+                e.g.: [{"dest_name": "shanghai", "arrival_date": "2025-04-19", "departure_date": "2025-04-22"}]
+            top_destinations(int): Number of best matching destinations to search for each name, default is 1
+            pages(int): Number of result pages to fetch for each destination, default is 1
+            adults(int): Number of adults, default is 1
+            children_age(Optional[str]): Children's ages, comma separated, e.g.: 0,17
+            room_qty(int): Number of rooms, default is 1
+            price_min(Optional[float]): Minimum price, optional
+            price_max(Optional[float]): Maximum price, optional
+            languagecode(str): Language code, default en-us
+            currency_code(str): Currency code, default USD
+            sort_by(Optional[str]): Sort method, same options as search_hotels_by_dest_name
+            categories_filter(Optional[str]): Star rating filter, same options as search_hotels_by_dest_name
+            max_concurrency(Optional[int]): Maximum number of requests sent at the same time, default: 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing one result per search, in the order of searches, e.g.
+            {
+                "success": True,                   # Whether successful
+                "data": {                          # If successful, contains the following fields
+                    "results": [                   # One result per search
+                        {
+                            "dest_name": "shanghai",          # Destination name of the search
+                            "arrival_date": "2025-04-19",     # Check-in date of the search
+                            "departure_date": "2025-04-22",   # Check-out date of the search
+                            "success": True,                  # Whether this search succeeded, otherwise "error" is set
+                            "destinations": [                 # Matched destinations, best match first
+                                {
+                                    "name": "Shanghai",       # Destination name
+                                    "dest_id": "-1924465",    # Destination ID
+                                    "search_type": "city",    # Search type
+                                    "hotels": [...],          # Hotels of all fetched pages, same format as search_hotels_by_dest_name
+                                    "missing_pages": []       # Pages that failed after retrying, e.g. [{"page": 2, "error": "..."}]
+                                }
+                            ]
+                        }
+                    ]
+                }
+            }
+        """
+
+        # Example:
+        #     >>> from external_api.data_sources.client import get_client
+        #     >>> client = get_client()
+        #     >>> result = await client.booking.search_hotels_by_dest_names(
+        #     ...     searches=[
+        #     ...         {"dest_name": "shanghai", "arrival_date": "2025-04-19", "departure_date": "2025-04-22"},
+        #     ...         {"dest_name": "hangzhou", "arrival_date": "2025-04-22", "departure_date": "2025-04-24"},
+        #     ...     ],
+        #     ...     pages=2,
+        #     ... )
+        #     >>> for item in result["data"]["results"]:
+        #     ...     print(item["dest_name"], item["success"])
+        try:
+            semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+            # 同一批次中名称相同的目的地只解析一次，跨批次由 _search_hotel_destinations 的缓存复用
+            destination_tasks: Dict[str, asyncio.Future] = {}
+
+            async def resolve(dest_name: str) -> Dict[str, Any]:
+                key = dest_name.strip().lower()
+                task = destination_tasks.get(key)
+                if task is None:
+
+                    async def search_destination() -> Dict[str, Any]:
+                        async with semaphore:
+                            return await self._search_hotel_destinations(key)
+
+                    task = destination_tasks[key] = asyncio.ensure_future(search_destination())
+                return await task
+
+            async def search_destination_hotels(destination: Dict[str, Any], arrival_date: str, departure_date: str) -> Dict[str, Any]:
+                async def fetch_page(page):
+                    async with semaphore:
+                        result = await self._search_hotels_by_destid(
+                            dest_id=destination["dest_id"],
+                            search_type=destination["search_type"].upper(),
+                            arrival_date=arrival_date,
+                            departure_date=departure_date,
+                            adults=adults,
+                            children_age=children_age,
+                            room_qty=room_qty,
+                            page_number=page[0],
+                            price_min=price_min,
+                            price_max=price_max,
+                            languagecode=languagecode,
+                            currency_code=currency_code,
+                            sort_by=sort_by,
+                            categories_filter=categories_filter,
+                        )
+                    if result["success"]:
+                        return {"success": True, "data": result["data"]["hotels"]}
+                    return result
+
+                # 每页数量由接口决定，这里只关心页码；并发由共享的 semaphore 限制
+                page_results = await gather_pages(fetch_page, [(page, 0) for page in range(1, pages + 1)], pages)
+                return {
+                    "name": destination["name"],
+                    "dest_id": destination["dest_id"],
+                    "search_type": destination["search_type"],
+                    "hotels": page_results.data,
+                    "missing_pages": page_results.missing_pages,
+                }
+
+            async def run_search(search: Dict[str, str]) -> Dict[str, Any]:
+                item = {
+                    "dest_name": search.get("dest_name"),
+                    "arrival_date": search.get("arrival_date"),
+                    "departure_date": search.get("departure_date"),
+                }
+                if not all(item.values()):
+                    return {**item, "success": False, "error": "dest_name, arrival_date and departure_date are required"}
+
+                dest_result = await resolve(item["dest_name"])
+                if not dest_result["success"]:
+                    return {**item, "success": False, "error": dest_result["error"]}
+                destinations = dest_result["data"]["destinations"][: max(1, top_destinations)]
+                if not destinations:
+                    return {**item, "success": False, "error": f"No matching destination found: {item['dest_name']}"}
+
+                results = await asyncio.gather(
+                    *[search_destination_hotels(destination, item["arrival_date"], item["departure_date"]) for destination in destinations]
+                )
+                if all(not result["hotels"] and result["missing_pages"] for result in results):
+                    return {**item, "success": False, "error": results[0]["missing_pages"][0]["error"]}
+                return {**item, "success": True, "destinations": results}
+
+            results = await asyncio.gather(*[run_search(search) for search in searches])
+            return {"success": True, "data": {"results": results}}
+
+        except Exception as e:
+            error_msg = f"Error occurred while searching hotels: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
+    async def iter_hotel_details(
+        self,
+        hotel_ids: List[str],
+        arrival_date: str,
+        departure_date: str,
+        adults: int = 1,
+        children_age: Optional[str] = None,
+        room_qty: int = 1,
+        languagecode: str = "en-us",
+        currency_code: str = "EUR",
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the details of many hotels, yielding each hotel as soon as its details arrive, e.g. to fill in a hotel list progressively.
+        Use it with `async for result in client.booking.iter_hotel_details(...)`.
+
+        Args:
+            hotel_ids(List[str]): Hotel IDs, e.g. the hotel_id of search_hotels_by_dest_name results
+            arrival_date(str): Check-in date, format: YYYY-MM-DD
+            departure_date(str): Check-out date, format: YYYY-MM-DD
+            adults(int): Number of adults, default is 1
+            children_age(Optional[str]): Children's ages, comma separated, e.g.: 0,17
+            room_qty(int): Number of rooms, default is 1
+            languagecode(str): Language code, default en-us
+            currency_code(str): Currency code, default EUR
+            max_concurrency(Optional[int]): Maximum number of hotels requested at the same time, default: 8
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: One result per hotel in completion order, e.g.
+            {
+                "hotel_id": "191605",          # Hotel ID
+                "success": True,               # Whether successful
+                "data": {...},                 # If successful, same as data of search_hotel_details
+                "error": "..."                 # If failed, error message
+            }
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+        async def fetch(hotel_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.search_hotel_details(
+                    hotel_id=hotel_id,
+                    arrival_date=arrival_date,
+                    departure_date=departure_date,
+                    adults=adults,
+                    children_age=children_age,
+                    room_qty=room_qty,
+                    languagecode=languagecode,
+                    currency_code=currency_code,
+                )
+            return {"hotel_id": hotel_id, **result}
+
+        tasks = [asyncio.ensure_future(fetch(hotel_id)) for hotel_id in dict.fromkeys(hotel_ids)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _prefetch_hotel_details(self, hotel_ids: List[str], **kwargs: Any):
+        """
+        在后台并发获取酒店详情写入缓存，之后相同参数的 search_hotel_details 会命中缓存或等待进行中的请求
+
+        kwargs 为 search_hotel_details 除 hotel_id 外的参数，必须与搜索时的语言和货币一致
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def prefetch(hotel_id: str):
+            async with semaphore:
+                result = await self.search_hotel_details(hotel_id=hotel_id, **kwargs)
+            if not result["success"]:
+                logger.warning(f"Failed to prefetch details of hotel {hotel_id}: {result['error']}")
+
+        for hotel_id in dict.fromkeys(hotel_ids):
+            task = asyncio.ensure_future(prefetch(hotel_id))
+            self._prefetch_tasks.add(task)
+            task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _aclose(self):
+        """取消当前事件循环上尚未完成的详情预取任务，避免它们在会话关闭后继续运行"""
+        loop = asyncio.get_running_loop()
+        tasks = [task for task in self._prefetch_tasks if task.get_loop() is loop]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @cached(ttl=3600)
     async def search_hotel_details(
         self,
         hotel_id: str,
@@ -767,11 +1178,7 @@ class BookingSource(BaseAPI):
             request_url = f"{self.proxy_url}/api/v1/hotels/getHotelDetails"
 
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -890,6 +1297,13 @@ class BookingSource(BaseAPI):
         return f"{hours} hours {mins} minutes"
 
 
+def _date_range(start: str, end: str) -> List[str]:
+    """start 到 end（含）之间的每一天，格式 YYYY-MM-DD"""
+    first = datetime.strptime(start, "%Y-%m-%d")
+    days = (datetime.strptime(end, "%Y-%m-%d") - first).days
+    return [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days + 1)]
+
+
 if __name__ == "__main__":
     import json
 
@@ -0,0 +1,368 @@
+"""
+数据源响应缓存
+
+通过 @cached(ttl) 装饰 BaseAPI 的方法，成功的结果按 (数据源, 方法, 参数) 缓存 ttl 秒:
+- 内存中的 LRU 缓存，按条目数限制大小
+- 可选的 SQLite 磁盘缓存，跨进程复用，只保存可以 JSON 序列化的结果
+- 同一事件循环上参数相同且仍在进行中的调用会合并为一次请求，这是缓存方法唯一的合并层（单飞代理会跳过缓存方法）；
+  所有等待者都被取消时请求随之取消
+- 命中时不深拷贝：返回结果字典及其 data 的浅拷贝，更深层的对象与缓存共享，调用方不应修改
+- 需要较新数据的调用方（例如价格轮询）可以通过 cache_max_age 限制本次调用接受的缓存结果的最长存在时间
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .call_context import current_method
+
+logger = logging.getLogger("data_sources_cache")
+
+# 每写入多少次清理一次磁盘缓存
+_DISK_PRUNE_INTERVAL = 100
+
+# 本次调用接受的缓存结果的最长存在时间（秒），None 表示不限制；在当前上下文及其创建的任务中生效
+cache_max_age: ContextVar[Optional[float]] = ContextVar("cache_max_age", default=None)
+
+# 进行中的加载，以及等待它的调用数（放在列表中以便原地修改）
+_Inflight = Tuple[asyncio.Future, List[int]]
+
+
+class SQLiteCacheBackend:
+    """基于 SQLite 的磁盘缓存，值以 JSON 保存"""
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        """
+        初始化磁盘缓存
+
+        Args:
+            path: 数据库文件路径
+            max_entries: 最多保存的条目数，超出时优先删除最早过期的条目
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """获取未过期的缓存，返回 (过期时间, 值)"""
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at, value FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, value: Any, expires_at: float) -> bool:
+        """写入缓存，值无法 JSON 序列化时返回 False"""
+        try:
+            text = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, expires_at, value) VALUES (?, ?, ?)", (key, expires_at, text)
+            )
+            self._writes += 1
+            if self._writes % _DISK_PRUNE_INTERVAL == 0:
+                self._prune()
+        return True
+
+    def _prune(self):
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE key IN "
+            "(SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    数据源响应缓存
+
+    内存 LRU 在前，可选的磁盘缓存在后；磁盘命中的结果会放回内存
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None):
+        """
+        初始化响应缓存
+
+        Args:
+            max_entries: 内存中最多保存的条目数，为 0 时不缓存
+            path: SQLite 磁盘缓存路径，为 None 时只使用内存
+            ttls: 覆盖方法默认的缓存时间，键为 "数据源名称.方法名"，值为秒数，0 表示不缓存
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[SQLiteCacheBackend] = None
+        if path:
+            try:
+                self._disk = SQLiteCacheBackend(path)
+            except sqlite3.Error as e:
+                logger.warning(f"打开磁盘缓存失败，只使用内存缓存: {e}")
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _Inflight]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "evictions": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ResponseCache":
+        """根据数据源配置创建响应缓存"""
+        return cls(
+            max_entries=config.get("response_cache_max_entries", 1024),
+            path=config.get("response_cache_path"),
+            ttls=config.get("cache_ttls"),
+        )
+
+    def get_ttl(self, method_key: str, default: float) -> float:
+        """获取方法的缓存时间，配置优先于装饰器上的默认值"""
+        return self.ttls.get(method_key, default)
+
+    async def get_or_load(self, key: str, ttl: float, loader: Callable[[], Any], max_age: Optional[float] = None) -> Any:
+        """
+        获取缓存的结果，未命中时调用 loader 加载，进行中的相同调用共用一次加载
+
+        Args:
+            key: 缓存键
+            ttl: 缓存时间（秒）
+            loader: 无参的协程函数，返回数据源方法的结果
+            max_age: 只接受存在时间不超过该值（秒）的缓存结果，None 表示不限制
+
+        Returns:
+            Any: 方法的结果，见 share_result
+        """
+        found, value = await self._lookup(key, ttl, max_age)
+        if found:
+            return value
+
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+        entry = inflight.get(key)
+        if entry is not None:
+            self._count("coalesced")
+        else:
+            self._count("misses")
+            entry = inflight[key] = (asyncio.ensure_future(self._load(key, ttl, loader)), [0])
+            entry[0].add_done_callback(lambda _: inflight.pop(key, None) if inflight.get(key) is entry else None)
+
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            # 某个等待者被取消时加载仍然继续，其他等待者不受影响
+            result = await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                # 所有等待者都已取消，没有人需要结果，取消加载；之后的调用重新加载
+                task.cancel()
+                inflight.pop(key, None)
+        return share_result(result)
+
+    async def _lookup(self, key: str, ttl: float, max_age: Optional[float]) -> Tuple[bool, Any]:
+        now = time.time()
+        # 条目的写入时间按 过期时间 - ttl 推算，存在时间超过 max_age 的条目视为未命中，但不删除
+        fresh_after = now if max_age is None else max(now, now + ttl - max_age)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > fresh_after:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, share_result(entry[1])
+                if entry[0] <= now:
+                    del self._entries[key]
+
+        if self._disk is not None:
+            try:
+                entry = await asyncio.get_running_loop().run_in_executor(None, self._disk.get, key)
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"读取磁盘缓存失败: {e}")
+                entry = None
+            if entry is not None and entry[0] > fresh_after:
+                self._count("disk_hits")
+                self._put(key, entry[1], entry[0])
+                return True, share_result(entry[1])
+        return False, None
+
+    async def _load(self, key: str, ttl: float, loader: Callable[[], Any]) -> Any:
+        result = await loader()
+        # 只缓存成功的结果，结果对象本身只保存在缓存中，调用方拿到的都是 share_result 的副本
+        if isinstance(result, dict) and result.get("success") is True:
+            expires_at = time.time() + ttl
+            self._put(key, result, expires_at)
+            self._count("stores")
+            if self._disk is not None:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self._disk.set, key, result, expires_at)
+                except sqlite3.Error as e:
+                    logger.warning(f"写入磁盘缓存失败: {e}")
+        return result
+
+    def _put(self, key: str, value: Any, expires_at: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict[str, Any]: 命中、未命中、合并、写入、淘汰次数，当前条目数和命中率
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """清空内存和磁盘缓存"""
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self):
+        """关闭磁盘缓存"""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+def share_result(value: Any) -> Any:
+    """
+    返回可以交给调用方的结果：复制结果字典和其中的 data（字典或列表），更深层的对象共享
+
+    调用方可以增删结果和 data 的字段或元素，但不应修改更深层的对象，它们可能被缓存和其他调用方共享
+
+    Args:
+        value: 数据源方法的结果
+
+    Returns:
+        Any: 浅拷贝的结果
+    """
+    if not isinstance(value, dict):
+        return value
+    value = dict(value)
+    data = value.get("data")
+    if isinstance(data, dict):
+        value["data"] = dict(data)
+    elif isinstance(data, list):
+        value["data"] = list(data)
+    return value
+
+
+def make_call_key(method_key: str, signature: inspect.Signature, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[str]:
+    """
+    根据方法和规范化后的参数生成调用的唯一键，位置参数和关键字参数写法不同但含义相同时得到相同的键
+
+    Args:
+        method_key: "数据源名称.方法名"
+        signature: 方法签名
+        args: 位置参数，第一个为 self
+        kwargs: 关键字参数
+
+    Returns:
+        Optional[str]: 调用键，参数不匹配签名或无法 JSON 序列化时返回 None
+    """
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    arguments = dict(list(bound.arguments.items())[1:])
+    try:
+        digest = hashlib.sha1(json.dumps(arguments, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    except (TypeError, ValueError):
+        return None
+    return f"{method_key}:{digest}"
+
+
+def cached(ttl: float) -> Callable:
+    """
+    缓存数据源方法成功的结果
+
+    Args:
+        ttl: 默认缓存时间（秒），可以通过配置中的 cache_ttls 按方法覆盖
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache = self._get_response_cache()
+            method_key = f"{self.source_name}.{func.__name__}"
+            # 记录当前方法，供重试策略按方法查找配置
+            token = current_method.set(method_key)
+            try:
+                method_ttl = cache.get_ttl(method_key, ttl) if cache is not None else 0
+                max_age = cache_max_age.get()
+                if method_ttl <= 0:
+                    return await func(self, *args, **kwargs)
+
+                key = make_call_key(method_key, signature, (self, *args), kwargs)
+                if key is None:
+                    # 参数无法稳定序列化，不缓存
+                    return await func(self, *args, **kwargs)
+                return await cache.get_or_load(key, method_ttl, lambda: func(self, *args, **kwargs), max_age)
+            finally:
+                current_method.reset(token)
+
+        wrapper._cache_ttl = ttl  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> ResponseCache:
+    """
+    获取默认的响应缓存，供未绑定到 ApiClient 的数据源使用
+
+    Returns:
+        ResponseCache: 默认响应缓存
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:  # Double-check
+                _default_cache = ResponseCache()
+    return _default_cache
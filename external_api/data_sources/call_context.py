@@ -0,0 +1,12 @@
+"""
+当前正在执行的数据源方法
+
+cache 和 retry 都依赖这里，本模块不导入任何第三方库，避免导入 client 时连带导入 aiohttp
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+# 当前正在执行的数据源方法（"数据源名称.方法名"），由 @cached 装饰器和单飞代理设置，用于按方法查找重试策略；
+# 直接调用数据源上没有响应缓存的方法时未设置，重试按数据源的策略
+current_method: ContextVar[Optional[str]] = ContextVar("data_source_method", default=None)
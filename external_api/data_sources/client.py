@@ -7,17 +7,27 @@ import inspect
 import logging
 import os
 import pkgutil
+import sys
 import threading
 from enum import Enum
 from pathlib import Path
-from typing import Dict
-
-from docstring_parser import parse
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, cast
 
 from .base import EXCLUDE_METHODS, BaseAPI
+from .manifest import get_manifest_cache
+from .single_flight import SingleFlight, SingleFlightSource
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
+    from .price_poller import PriceSubscriptionManager
+    from .rate_limit import RateLimiter
+    from .retry import RetryExecutor
+    from .session import SessionManager
 
 # 用于在shell中设置LLM_GATEWAY_BASE_URL环境变量
 LLM_GATEWAY_BASE_URL_ENV_NAME = "LLM_GATEWAY_BASE_URL"
+# 用于在shell中指定响应缓存的 SQLite 文件路径，不设置时只在内存中缓存
+RESPONSE_CACHE_PATH_ENV_NAME = "DATA_SOURCES_CACHE_PATH"
 
 logger = logging.getLogger("data_sources_client")
 
@@ -39,6 +49,35 @@ config = {
     "serper_base_url": "google.serper.dev",
     "external_api_proxy_url": get_external_api_proxy_url(),
     "timeout": 60,
+    # 共享连接池配置
+    "pool_limit": 100,
+    "pool_limit_per_host": 20,
+    "keepalive_timeout": 30,
+    "dns_cache_ttl": 300,
+    # 使用 httpx 的数据源（TripAdvisor）是否启用 HTTP/2 多路复用，需要安装 h2
+    "http2": False,
+    # 批量查询时同时发出的最大请求数
+    "fan_out_concurrency": 8,
+    # 响应缓存配置，cache_ttls 按 "数据源名称.方法名" 覆盖默认缓存时间（秒），0 表示不缓存
+    "response_cache_max_entries": 1024,
+    "response_cache_path": os.getenv(RESPONSE_CACHE_PATH_ENV_NAME) or None,
+    "cache_ttls": {},
+    # TripAdvisor 附近地点查询的位置缓存，中心点与已缓存的查询相距不超过 reuse_radius 米时按新的中心点重算距离后复用结果，0 表示不复用
+    "nearby_cache": {"reuse_radius": 100, "ttl": 3600, "max_entries": 1024},
+    # 商品和金属价格订阅，相同品种和货币的订阅者共享一个轮询任务，interval 为默认轮询间隔（秒），queue_size 为每个订阅者最多积压的更新数
+    "price_polling": {"interval": 60, "queue_size": 16},
+    # 合并同时进行的相同调用（数据源、方法、参数都相同）
+    "single_flight": True,
+    # 按上游 host（X-Original-Host）限流，rate 为每秒请求数，burst 为允许的突发请求数
+    # rate_limits 按 host 单独配置，例如 {"twitter154.p.rapidapi.com": {"rate": 2, "burst": 5}}
+    # default_rate_limit 为 None 时未单独配置的 host 不主动限流，只在收到 429 后按 Retry-After 暂停
+    "default_rate_limit": None,
+    "rate_limits": {},
+    # 请求失败时的重试策略，可重试的错误为超时、连接错误、429 和 5xx，非幂等请求不重试
+    # hedge 为 True 时，请求超过该方法近期 p95 延迟仍未返回会再发一个相同的请求
+    # retry_policies 按 "数据源名称.方法名" 或 "数据源名称" 覆盖，例如 {"yahoo_finance.get_stock_price": {"hedge": True}}
+    "retry_policy": {"max_attempts": 3, "base_delay": 0.5, "max_delay": 8, "hedge": False},
+    "retry_policies": {},
 }
 
 
@@ -78,37 +117,239 @@ class ApiClient:
                 return
             self._sources: Dict[str, BaseAPI] = {}
             self._functions: Dict[str, BaseAPI] = {}
+            # 数据源清单: api 名称 -> {module, class_name, name, description}，数据源在首次访问时才导入和实例化
+            self._manifest: Dict[ApiType, Dict[str, Dict[str, Any]]] = {ApiType.DATA_SOURCE: {}, ApiType.FUNCTION: {}}
+            self._load_lock = threading.RLock()
+            self._session_manager: Optional["SessionManager"] = None
+            self._response_cache: Optional["ResponseCache"] = None
+            self._rate_limiter: Optional["RateLimiter"] = None
+            self._retry_executor: Optional["RetryExecutor"] = None
+            self._price_subscriptions: Optional["PriceSubscriptionManager"] = None
+            self._single_flight = SingleFlight()
+            self._single_flight_sources: Dict[str, SingleFlightSource] = {}
+            # 进程内的描述缓存: (api 类型, api 名称, 版本) -> markdown，数据源重新加载时版本号递增
+            self._desc_cache: Dict[Tuple[ApiType, str, int], str] = {}
+            self._desc_versions: Dict[Tuple[ApiType, str], int] = {}
             self._load_data_sources()
             self._initialized = True
 
     def _load_data_sources(self):
         """
-        动态加载所有可用的数据源
-        通过扫描data_sources目录下的所有模块来加载数据源
+        扫描data_sources目录下的所有模块，登记可用的数据源
+        能静态解析的模块只记录清单，其余模块立即导入加载
         """
         current_dir = Path(__file__).parent
+        manifest_cache = get_manifest_cache()
         for module_info in pkgutil.iter_modules([str(current_dir)]):
-            type_dict = self._sources
+            api_type = ApiType.DATA_SOURCE
             if module_info.name.endswith("_function"):
-                type_dict = self._functions
+                api_type = ApiType.FUNCTION
             elif not module_info.name.endswith("_source"):
                 continue
 
-            try:
-                module = importlib.import_module(f".{module_info.name}", package="external_api.data_sources")
-                for item_name in dir(module):
-                    item = getattr(module, item_name)
-                    if (
-                        isinstance(item, type)
-                        and issubclass(item, BaseAPI)
-                        and item != BaseAPI
-                        and item.__name__ not in self._exclude_sources
-                    ):
-                        source = item(config)
-                        type_dict[source.source_name] = source
-            except Exception as e:
-                logger.error(f"加载数据源模块 {module_info.name} 失败: {str(e)}\n")
-                logger.exception(e)
+            entries = manifest_cache.get_sources(f"{__package__}.{module_info.name}", current_dir / f"{module_info.name}.py")
+            if entries is None:
+                self._import_module(module_info.name, api_type)
+                continue
+
+            for entry in entries:
+                if entry["class_name"] in self._exclude_sources:
+                    continue
+                self._manifest[api_type][entry["source_name"]] = {"module": module_info.name, **entry}
+        manifest_cache.save()
+
+    def _import_module(self, module_name: str, api_type: ApiType, class_name: Optional[str] = None):
+        """
+        导入数据源模块并实例化其中的数据源
+
+        Args:
+            module_name: 模块名
+            api_type: 数据源类型
+            class_name: 只实例化指定的类，为 None 时实例化模块中的所有数据源
+        """
+        type_dict = self._sources if api_type == ApiType.DATA_SOURCE else self._functions
+        try:
+            module = importlib.import_module(f".{module_name}", package=__package__)
+            for item_name in dir(module):
+                item = getattr(module, item_name)
+                if (
+                    isinstance(item, type)
+                    and issubclass(item, BaseAPI)
+                    and item != BaseAPI
+                    and item.__name__ not in self._exclude_sources
+                    and (class_name is None or item.__name__ == class_name)
+                ):
+                    source = item(config)
+                    source.bind_session_manager(self.session_manager)
+                    source.bind_response_cache(self.response_cache)
+                    source.bind_rate_limiter(self.rate_limiter)
+                    source.bind_retry_executor(self.retry_executor)
+                    type_dict[source.source_name] = source
+                    self._manifest[api_type].setdefault(
+                        source.source_name,
+                        {
+                            "module": module_name,
+                            "class_name": item.__name__,
+                            "source_name": source.source_name,
+                            **source.get_api_info(),
+                        },
+                    )
+        except Exception as e:
+            logger.error(f"加载数据源模块 {module_name} 失败: {str(e)}\n")
+            logger.exception(e)
+
+    def _get_api(self, api_type: ApiType, api_name: str) -> Optional[BaseAPI]:
+        """
+        获取数据源实例，首次访问时导入并实例化
+
+        Args:
+            api_type: 数据源类型
+            api_name: 数据源名称
+
+        Returns:
+            Optional[BaseAPI]: 数据源实例，不存在时返回 None
+        """
+        type_dict = self._sources if api_type == ApiType.DATA_SOURCE else self._functions
+        api = type_dict.get(api_name)
+        if api is not None:
+            return api
+
+        entry = self._manifest[api_type].get(api_name)
+        if entry is None:
+            return None
+
+        with self._load_lock:
+            if api_name not in type_dict:  # Double-check
+                self._import_module(entry["module"], api_type, entry["class_name"])
+        return type_dict.get(api_name)
+
+    @property
+    def session_manager(self) -> "SessionManager":
+        """
+        Get the session manager shared by all data sources
+
+        Returns:
+            SessionManager: Shared session manager
+        """
+        if self._session_manager is None:
+            from .session import SessionManager
+
+            with self._load_lock:
+                if self._session_manager is None:  # Double-check
+                    self._session_manager = SessionManager.from_config(config)
+        return self._session_manager
+
+    @property
+    def response_cache(self) -> "ResponseCache":
+        """
+        Get the response cache shared by all data sources
+
+        Returns:
+            ResponseCache: Shared response cache
+        """
+        if self._response_cache is None:
+            from .cache import ResponseCache
+
+            with self._load_lock:
+                if self._response_cache is None:  # Double-check
+                    self._response_cache = ResponseCache.from_config(config)
+        return self._response_cache
+
+    @property
+    def rate_limiter(self) -> "RateLimiter":
+        """
+        Get the per-host rate limiter shared by all data sources
+
+        Returns:
+            RateLimiter: Shared rate limiter
+        """
+        if self._rate_limiter is None:
+            from .rate_limit import RateLimiter
+
+            with self._load_lock:
+                if self._rate_limiter is None:  # Double-check
+                    self._rate_limiter = RateLimiter.from_config(config)
+        return self._rate_limiter
+
+    @property
+    def retry_executor(self) -> "RetryExecutor":
+        """
+        Get the retry and hedging executor shared by all data sources
+
+        Returns:
+            RetryExecutor: Shared retry executor
+        """
+        if self._retry_executor is None:
+            from .retry import RetryExecutor
+
+            with self._load_lock:
+                if self._retry_executor is None:  # Double-check
+                    self._retry_executor = RetryExecutor.from_config(config)
+        return self._retry_executor
+
+    @property
+    def price_subscriptions(self) -> "PriceSubscriptionManager":
+        """
+        Get the manager of live commodity and metal price subscriptions
+
+        Returns:
+            PriceSubscriptionManager: Shared subscription manager
+        """
+        if self._price_subscriptions is None:
+            from .price_poller import PriceSubscriptionManager
+
+            with self._load_lock:
+                if self._price_subscriptions is None:  # Double-check
+                    self._price_subscriptions = PriceSubscriptionManager.from_config(config["price_polling"])
+        return self._price_subscriptions
+
+    def get_retry_stats(self) -> Dict[str, int]:
+        """
+        Get retry and hedged request statistics
+
+        Returns:
+            Dict[str, int]: Number of requests, retries, hedged requests and hedge wins
+        """
+        return self.retry_executor.stats()
+
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-host request, throttle and wait statistics of the rate limiter
+
+        Returns:
+            Dict[str, Dict[str, float]]: Statistics keyed by upstream host
+        """
+        return self.rate_limiter.stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics of the shared response cache
+
+        Returns:
+            Dict[str, Any]: Cache statistics
+        """
+        return self.response_cache.stats()
+
+    def get_single_flight_stats(self) -> Dict[str, int]:
+        """
+        Get statistics of concurrent identical calls merged by single-flight
+
+        Returns:
+            Dict[str, int]: Number of executed (leaders) and merged (followers) calls
+        """
+        return self._single_flight.stats()
+
+    async def close(self):
+        """
+        Close the price subscriptions, background tasks of loaded data sources,
+        and the pooled HTTP session and httpx client of the current event loop
+        """
+        if self._price_subscriptions is not None:
+            await self._price_subscriptions.close()
+        for source in [*self._sources.values(), *self._functions.values()]:
+            await source._aclose()
+        if self._session_manager is not None:
+            await self._session_manager.close()
 
     def get_function_desc(self, function_name: str) -> str:
         """
@@ -134,9 +375,80 @@ class ApiClient:
         """
         return self._get_desc(ApiType.DATA_SOURCE, source_name)
 
+    def get_descs(self, names: List[str], api_type: ApiType = ApiType.DATA_SOURCE) -> str:
+        """
+        Get the descriptions of several data sources (or functions) in one pass,
+        joined from the per-name cache so only existing names are cached
+
+        Args:
+            names: List[str] - data source or function names
+            api_type: ApiType - type of the names, data source by default
+
+        Returns:
+            str: Descriptions joined in the given order
+        """
+        return "\n".join(self._get_desc(api_type, name) for name in names)
+
+    def invalidate_desc(self, api_name: Optional[str] = None, api_type: Optional[ApiType] = None):
+        """
+        Drop cached descriptions so they are rendered again on next access
+
+        Args:
+            api_name: Optional[str] - only invalidate this data source or function, all when None
+            api_type: Optional[ApiType] - only invalidate this type, all types when None
+        """
+        api_types = [api_type] if api_type else list(ApiType)
+        for current_type in api_types:
+            names = [api_name] if api_name else list(self._manifest[current_type])
+            for name in names:
+                version_key = (current_type, name)
+                self._desc_versions[version_key] = self._desc_versions.get(version_key, 0) + 1
+
+        # 清理已过期的条目
+        self._desc_cache = {
+            key: value for key, value in self._desc_cache.items() if key[2] == self._desc_versions.get(key[:2], 0)
+        }
+
+    def reload_source(self, api_name: str, api_type: ApiType = ApiType.DATA_SOURCE):
+        """
+        Reload the module of a data source (or function) and invalidate its cached descriptions
+
+        Args:
+            api_name: str - data source or function name
+            api_type: ApiType - data source by default
+
+        Raises:
+            KeyError: data source or function does not exist
+        """
+        entry = self._manifest[api_type][api_name]
+        module_name = entry["module"]
+        type_dict = self._sources if api_type == ApiType.DATA_SOURCE else self._functions
+
+        with self._load_lock:
+            module = sys.modules.get(f"{__package__}.{module_name}")
+            if module is not None:
+                importlib.reload(module)
+
+            stale = [name for name, item in self._manifest[api_type].items() if item["module"] == module_name]
+            for name in stale:
+                del self._manifest[api_type][name]
+                type_dict.pop(name, None)
+
+            entries = get_manifest_cache().get_sources(f"{__package__}.{module_name}", Path(__file__).parent / f"{module_name}.py")
+            if entries is None:
+                self._import_module(module_name, api_type)
+            else:
+                for item in entries:
+                    if item["class_name"] not in self._exclude_sources:
+                        self._manifest[api_type][item["source_name"]] = {"module": module_name, **item}
+
+        for name in set(stale) | {name for name, item in self._manifest[api_type].items() if item["module"] == module_name}:
+            self.invalidate_desc(name, api_type)
+
     def _get_desc(self, api_type: ApiType, api_name: str) -> str:
         """
-        Get a brief description and usage example of the specified data source
+        Get a brief description and usage example of the specified data source,
+        cached in process and served from the manifest when it holds an up-to-date rendering
 
         Args:
             api_type: ApiType - data source type
@@ -145,17 +457,60 @@ class ApiClient:
         Returns:
             str: Readable description of the data source and its API
         """
-        output_lines = ["# Available data sources (refer to the python code examples, write python code to call them)\n"]
+        key = (api_type, api_name, self._desc_versions.get((api_type, api_name), 0))
+        desc = self._desc_cache.get(key)
+        if desc is None:
+            desc = self._load_desc(api_type, api_name)
+            if api_name in self._manifest[api_type]:
+                self._desc_cache[key] = desc
+        return desc
+
+    def _load_desc(self, api_type: ApiType, api_name: str) -> str:
+        """
+        Load the description from the manifest, rendering and persisting it on a miss
+
+        Args:
+            api_type: ApiType - data source type
+            api_name: str - data source name
+
+        Returns:
+            str: Readable description of the data source and its API
+        """
+        entry = self._manifest[api_type].get(api_name)
+        if entry is None:
+            return f"# {api_type.value} {api_name} does not exist"
 
-        # Directly use the mapping value to get the data source instance
-        if api_type == ApiType.DATA_SOURCE:
-            api = self._sources.get(api_name)
-        else:
-            api = self._functions.get(api_name)
+        manifest_cache = get_manifest_cache()
+        module_name = f"{__package__}.{entry['module']}"
+        module_path = Path(__file__).parent / f"{entry['module']}.py"
+        desc = manifest_cache.get_field(module_name, module_path, api_name, "desc")
+        if desc is not None:
+            return desc
 
+        api = self._get_api(api_type, api_name)
         if not api:
             return f"# {api_type.value} {api_name} does not exist"
 
+        desc = self._render_desc(api_name, api)
+        base_entry = {key: value for key, value in entry.items() if key != "module"}
+        manifest_cache.set_field(module_name, module_path, api_name, "desc", desc, base_entry)
+        return desc
+
+    def _render_desc(self, api_name: str, api: BaseAPI) -> str:
+        """
+        Render the markdown description of a data source from its docstrings
+
+        Args:
+            api_name: str - data source name
+            api: BaseAPI - data source instance
+
+        Returns:
+            str: Readable description of the data source and its API
+        """
+        from docstring_parser import parse
+
+        output_lines = ["# Available data sources (refer to the python code examples, write python code to call them)\n"]
+
         api_info = api.get_api_info()
 
         # Add data source title and description
@@ -235,16 +590,14 @@ class ApiClient:
         """
         result = {}
 
-        for name, source in self._sources.items():
+        for name, entry in self._manifest[ApiType.DATA_SOURCE].items():
             # yahoo_finance和twitter 已通过 tool 实现，这里不展示
             if name in ["yahoo_finance", "twitter", "booking", "pinterest", "tripadvisor"]:
                 continue
 
-            source_info = source.get_api_info()
-
             # Get display name and description
-            display_name = source_info.get("name", name)
-            source_desc = source_info.get("description", "No description available")
+            display_name = entry.get("name", name)
+            source_desc = entry.get("description", "No description available")
 
             # Add to result dict
             result[name] = {"source_name": display_name, "description": source_desc}
@@ -255,27 +608,47 @@ class ApiClient:
         """
         获取所有数据源的所有方法的描述
         """
-        result = []
-        for function_name, function in self._functions.items():
-            result.append(self.get_function_desc(function_name))
-        return "\n".join(result)
+        return self.get_descs(list(self._manifest[ApiType.FUNCTION]), ApiType.FUNCTION)
+
+    def build_manifest(self):
+        """
+        Render and persist descriptions and capabilities of every data source and function,
+        so later processes can serve them from the manifest without introspection
+        """
+        for api_type, entries in self._manifest.items():
+            for api_name in list(entries):
+                self._get_desc(api_type, api_name)
+                api = self._get_api(api_type, api_name)
+                if api is not None:
+                    api.get_capabilities()
 
     def __getattr__(self, name: str) -> BaseAPI:
         """
         Get data source instance by attribute access
+        When single-flight is enabled, a proxy that merges concurrent identical calls is returned;
+        the proxy passes isinstance checks against the data source class
 
         Args:
             name: data source name
 
         Returns:
-            BaseDataSource: data source instance
+            BaseAPI: data source instance or its single-flight proxy
 
         Raises:
             AttributeError: data source does not exist
         """
-        if name not in self._sources:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        source = self._get_api(ApiType.DATA_SOURCE, name)
+        if source is None:
             raise AttributeError(f"Data source {name} does not exist")
-        return self._sources[name]
+        if not config.get("single_flight", True):
+            return source
+
+        proxy = self._single_flight_sources.get(name)
+        if proxy is None or proxy._source is not source:
+            proxy = self._single_flight_sources[name] = SingleFlightSource(source, self._single_flight)
+        return cast(BaseAPI, proxy)
 
 
 # 全局默认实例
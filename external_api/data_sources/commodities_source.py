@@ -10,6 +10,7 @@ from typing import Any, Dict, Optional
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
 
 logger = logging.getLogger("commodities_source")
 
@@ -45,6 +46,7 @@ class CommoditiesSource(BaseAPI):
             "description": "Commodity price data source, provides price information for commodities such as COCOA, COFFEE, CORN, OIL, SOYBEAN, SUGAR, WHEAT, etc.",
         }
 
+    @cached(ttl=86400)
     async def get_supported_commodities(self) -> Dict[str, Any]:
         """Get the list of supported commodities.
         This method is used to get the list of commodities that can be queried.
@@ -84,12 +86,7 @@ class CommoditiesSource(BaseAPI):
             request_url = f"{self.proxy_url}/v1/supported"
 
             # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, timeout=self._timeout) as response:
-                    response.raise_for_status()
-
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            data = await self._request_json("GET", request_url, headers=self._headers, timeout=self._timeout, content_type=None)
 
             if isinstance(data, str):
                 data = json.loads(data)
@@ -119,6 +116,7 @@ class CommoditiesSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=60)
     async def get_commodities_price(
         self,
         commodity_code: str,
@@ -171,12 +169,7 @@ class CommoditiesSource(BaseAPI):
             request_url = f"{self.proxy_url}/v1/market-data"
 
             # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            data = await self._request_json("GET", request_url, headers=self._headers, params=params, timeout=self._timeout, content_type=None)
 
             if isinstance(data, str):
                 data = json.loads(data)
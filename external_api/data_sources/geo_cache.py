@@ -0,0 +1,268 @@
+"""
+按地理位置复用查询结果的缓存
+
+以查询中心点的 geohash 分桶，新的查询在附近（reuse_radius 米内）已有未过期的结果时直接复用，
+查找时只需检查所在格子及其相邻的 8 个格子。适用于地图平移时中心点只移动几十米的连续查询。
+
+每条结果连同自身的坐标一起缓存。复用时按新的中心点重新计算距离并排序，只保留一定完整的部分：
+原查询覆盖到最远结果的距离 coverage，新中心点偏移 offset 后，距新中心点 coverage - offset 以内的结果都在原查询范围内。
+"""
+
+import copy
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_EARTH_RADIUS = 6371000.0
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int) -> str:
+    """
+    计算经纬度的 geohash
+
+    Args:
+        latitude: 纬度
+        longitude: 经度
+        precision: geohash 长度
+
+    Returns:
+        str: geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                value = value * 2 + 1
+                lon_range[0] = mid
+            else:
+                value = value * 2
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                value = value * 2 + 1
+                lat_range[0] = mid
+            else:
+                value = value * 2
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """geohash 格子的纬度和经度跨度（度）"""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def geohash_neighbors(latitude: float, longitude: float, precision: int) -> Set[str]:
+    """
+    点所在格子及其相邻 8 个格子的 geohash
+
+    Returns:
+        Set[str]: 最多 9 个 geohash，靠近两极或经度 ±180 时可能更少
+    """
+    lat_step, lon_step = geohash_cell_size(precision)
+    cells = set()
+    for dlat in (-lat_step, 0.0, lat_step):
+        lat = latitude + dlat
+        if not -90.0 <= lat <= 90.0:
+            continue
+        for dlon in (-lon_step, 0.0, lon_step):
+            lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lon, precision))
+    return cells
+
+
+def distance_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """两点之间的球面距离（米）"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * _EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def destination_point(latitude: float, longitude: float, bearing: float, distance: float) -> Tuple[float, float]:
+    """
+    从一点沿给定方位角移动 distance 米后的位置
+
+    Args:
+        latitude: 起点纬度
+        longitude: 起点经度
+        bearing: 方位角（度），正北为 0，顺时针
+        distance: 距离（米）
+
+    Returns:
+        Tuple[float, float]: (纬度, 经度)
+    """
+    phi1, lambda1 = math.radians(latitude), math.radians(longitude)
+    theta = math.radians(bearing)
+    delta = distance / _EARTH_RADIUS
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    lambda2 = lambda1 + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi1), math.cos(delta) - math.sin(phi1) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lambda2) + 540.0) % 360.0 - 180.0
+
+
+def initial_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """从第一点指向第二点的方位角（度），正北为 0，顺时针"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    y = math.sin(dlambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def precision_for_radius(radius: float) -> int:
+    """格子在纬度和经度方向都不小于 radius 米的最大 geohash 长度，保证半径内的点都在相邻格子里"""
+    for precision in range(12, 0, -1):
+        lat_step, lon_step = geohash_cell_size(precision)
+        # 经度方向在高纬度会变窄，按 60 度纬度估算
+        if min(lat_step, lon_step * 0.5) * math.pi / 180 * _EARTH_RADIUS >= radius:
+            return precision
+    return 1
+
+
+# 缓存的一条结果: (纬度, 经度, 结果)
+Located = Tuple[float, float, Any]
+
+
+class SpatialCache:
+    """按查询中心点的位置复用结果，LRU + TTL 淘汰"""
+
+    def __init__(self, reuse_radius: float = 100, ttl: float = 3600, max_entries: int = 1024):
+        """
+        初始化
+
+        Args:
+            reuse_radius: 复用半径（米），新的中心点与已缓存的中心点距离不超过该值时复用结果，0 表示不复用
+            ttl: 结果的缓存时间（秒）
+            max_entries: 最多缓存的查询数
+        """
+        self.reuse_radius = reuse_radius
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.precision = precision_for_radius(reuse_radius) if reuse_radius > 0 else 12
+        # (命名空间, 纬度, 经度) -> (过期时间, 覆盖半径, 结果列表)
+        self._entries: "OrderedDict[Tuple[Hashable, float, float], Tuple[float, float, List[Located]]]" = OrderedDict()
+        # (命名空间, geohash) -> 该格子中的条目
+        self._buckets: Dict[Tuple[Hashable, str], Set[Tuple[Hashable, float, float]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SpatialCache":
+        """根据配置字典创建，字段为 reuse_radius、ttl、max_entries"""
+        return cls(**config)
+
+    def get(self, namespace: Hashable, latitude: float, longitude: float) -> Optional[List[Tuple[float, float, float, Any]]]:
+        """
+        获取附近的查询结果，按与 (latitude, longitude) 的距离重新排序
+
+        Args:
+            namespace: 只有命名空间相同的查询才会互相复用，例如 (语言, 类别)
+            latitude: 纬度
+            longitude: 经度
+
+        Returns:
+            Optional[List[Tuple[float, float, float, Any]]]: 中心点最近的未过期查询中，距新中心点 coverage - offset 以内的结果，
+                每项为 (距新中心点的米数, 纬度, 经度, 结果的浅拷贝)，按距离排序；没有可复用的结果时返回 None
+        """
+        if self.reuse_radius <= 0 or self.max_entries <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            best: Optional[Tuple[float, Tuple[Hashable, float, float]]] = None
+            for cell in geohash_neighbors(latitude, longitude, self.precision):
+                for key in list(self._buckets.get((namespace, cell), ())):
+                    expires_at = self._entries[key][0]
+                    if expires_at <= now:
+                        self._remove(key)
+                        continue
+                    distance = distance_meters(latitude, longitude, key[1], key[2])
+                    if distance <= self.reuse_radius and (best is None or distance < best[0]):
+                        best = (distance, key)
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            offset, key = best
+            _, coverage, items = self._entries[key]
+            # 只保留一定在原查询范围内的结果，范围外可能还有原查询没有返回的结果
+            reach = coverage - offset
+            nearby = []
+            for item_latitude, item_longitude, item in items:
+                distance = distance_meters(latitude, longitude, item_latitude, item_longitude)
+                if distance <= reach:
+                    nearby.append((distance, item_latitude, item_longitude, item))
+            if not nearby:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._entries.move_to_end(key)
+        nearby.sort(key=lambda located: located[0])
+        return [(distance, lat, lon, copy.copy(item)) for distance, lat, lon, item in nearby]
+
+    def put(self, namespace: Hashable, latitude: float, longitude: float, items: List[Located]):
+        """
+        缓存以 (latitude, longitude) 为中心的查询结果
+
+        Args:
+            namespace: 命名空间
+            latitude: 查询中心纬度
+            longitude: 查询中心经度
+            items: 每条结果及其坐标，查询范围视为中心点到最远一条结果的距离
+        """
+        if self.reuse_radius <= 0 or self.max_entries <= 0 or not items:
+            return
+        key = (namespace, latitude, longitude)
+        coverage = max(distance_meters(latitude, longitude, item[0], item[1]) for item in items)
+        with self._lock:
+            if key not in self._entries:
+                cell = encode_geohash(latitude, longitude, self.precision)
+                self._buckets.setdefault((namespace, cell), set()).add(key)
+            self._entries[key] = (time.time() + self.ttl, coverage, [(lat, lon, copy.copy(item)) for lat, lon, item in items])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: Tuple[Hashable, float, float]):
+        self._entries.pop(key, None)
+        bucket_key = (key[0], encode_geohash(key[1], key[2], self.precision))
+        bucket = self._buckets.get(bucket_key)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[bucket_key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计
+
+        Returns:
+            Dict[str, Any]: 命中、未命中、淘汰次数，当前条目数和 geohash 长度
+        """
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "precision": self.precision}
+
@@ -0,0 +1,304 @@
+"""
+数据源清单
+
+在不导入数据源模块的前提下，通过静态解析源码得到模块中数据源类的基本信息，
+供 ApiClient 按需加载数据源使用。
+
+解析结果连同数据源的能力描述、渲染好的 markdown 描述一起持久化到 JSON 清单文件中，
+以模块文件的 mtime/大小/哈希作为失效依据，后续进程直接复用，无需再做运行时反射。
+可以在构建时执行 `python -m external_api.data_sources.manifest` 预先生成。
+"""
+
+import ast
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("data_sources_manifest")
+
+# 用于在shell中指定清单文件路径，设置为空字符串时不落盘
+MANIFEST_PATH_ENV_NAME = "DATA_SOURCES_MANIFEST_PATH"
+MANIFEST_FILE_NAME = "manifest_cache.json"
+MANIFEST_FORMAT_VERSION = 1
+
+# 渲染描述和提取能力的代码所在文件，这些文件变化时所有缓存的描述都需要重建
+_RENDERER_FILES = ("base.py", "client.py", "manifest.py")
+
+
+def scan_module(path: Path) -> Optional[List[Dict[str, Any]]]:
+    """
+    静态解析数据源模块，获取其中直接继承 BaseAPI 的数据源类信息
+
+    Args:
+        path: 模块文件路径
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: 数据源信息列表，每项包含 class_name、source_name、name、description；
+            无法静态确定时返回 None，调用方应退回导入模块
+    """
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    entries = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        if not any(_base_name(base) == "BaseAPI" for base in node.bases):
+            continue
+
+        methods = {item.name: item for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        source_name = _return_constant(methods.get("source_name"))
+        if not isinstance(source_name, str):
+            return None
+
+        api_info = _return_dict(methods.get("get_api_info"))
+        if api_info is None:
+            return None
+        display_name = api_info.get("name", source_name)
+        description = api_info.get("description", "No description available")
+        if not isinstance(display_name, str) or not isinstance(description, str):
+            return None
+
+        entries.append(
+            {
+                "class_name": node.name,
+                "source_name": source_name,
+                "name": display_name,
+                "description": description,
+            }
+        )
+    return entries
+
+
+def _base_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _find_return(func: Optional[ast.AST]) -> Optional[ast.expr]:
+    if func is None:
+        return None
+    returns = [node for node in ast.walk(func) if isinstance(node, ast.Return)]
+    if len(returns) != 1:
+        return None
+    return returns[0].value
+
+
+def _return_constant(func: Optional[ast.AST]) -> Any:
+    value = _find_return(func)
+    if isinstance(value, ast.Constant):
+        return value.value
+    return None
+
+
+def _return_dict(func: Optional[ast.AST]) -> Optional[Dict[str, Any]]:
+    """解析 get_api_info 返回的字典字面量，self.source_name 视为源名称"""
+    value = _find_return(func)
+    if not isinstance(value, ast.Dict):
+        return None
+
+    result: Dict[str, Any] = {}
+    for key, item in zip(value.keys, value.values):
+        if not isinstance(key, ast.Constant):
+            return None
+        if isinstance(item, ast.Constant):
+            result[key.value] = item.value
+        elif isinstance(item, ast.Attribute) and item.attr == "source_name":
+            continue
+        else:
+            return None
+    return result
+
+
+def _file_signature(path: Path, with_hash: bool = True) -> Dict[str, Any]:
+    stat = path.stat()
+    signature: Dict[str, Any] = {"mtime": stat.st_mtime, "size": stat.st_size}
+    if with_hash:
+        signature["hash"] = hashlib.sha1(path.read_bytes()).hexdigest()
+    return signature
+
+
+def _is_fresh(path: Path, signature: Optional[Dict[str, Any]]) -> bool:
+    """先比较 mtime 和大小，不一致时再比较内容哈希"""
+    if not signature:
+        return False
+    try:
+        current = _file_signature(path, with_hash=False)
+        if current["mtime"] == signature.get("mtime") and current["size"] == signature.get("size"):
+            return True
+        if _file_signature(path)["hash"] != signature.get("hash"):
+            return False
+    except OSError:
+        return False
+    # 内容未变，只是 mtime 变了，刷新签名
+    signature["mtime"] = current["mtime"]
+    return True
+
+
+class ManifestCache:
+    """
+    持久化的数据源清单
+
+    结构: {"version": ..., "renderer": {...}, "modules": {module_name: {"signature": {...}, "sources": {source_name: entry}}}}
+    entry 包含 class_name、source_name、name、description，以及按需补充的 capabilities 和 desc
+    """
+
+    def __init__(self, path: Optional[Path]):
+        """
+        初始化清单缓存
+
+        Args:
+            path: 清单文件路径，为 None 时只在内存中缓存
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._data = self._read()
+
+    def _read(self) -> Dict[str, Any]:
+        renderer = self._renderer_signature()
+        empty = {"version": MANIFEST_FORMAT_VERSION, "renderer": renderer, "modules": {}}
+        if self.path is None or not self.path.exists():
+            return empty
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取数据源清单失败: {e}")
+            return empty
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_FORMAT_VERSION:
+            return empty
+        if data.get("renderer", {}).get("hash") != renderer["hash"]:
+            # 渲染逻辑变化，只保留可静态解析的基本信息
+            for module in data.get("modules", {}).values():
+                for entry in module.get("sources", {}).values():
+                    entry.pop("capabilities", None)
+                    entry.pop("desc", None)
+            data["renderer"] = renderer
+            self._dirty = True
+        return data
+
+    @staticmethod
+    def _renderer_signature() -> Dict[str, Any]:
+        digest = hashlib.sha1()
+        for name in _RENDERER_FILES:
+            digest.update((Path(__file__).parent / name).read_bytes())
+        return {"hash": digest.hexdigest()}
+
+    def get_sources(self, module_name: str, path: Path) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取模块中的数据源基本信息，清单失效时重新静态解析
+
+        Args:
+            module_name: 模块名
+            path: 模块文件路径
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 数据源信息列表，无法静态解析时返回 None
+        """
+        with self._lock:
+            module = self._data["modules"].get(module_name)
+            if module is not None and _is_fresh(path, module.get("signature")):
+                return [copy.deepcopy(entry) for entry in module["sources"].values()]
+
+            entries = scan_module(path)
+            if entries is None:
+                return None
+            self._data["modules"][module_name] = {
+                "signature": _file_signature(path),
+                "sources": {entry["source_name"]: entry for entry in entries},
+            }
+            self._dirty = True
+            return copy.deepcopy(entries)
+
+    def get_field(self, module_name: str, path: Path, source_name: str, field: str) -> Any:
+        """
+        获取已缓存的字段（capabilities、desc），不存在或已失效时返回 None
+        """
+        with self._lock:
+            module = self._data["modules"].get(module_name)
+            if module is None or not _is_fresh(path, module.get("signature")):
+                return None
+            value = module["sources"].get(source_name, {}).get(field)
+            return copy.deepcopy(value)
+
+    def set_field(self, module_name: str, path: Path, source_name: str, field: str, value: Any, base_entry: Dict[str, Any]):
+        """
+        缓存字段并落盘
+
+        Args:
+            module_name: 模块名
+            path: 模块文件路径
+            source_name: 数据源名称
+            field: 字段名
+            value: 字段值，需要可以 JSON 序列化
+            base_entry: 模块未登记时用于创建条目的基本信息
+        """
+        with self._lock:
+            module = self._data["modules"].get(module_name)
+            if module is None or not _is_fresh(path, module.get("signature")):
+                module = self._data["modules"][module_name] = {"signature": _file_signature(path), "sources": {}}
+            entry = module["sources"].setdefault(source_name, copy.deepcopy(base_entry))
+            entry[field] = copy.deepcopy(value)
+            self._dirty = True
+        self.save()
+
+    def save(self):
+        """有改动时写回清单文件"""
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            try:
+                tmp_path.write_text(json.dumps(self._data, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"写入数据源清单失败: {e}")
+                tmp_path.unlink(missing_ok=True)
+
+
+_manifest_cache: Optional[ManifestCache] = None
+_manifest_cache_lock = threading.Lock()
+
+
+def get_manifest_cache() -> ManifestCache:
+    """
+    获取全局的数据源清单缓存
+
+    Returns:
+        ManifestCache: 清单缓存
+    """
+    global _manifest_cache
+    if _manifest_cache is None:
+        with _manifest_cache_lock:
+            if _manifest_cache is None:  # Double-check
+                path = os.getenv(MANIFEST_PATH_ENV_NAME)
+                if path is None:
+                    path = str(Path(__file__).parent / MANIFEST_FILE_NAME)
+                _manifest_cache = ManifestCache(Path(path) if path else None)
+    return _manifest_cache
+
+
+def module_path(module: Any) -> Optional[Path]:
+    """获取已导入模块的源文件路径"""
+    file = getattr(module, "__file__", None)
+    return Path(file) if file else None
+
+
+if __name__ == "__main__":
+    from external_api.data_sources.client import get_client
+
+    # 预先生成所有数据源的能力描述和 markdown 描述
+    client = get_client()
+    client.build_manifest()
+    print(f"Manifest written to {get_manifest_cache().path}")
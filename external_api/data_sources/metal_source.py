@@ -11,6 +11,7 @@ from typing import Any, Dict, Optional
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
 
 logger = logging.getLogger("metal_source")
 
@@ -46,6 +47,7 @@ class MetalSource(BaseAPI):
             "description": "Metal price data source, provides price information for metals such as Gold, Silver, Platinum, Palladium, Rhodium.",
         }
 
+    @cached(ttl=60)
     async def get_metal_price(
         self,
         currency_code: str,
@@ -96,11 +98,7 @@ class MetalSource(BaseAPI):
             request_url = f"{self.proxy_url}/web-crawling/api/gold-index"
 
             # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, params=params, json=payload, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            data = await self._request_json("POST", request_url, headers=self._headers, params=params, json=payload, timeout=self._timeout, content_type=None, idempotent=True)
 
             if isinstance(data, str):
                 data = json.loads(data)
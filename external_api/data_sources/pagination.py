@@ -0,0 +1,159 @@
+"""
+分页请求的公共工具
+
+单页请求不在这里重试：每个请求已经在 RetryExecutor 中按方法的策略重试过可重试的错误，
+再按页重试会让上游调用数成倍增加，也会重试 4xx、解析失败等不可重试的错误
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# (页码, 本页数量)
+Page = Tuple[int, int]
+
+
+def plan_pages(num_results: int, max_page_size: int) -> List[Page]:
+    """
+    计算获取 num_results 条结果需要请求的页，最后一页只取剩余的数量
+
+    Args:
+        num_results: 需要的结果数
+        max_page_size: 接口允许的每页最大数量
+
+    Returns:
+        List[Page]: 按页码排列的 (页码, 本页数量)
+    """
+    if num_results <= 0:
+        return []
+    page_size = min(num_results, max_page_size)
+    total_pages = math.ceil(num_results / page_size)
+    pages = []
+    for page in range(1, total_pages + 1):
+        if page == total_pages and num_results % page_size != 0:
+            pages.append((page, num_results % page_size))
+        else:
+            pages.append((page, page_size))
+    return pages
+
+
+class PageResults:
+    """按页码顺序合并的分页结果，以及失败的页"""
+
+    def __init__(self):
+        self.data: List[Any] = []
+        self.missing_pages: List[Dict[str, Any]] = []
+
+    @property
+    def all_failed(self) -> bool:
+        return not self.data and bool(self.missing_pages)
+
+
+async def gather_pages(
+    fetch_page: Callable[[Page], Awaitable[Dict[str, Any]]],
+    pages: List[Page],
+    concurrency: int,
+) -> PageResults:
+    """
+    并发请求所有页，同时进行的请求数不超过 concurrency
+
+    Args:
+        fetch_page: 获取单页的协程函数，返回 {"success": ..., "data"/"error": ...}，data 为列表
+        pages: 要请求的页
+        concurrency: 最大并发数
+
+    Returns:
+        PageResults: 按页码顺序合并的 data，以及失败的页 {"page": 页码, "error": 错误信息}
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_bounded(page: Page) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch_page(page)
+
+    results = await asyncio.gather(*[fetch_bounded(page) for page in pages])
+
+    page_results = PageResults()
+    for (page, _), result in zip(pages, results):
+        if result["success"]:
+            page_results.data.extend(result["data"])
+        else:
+            page_results.missing_pages.append({"page": page, "error": result["error"]})
+    return page_results
+
+
+async def iter_pages(
+    fetch_page: Callable[[Page], Awaitable[Dict[str, Any]]],
+    pages: List[Page],
+    prefetch: int = 2,
+) -> AsyncIterator[Tuple[Page, Dict[str, Any]]]:
+    """
+    按页码顺序逐页产出结果，当前页之后最多提前请求 prefetch 页
+
+    调用方停止迭代（break 或关闭生成器）时，已发出但未消费的页会被取消
+
+    Args:
+        fetch_page: 获取单页的协程函数，返回 {"success": ..., "data"/"error": ...}
+        pages: 要请求的页
+        prefetch: 提前请求的页数，0 表示消费完一页才请求下一页
+
+    Returns:
+        AsyncIterator[Tuple[Page, Dict[str, Any]]]: (页, 单页结果)
+    """
+    remaining = iter(pages)
+    inflight: Deque[Tuple[Page, asyncio.Future]] = deque()
+
+    def fill():
+        # 包括即将等待的当前页在内，最多 prefetch + 1 页在请求中
+        while len(inflight) <= max(0, prefetch):
+            page = next(remaining, None)
+            if page is None:
+                return
+            inflight.append((page, asyncio.ensure_future(fetch_page(page))))
+
+    try:
+        fill()
+        while inflight:
+            page, task = inflight.popleft()
+            result = await task
+            yield page, result
+            fill()
+    finally:
+        for _, task in inflight:
+            task.cancel()
+
+
+async def iter_cursor_pages(
+    fetch_page: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+    get_cursor: Callable[[Dict[str, Any]], Optional[str]],
+    cursor: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    沿游标逐页产出结果，拿到一页后立即请求下一页，调用方处理当前页时下一页已在请求中
+
+    游标为空、重复，或某页失败时结束；失败的页会作为最后一个结果产出
+
+    Args:
+        fetch_page: 按游标获取单页的协程函数，游标为 None 表示第一页
+        get_cursor: 从单页结果中取下一页游标
+        cursor: 起始游标
+
+    Returns:
+        AsyncIterator[Dict[str, Any]]: 单页结果
+    """
+    seen: Set[Optional[str]] = {cursor}
+    task: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page(cursor))
+    try:
+        while task is not None:
+            result = await task
+            task = None
+            if result["success"]:
+                next_cursor = get_cursor(result)
+                if next_cursor and next_cursor not in seen:
+                    seen.add(next_cursor)
+                    task = asyncio.ensure_future(fetch_page(next_cursor))
+            yield result
+    finally:
+        if task is not None:
+            task.cancel()
@@ -2,14 +2,13 @@
 专利数据源实现
 """
 
-import asyncio
 import logging
-import math
-from typing import Any, Dict, Optional
-
-import aiohttp
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
 
 from .base import BaseAPI
+from .cache import cached
+from .pagination import gather_pages, iter_pages, plan_pages
 
 logger = logging.getLogger("patents_source")
 
@@ -20,6 +19,7 @@ class PatentSource(BaseAPI):
     def __init__(self, config: Dict[str, Any]):
         """Initialize the patent data source"""
         self.timeout = config["timeout"]
+        self.max_concurrency = config.get("fan_out_concurrency", 8)
         self.proxy_url = config["external_api_proxy_url"]
         self.headers = {
             "X-Original-Host": config["serper_base_url"],
@@ -46,6 +46,7 @@ class PatentSource(BaseAPI):
         """
         return {"name": self.source_name, "description": "Patent search, works like google patents"}
 
+    @cached(ttl=86400)
     async def _fetch_patents_page(
         self,
         query: str,
@@ -80,10 +81,7 @@ class PatentSource(BaseAPI):
         request_url = f"{self.proxy_url}/patents"
 
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self.headers, json=payload, timeout=self.timeout) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+            data = await self._request_json("POST", request_url, headers=self.headers, json=payload, timeout=self.timeout, idempotent=True)
 
             organic = data.get("organic", [])
             results = []
@@ -143,6 +141,9 @@ class PatentSource(BaseAPI):
                                 "publicationNumber": "...",
                                 "pdfUrl": "..."
                             }
+                        ],
+                        "missing_pages": [          # Pages that failed, results may be incomplete or empty if every page failed
+                            {"page": 3, "error": "..."}
                         ]
                     }
                 }
@@ -174,54 +175,100 @@ class PatentSource(BaseAPI):
             if num_results > 500:
                 num_results = 500
 
-            # 计算分页
-            MAX_PAGE_SIZE = 50
-            page_size = min(num_results, MAX_PAGE_SIZE)
-            total_pages = math.ceil(num_results / page_size)
-
-            # 并发请求所有页面
-            tasks = []
-            for page in range(1, total_pages + 1):
-                # 最后一页可能需要调整数量
-                if page == total_pages and num_results % page_size != 0:
-                    current_page_size = num_results % page_size
-                else:
-                    current_page_size = page_size
-
-                tasks.append(
-                    self._fetch_patents_page(
-                        query=query,
-                        assignee=assignee,
-                        page_size=current_page_size,
-                        page=page,
-                        start_time=start_time,
-                        end_time=end_time,
-                    )
+            async def fetch_page(page):
+                return await self._fetch_patents_page(
+                    query=query, assignee=assignee, page_size=page[1], page=page[0], start_time=start_time, end_time=end_time
                 )
 
-            # 等待所有请求完成
-            results = await asyncio.gather(*tasks)
-
-            # 合并结果
-            all_patents = []
-            has_error = False
-            error_msgs = []
+            # 有限并发请求所有页面，每页只在 RetryExecutor 中按方法的策略重试可重试的错误
+            page_results = await gather_pages(fetch_page, plan_pages(num_results, 50), self.max_concurrency)
 
-            for result in results:
-                if result["success"]:
-                    all_patents.extend(result["data"])
-                else:
-                    has_error = True
-                    error_msgs.append(result["error"])
-
-            # 如果有部分失败，记录错误但仍返回成功获取的数据
-            if has_error:
-                logger.warning(f"Some patent pages failed: {', '.join(error_msgs)}")
+            # 有失败的页时记录错误，仍返回成功获取的数据；所有页都失败时同样返回成功和空结果，失败的页见 missing_pages
+            if page_results.missing_pages:
+                logger.warning(f"Some patent pages failed: {page_results.missing_pages}")
 
             # 限制返回数量
-            all_patents = all_patents[:num_results]
+            all_patents = page_results.data[:num_results]
 
-            return {"success": True, "data": {"patents": all_patents}}
+            return {"success": True, "data": {"patents": all_patents, "missing_pages": page_results.missing_pages}}
         except Exception as e:
             logger.error(f"search_patents error: {e}")
             return {"success": False, "error": str(e)}
+
+    async def iter_patents(
+        self,
+        query: str,
+        assignee: Optional[str] = None,
+        num_results: int = 10,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        prefetch: int = 2,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream patents page by page, in the same order as search_patents.
+        While a page is consumed, the next `prefetch` pages are already being requested; pages beyond that are only
+        requested as iteration reaches them. Close the iterator when stopping early (e.g. with contextlib.aclosing),
+        so that the pages still being requested are cancelled.
+        A page that fails is yielded as {"success": False, "error": "...", "page": 3} in place of its patents,
+        patents never contain a "success" key.
+
+        Args:
+            query(str): Search keywords. up to 5.
+            assignee(str): The assignee of the patents, e.g. "Apple Inc.".
+            num_results(int): Maximum number of results to yield, default is 10, max is 500
+            start_time(str): Start date YYYYMMDD, optional.
+            end_time(str): End date YYYYMMDD, optional.
+            prefetch(int): Number of pages requested ahead of the one being consumed, default is 2.
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Patents, each in the same format as the items of search_patents's "patents":
+                {
+                    "title": "...",
+                    "snippet": "...",
+                    "link": "...",
+                    "priorityDate": "...",
+                    "filingDate": "...",
+                    "grantDate": "...",
+                    "inventor": "...",
+                    "assignee": "...",
+                    "publicationNumber": "...",
+                    "pdfUrl": "..."
+                }
+        """
+
+        # Example:
+        #     >>> from contextlib import aclosing
+        #     >>> from external_api.data_sources.client import get_client
+        #     >>> client = get_client()
+        #     >>> async with aclosing(client.patent.iter_patents(query="machine learning", assignee="Apple Inc.", num_results=200)) as patents:
+        #     ...     async for patent in patents:
+        #     ...         if "success" in patent:
+        #     ...             print(f"Page {patent['page']} failed: {patent['error']}")
+        #     ...             continue
+        #     ...         print(patent["title"])
+        #     ...         if "transformer" in patent["title"].lower():
+        #     ...             break
+        # 关键词裁剪
+        keywords = query.split(" ")
+        if len(keywords) > 5:
+            query = " ".join(keywords[:5])
+        num_results = min(num_results, 500)
+
+        async def fetch_page(page):
+            return await self._fetch_patents_page(
+                query=query, assignee=assignee, page_size=page[1], page=page[0], start_time=start_time, end_time=end_time
+            )
+
+        count = 0
+        # 调用方关闭本迭代器时立即关闭 iter_pages，取消提前发出的请求
+        async with aclosing(iter_pages(fetch_page, plan_pages(num_results, 50), prefetch)) as pages:
+            async for (page, _), result in pages:
+                if not result["success"]:
+                    logger.warning(f"iter_patents page {page} failed: {result['error']}")
+                    yield {"success": False, "error": result["error"], "page": page}
+                    continue
+                for patent in result["data"]:
+                    yield patent
+                    count += 1
+                    if count >= num_results:
+                        return
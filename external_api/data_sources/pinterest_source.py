@@ -5,12 +5,16 @@ Pinterest data source implementation
 import asyncio
 import json
 import logging
+from contextlib import aclosing
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
 
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
+from .pagination import iter_cursor_pages
 
 logger = logging.getLogger("pinterest_source")
 
@@ -108,6 +112,88 @@ class PinterestSource(BaseAPI):
         #     ... else:
         #     ...     print(f"Search failed: {result['error']}")
         # """
+        result = await self._fetch_pins_page(keyword, num, nextPageCursor, sort)
+        if not result["success"]:
+            return result
+
+        pins = self._parse_pins(result["data"])
+        return {"success": True, "data": {"keyword": keyword, "count": len(pins), "pins": pins, "cursor": result["data"].get("nextPageCursor")}}
+
+    async def iter_pins(
+        self,
+        keyword: str,
+        max_pins: int = 1000,
+        sort: str = "relevance",
+        fields: Optional[List[str]] = None,
+        page_size: int = 50,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream pins matching a keyword, following pagination cursors automatically.
+        Use it with `async for pin in client.pinterest.iter_pins(...)`, the next page is requested while the current one is processed.
+        Pins repeated across pages, by id or by the same image in another size, are yielded only once.
+        Errors (an unsupported field, or a page that fails) are yielded as {"success": False, "error": "..."} and end the iteration,
+        pins never contain a "success" key.
+
+        Args:
+            keyword(str): Search keyword, e.g. "cats"
+            max_pins(int): Maximum number of pins to yield, default is 1000
+            sort(str): Sort order, default "relevance", options: "relevance" or "recent"
+            fields(Optional[List[str]]): Only build these fields of each pin, default is all fields,
+                options: id, title, description, alt_text, auto_alt_text, images, videos, created_at, likes, pinner
+            page_size(int): Number of pins requested per page, default is 50
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Pins in the same format as the items of search_pins's "pins", limited to fields
+        """
+        extractors = _PIN_FIELDS
+        if fields:
+            unknown = [name for name in fields if name not in _PIN_FIELDS]
+            if unknown:
+                yield {"success": False, "error": f"Unsupported pin fields: {unknown}, options: {'|'.join(_PIN_FIELDS)}"}
+                return
+            extractors = {name: _PIN_FIELDS[name] for name in fields}
+
+        async def fetch_page(cursor: Optional[str]) -> Dict[str, Any]:
+            return await self._fetch_pins_page(keyword, page_size, cursor, sort)
+
+        seen_ids: Set[str] = set()
+        seen_images: Set[str] = set()
+        count = 0
+        # 调用方关闭本迭代器时立即关闭 iter_cursor_pages，取消提前发出的请求
+        async with aclosing(iter_cursor_pages(fetch_page, lambda page: page["data"].get("nextPageCursor"))) as pages:
+            async for result in pages:
+                if not result["success"]:
+                    logger.warning(f"Stop iterating pins, page failed: {result['error']}")
+                    yield {"success": False, "error": result["error"]}
+                    return
+
+                new_pins = 0
+                for pin_data in result["data"].get("data", []):
+                    if not isinstance(pin_data, dict):
+                        continue
+                    # 没有 id 的 pin 只按图片去重
+                    pin_id = pin_data.get("id")
+                    image = _canonical_image_url(_pin_image_url(pin_data))
+                    if (pin_id and pin_id in seen_ids) or (image and image in seen_images):
+                        continue
+                    if pin_id:
+                        seen_ids.add(pin_id)
+                    if image:
+                        seen_images.add(image)
+                    new_pins += 1
+
+                    yield {name: extract(pin_data) for name, extract in extractors.items()}
+                    count += 1
+                    if count >= max_pins:
+                        return
+
+                # 整页都是重复的说明游标在打转
+                if new_pins == 0:
+                    return
+
+    @cached(ttl=3600)
+    async def _fetch_pins_page(self, keyword: str, num: int, nextPageCursor: Optional[str], sort: str) -> Dict[str, Any]:
+        """获取一页未解析的 pin 数据，data 为接口返回的原始响应（包含 data 和 nextPageCursor）"""
         try:
             # Build query parameters
             params = {"keyword": keyword, "num": num, "sort": sort}
@@ -118,11 +204,7 @@ class PinterestSource(BaseAPI):
             request_url = f"{self.proxy_url}/pinterest/pins/advance"
 
             # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self._headers, json=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            data = await self._request_json("POST", request_url, headers=self._headers, json=params, timeout=self._timeout, content_type=None, idempotent=True)
 
             # The API returns a JSON string, need to parse it first
             if isinstance(data, str):
@@ -134,9 +216,7 @@ class PinterestSource(BaseAPI):
             if "data" not in data:
                 raise ValueError(f"API response missing data field: {data}")
 
-            pins = self._parse_pins(data)
-
-            return {"success": True, "data": {"keyword": keyword, "count": len(pins), "pins": pins, "cursor": data.get("nextPageCursor")}}
+            return {"success": True, "data": data}
 
         except asyncio.TimeoutError:
             error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -152,6 +232,7 @@ class PinterestSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=3600)
     async def get_user_info(self, username: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get detailed information of a Pinterest user.
@@ -195,11 +276,7 @@ class PinterestSource(BaseAPI):
             params = {"keyword": username}
 
             # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self._headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json(content_type=None)
+            data = await self._request_json("GET", request_url, headers=self._headers, params=params, timeout=self._timeout, content_type=None)
 
             # Parse response data
             if isinstance(data, str):
@@ -238,60 +315,12 @@ class PinterestSource(BaseAPI):
             return date_str
 
     def _parse_pins(self, data: dict[str, Any]) -> list[dict[str, Any]]:
-        print(f"xwy-pins, {data}")
-        print("-" * 100)
-        print("\n")
         pins = []
         for pin_data in data.get("data", []):
             if not isinstance(pin_data, dict):
                 logger.warning(f"Skip invalid pin data: {pin_data}")
                 continue
-
-            video = {"has_video": False}
-            if pin_data.get("videos", None):
-                V_HLSV4 = None
-                if pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", None):
-                    V_HLSV4 = {
-                        "url": pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", {}).get("url", ""),
-                        "duration": pin_data.get("videos", {}).get("video_list", {}).get("V_HLSV4", {}).get("duration", 0),
-                    }
-
-                V_720P = None
-                if pin_data.get("videos", {}).get("video_list", {}).get("V_720P", None):
-                    V_720P = {
-                        "url": pin_data.get("videos", {}).get("video_list", {}).get("V_720P", {}).get("url", ""),
-                        "duration": pin_data.get("videos", {}).get("video_list", {}).get("V_720P", {}).get("duration", 0),
-                    }
-
-                video: Dict[str, Any] = {"has_video": True}
-                if V_HLSV4:
-                    video["V_HLSV4"] = V_HLSV4
-                if V_720P:
-                    video["V_720P"] = V_720P
-
-            image_url = pin_data.get("images", {}).get("original", {}).get("url", "")
-            if len(image_url) <= 0:
-                image_url = pin_data.get("images", {}).get("orig", {}).get("url", "")
-
-            pin = {
-                "id": pin_data.get("id", ""),
-                "title": pin_data.get("title", ""),
-                "description": pin_data.get("description", ""),
-                "alt_text": pin_data.get("alt_text", ""),
-                "auto_alt_text": pin_data.get("auto_alt_text", ""),
-                "images": {"url": image_url},
-                "videos": video,
-                "created_at": "2024-03-21 08:29:49",  # 创建时间
-                "likes": pin_data.get("reaction_counts", {}).get("1", 0),
-                "pinner": {
-                    "id": pin_data.get("pinner", {}).get("id", ""),
-                    "image_url": pin_data.get("pinner", {}).get("image_large_url", ""),
-                    "follower_count": pin_data.get("pinner", {}).get("follower_count", 0),
-                    "username": pin_data.get("pinner", {}).get("username", ""),
-                    "full_name": pin_data.get("pinner", {}).get("full_name", ""),
-                },
-            }
-            pins.append(pin)
+            pins.append({name: extract(pin_data) for name, extract in _PIN_FIELDS.items()})
         return pins
 
     def _parse_user_info(self, resp: dict[str, Any]) -> dict[str, Any]:
@@ -322,6 +351,63 @@ class PinterestSource(BaseAPI):
         }
 
 
+def _pin_video(pin_data: Dict[str, Any]) -> Dict[str, Any]:
+    if not pin_data.get("videos"):
+        return {"has_video": False}
+
+    video_list = pin_data["videos"].get("video_list", {})
+
+    video: Dict[str, Any] = {"has_video": True}
+    for name in ("V_HLSV4", "V_720P"):
+        if video_list.get(name):
+            video[name] = {"url": video_list[name].get("url", ""), "duration": video_list[name].get("duration", 0)}
+    return video
+
+
+def _pin_image_url(pin_data: Dict[str, Any]) -> str:
+    images = pin_data.get("images", {})
+    return images.get("original", {}).get("url", "") or images.get("orig", {}).get("url", "")
+
+
+def _canonical_image_url(url: str) -> str:
+    """去掉 pinimg 图片地址中的尺寸目录（originals、736x 等）和查询参数，同一图片的不同尺寸得到相同的地址"""
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    path = parts.path
+    if parts.netloc.endswith("pinimg.com"):
+        segments = path.lstrip("/").split("/", 1)
+        if len(segments) == 2:
+            path = segments[1]
+    return f"{parts.netloc}/{path.lstrip('/')}"
+
+
+def _pin_pinner(pin_data: Dict[str, Any]) -> Dict[str, Any]:
+    pinner = pin_data.get("pinner", {})
+    return {
+        "id": pinner.get("id", ""),
+        "image_url": pinner.get("image_large_url", ""),
+        "follower_count": pinner.get("follower_count", 0),
+        "username": pinner.get("username", ""),
+        "full_name": pinner.get("full_name", ""),
+    }
+
+
+# pin 各字段的提取函数，按需只构建部分字段
+_PIN_FIELDS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "id": lambda pin_data: pin_data.get("id", ""),
+    "title": lambda pin_data: pin_data.get("title", ""),
+    "description": lambda pin_data: pin_data.get("description", ""),
+    "alt_text": lambda pin_data: pin_data.get("alt_text", ""),
+    "auto_alt_text": lambda pin_data: pin_data.get("auto_alt_text", ""),
+    "images": lambda pin_data: {"url": _pin_image_url(pin_data)},
+    "videos": _pin_video,
+    "created_at": lambda pin_data: "2024-03-21 08:29:49",  # 创建时间
+    "likes": lambda pin_data: pin_data.get("reaction_counts", {}).get("1", 0),
+    "pinner": _pin_pinner,
+}
+
+
 if __name__ == "__main__":
     from external_api.data_sources.client import get_client
 
@@ -0,0 +1,276 @@
+"""
+商品和金属价格的订阅
+
+同一组 (类型, 品种, 货币, 间隔) 的所有订阅者共享一个轮询任务，轮询结果分发给每个订阅者，
+价格没有变化时不推送；最后一个订阅者取消订阅后停止轮询。上游请求数因此与订阅者数量无关。
+
+轮询经由 commodities.get_commodities_price / metal.get_metal_price，轮询时只接受存在时间不超过轮询间隔的缓存结果
+（cache_max_age），每一轮拿到的都是本轮间隔内的价格，同一间隔内其他调用者的请求仍可复用。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .cache import cache_max_age
+
+logger = logging.getLogger("data_sources_price_poller")
+
+PRICE_KINDS = ("commodities", "metal")
+
+# (类型, 品种, 货币, 间隔)
+PollKey = Tuple[str, Tuple[str, ...], str, float]
+
+
+class PriceSubscription:
+    """
+    一个订阅者，通过 async for 依次获取价格更新，用完后调用 close() 或使用 async with
+
+    每条更新为 {"success": True, "data": {"kind", "currency", "prices", "fetched_at"}}，
+    轮询失败时为 {"success": False, "error": ...}。订阅者处理不及时时丢弃最旧的更新；
+    poller 为 None 的订阅没有对应的轮询，只产出创建时放入的更新（例如参数错误）
+    """
+
+    def __init__(self, poller: Optional["PricePoller"], queue_size: int):
+        self._poller = poller
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._closed = False
+        self.dropped = 0
+
+    @property
+    def key(self) -> Optional[PollKey]:
+        return self._poller.key if self._poller is not None else None
+
+    @classmethod
+    def failed(cls, error: str) -> "PriceSubscription":
+        """只产出一条错误更新随即结束的订阅"""
+        subscription = cls(None, 2)
+        subscription._push({"success": False, "error": error})
+        subscription.close()
+        return subscription
+
+    def _push(self, update: Optional[Dict[str, Any]]):
+        """放入一条更新，None 表示订阅结束"""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(update)
+
+    def __aiter__(self) -> "PriceSubscription":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        update = await self._queue.get()
+        if update is None:
+            self._closed = True
+            raise StopAsyncIteration
+        return update
+
+    def close(self):
+        """取消订阅，没有其他订阅者时轮询随之停止"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._poller is not None:
+            self._poller.remove(self)
+        self._push(None)
+
+    async def __aenter__(self) -> "PriceSubscription":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PricePoller:
+    """按固定间隔轮询一组价格，把有变化的结果推送给所有订阅者"""
+
+    def __init__(self, manager: "PriceSubscriptionManager", key: PollKey):
+        self.manager = manager
+        self.key = key
+        self.subscribers: Set[PriceSubscription] = set()
+        self.last: Optional[Dict[str, Any]] = None
+        # 最近一次成功的更新，新订阅者加入时补发
+        self.last_success: Optional[Dict[str, Any]] = None
+        self.polls = 0
+        self.published = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, subscription: PriceSubscription):
+        self.subscribers.add(subscription)
+        # 新订阅者立即收到最近一次成功的价格，不必等下一轮；最近一轮失败时不补发错误
+        if self.last_success is not None:
+            subscription._push(self.last_success)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def remove(self, subscription: PriceSubscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers:
+            self.stop()
+
+    def stop(self):
+        """停止轮询并从管理器中移除"""
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self.manager._pollers.pop(self.key, None)
+
+    async def _run(self):
+        interval = self.key[3]
+        try:
+            while self.subscribers:
+                started = time.monotonic()
+                update = await self._poll()
+                self.polls += 1
+                # 只比较价格，fetched_at 每轮都不同
+                if self.last is None or _without_time(update) != _without_time(self.last):
+                    self.last = update
+                    if update["success"]:
+                        self.last_success = update
+                    self.published += 1
+                    for subscription in list(self.subscribers):
+                        subscription._push(update)
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except asyncio.CancelledError:
+            pass
+
+    async def _poll(self) -> Dict[str, Any]:
+        kind, symbols, currency, interval = self.key
+        # 只接受本轮间隔内的缓存结果
+        token = cache_max_age.set(interval)
+        try:
+            result = await self.manager._fetch(kind, symbols, currency)
+            if not result["success"]:
+                return {"success": False, "error": result["error"]}
+            quotes = result["data"].get("rates" if kind == "commodities" else "data", {})
+            prices = {symbol: quotes[symbol] for symbol in symbols if symbol in quotes} if symbols else quotes
+            return {
+                "success": True,
+                "data": {"kind": kind, "currency": currency, "prices": prices, "fetched_at": time.time()},
+            }
+        except Exception as e:
+            error_msg = f"Error occurred while polling {kind} prices: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error": error_msg}
+        finally:
+            cache_max_age.reset(token)
+
+
+class PriceSubscriptionManager:
+    """
+    价格订阅管理器
+
+    只能在同一个事件循环中使用
+    """
+
+    def __init__(self, interval: float = 60, queue_size: int = 16):
+        """
+        初始化
+
+        Args:
+            interval: 默认轮询间隔（秒）
+            queue_size: 每个订阅者最多积压的更新数，超过时丢弃最旧的
+        """
+        self.interval = interval
+        self.queue_size = queue_size
+        self._pollers: Dict[PollKey, PricePoller] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "PriceSubscriptionManager":
+        """根据配置字典创建，字段为 interval、queue_size"""
+        return cls(**config)
+
+    def subscribe(self, kind: str, symbols: Optional[List[str]] = None, currency: str = "USD", interval: Optional[float] = None) -> PriceSubscription:
+        """
+        Subscribe to live prices. Subscribers of the same kind, symbols, currency and interval share one poller,
+        and an update is only delivered when the prices change.
+
+        Args:
+            kind(str): Price kind, options: commodities|metal
+            symbols(Optional[List[str]]): Commodity codes such as ["COCOA", "OIL"] (required for commodities),
+                or metals such as ["gold", "silver"] (all metals when empty)
+            currency(str): Currency code, default: USD
+            interval(Optional[float]): Polling interval in seconds, default is the configured interval
+
+        Returns:
+            PriceSubscription: Async iterator of updates. Invalid arguments yield a single
+            {"success": False, "error": "..."} update and end the subscription. A successful update looks like
+            {
+                "success": True,
+                "data": {
+                    "kind": "metal",                 # Price kind
+                    "currency": "USD",               # Currency code
+                    "prices": {"gold": {...}},       # Quotes in the shape of get_commodities_price rates / get_metal_price data
+                    "fetched_at": 1718000000.0       # Time the update was fetched
+                }
+            }
+        """
+
+        # Example:
+        #     >>> from external_api.data_sources.client import get_client
+        #     >>> client = get_client()
+        #     >>> async with client.price_subscriptions.subscribe("metal", ["gold"], "EUR", interval=60) as subscription:
+        #     ...     async for update in subscription:
+        #     ...         if update["success"]:
+        #     ...             print(update["data"]["prices"]["gold"]["mid"])
+        if kind not in PRICE_KINDS:
+            return PriceSubscription.failed(f"Unsupported kind: {kind}, options: {'|'.join(PRICE_KINDS)}")
+        if interval is not None and interval <= 0:
+            return PriceSubscription.failed(f"Invalid interval: {interval}, must be positive")
+        if kind == "commodities":
+            symbols = [symbol.strip().upper() for symbol in symbols or []]
+            if not symbols:
+                return PriceSubscription.failed("At least one commodity code is required")
+        else:
+            symbols = [symbol.strip().lower() for symbol in symbols or []]
+        key = (kind, tuple(sorted(set(symbols))), currency.upper(), float(interval or self.interval))
+
+        poller = self._pollers.get(key)
+        if poller is None:
+            poller = self._pollers[key] = PricePoller(self, key)
+        subscription = PriceSubscription(poller, self.queue_size)
+        poller.add(subscription)
+        return subscription
+
+    async def _fetch(self, kind: str, symbols: Tuple[str, ...], currency: str) -> Dict[str, Any]:
+        from .client import get_client
+
+        client = get_client()
+        if kind == "commodities":
+            return await client.commodities.get_commodities_price(",".join(symbols), currency)
+        return await client.metal.get_metal_price(currency)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计
+
+        Returns:
+            Dict[str, Any]: 每个轮询任务的订阅者数、轮询次数和推送次数
+        """
+        return {
+            f"{kind}:{','.join(symbols)}:{currency}@{interval:g}s": {
+                "subscribers": len(poller.subscribers),
+                "polls": poller.polls,
+                "published": poller.published,
+            }
+            for (kind, symbols, currency, interval), poller in self._pollers.items()
+        }
+
+    async def close(self):
+        """结束所有订阅并停止轮询"""
+        pollers = list(self._pollers.values())
+        for poller in pollers:
+            for subscription in list(poller.subscribers):
+                subscription.close()
+            poller.stop()
+        await asyncio.sleep(0)
+
+
+def _without_time(update: Dict[str, Any]) -> Dict[str, Any]:
+    if not update["success"]:
+        return update
+    return {**update["data"], "fetched_at": None}
@@ -0,0 +1,299 @@
+"""
+Basket pricing data source implementation, combining commodity and metal quotes
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from .base import BaseAPI
+
+logger = logging.getLogger("pricing_source")
+
+BASKET_OUTPUT_FORMATS = ("records", "numpy", "pandas")
+# 表格的价格列，金属没有 open/prev，商品没有 bid
+PRICE_COLUMNS = ("current", "open", "high", "low", "prev", "bid")
+# 由两种货币下的金属报价推算汇率时优先使用的金属
+_FX_REFERENCE_METALS = ("gold", "silver", "platinum", "palladium")
+# base_currency 本身和直接获取报价的货币的汇率
+_UNIT_RATE = {"rate": 1.0, "reference": None, "timestamp": None}
+
+
+class PricingSource(BaseAPI):
+    """Basket pricing data source built on the commodities and metal data sources"""
+
+    def __init__(self, config: Dict[str, Any], proxy_url: Optional[str] = None):
+        """Initialize basket pricing data source
+
+        Args:
+            config: Configuration dictionary containing API settings
+            proxy_url: Unused, the underlying data sources use their own settings
+        """
+        self._timeout = config["timeout"]
+
+    @property
+    def source_name(self) -> str:
+        return "pricing"
+
+    def get_api_info(self) -> Dict[str, Any]:
+        """Get data source information"""
+        return {
+            "name": self.source_name,
+            "description": "Basket pricing data source, prices baskets of commodities and metals in several currencies at once as one table.",
+        }
+
+    async def get_basket_prices(
+        self,
+        commodity_codes: Optional[List[str]] = None,
+        metals: Optional[List[str]] = None,
+        currencies: Optional[List[str]] = None,
+        base_currency: str = "USD",
+        output_format: str = "records",
+    ) -> Dict[str, Any]:
+        """
+        Get prices of a basket of commodities and metals in several currencies as one table.
+        Prices are fetched once in base_currency and converted to the other currencies with exchange rates derived from
+        the metal quotes, which are as fresh as metal.get_metal_price (cached for 60 seconds by default);
+        a currency whose exchange rate is unavailable is fetched directly.
+
+        Args:
+            commodity_codes(Optional[List[str]]): Commodity codes, e.g. ["COCOA", "CORN", "OIL"], obtained from commodities.get_supported_commodities()
+            metals(Optional[List[str]]): Metals, e.g. ["gold", "silver"], options: gold, silver, platinum, palladium, rhodium
+            currencies(Optional[List[str]]): Currency codes of the table, e.g. ["USD", "EUR", "CNY"], default is [base_currency]
+            base_currency(str): Currency the prices are fetched in, default: USD
+            output_format(str): Shape of "table", options: records|numpy|pandas, default: records.
+                records is a list of rows, numpy is a dict of column arrays, pandas is a DataFrame
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the price table, e.g.
+            {
+                "success": True,               # Whether successful
+                "data": {
+                    "base_currency": "USD",    # Currency the prices were fetched in
+                    "fx_rates": {              # Rate from base_currency to each currency
+                        "USD": {"rate": 1.0, "reference": null, "timestamp": null},
+                        "EUR": {
+                            "rate": 0.92,                         # 1.0 for base_currency and directly fetched currencies
+                            "reference": "gold",                  # Metal whose quotes the rate was derived from, null if not derived
+                            "timestamp": "2025-04-25 17:00:00"    # Time of the metal quote the rate was derived from
+                        }
+                    },
+                    "table": [                 # One row per (symbol, currency)
+                        {
+                            "symbol": "COCOA",   # Commodity code or metal name
+                            "kind": "commodity", # commodity or metal
+                            "currency": "EUR",   # Currency of the prices
+                            "current": 8822.8,   # Current price (mid price for metals)
+                            "open": 8528.4,      # Opening price, null for metals
+                            "high": 8862.36,     # Highest price
+                            "low": 8464.92,      # Lowest price
+                            "prev": 8544.96,     # Previous day's closing price, null for metals
+                            "bid": null          # Bid price, null for commodities
+                        }
+                    ],
+                    "errors": []               # Parts that failed, e.g. ["metal prices in USD: ..."]
+                }
+            }
+        """
+
+        # Example:
+        #     >>> from external_api.data_sources.client import get_client
+        #     >>> client = get_client()
+        #     >>> result = await client.pricing.get_basket_prices(
+        #     ...     commodity_codes=["COCOA", "OIL"],
+        #     ...     metals=["gold"],
+        #     ...     currencies=["USD", "EUR", "CNY"],
+        #     ... )
+        #     >>> if result["success"]:
+        #     ...     for row in result["data"]["table"]:
+        #     ...         print(row["symbol"], row["currency"], row["current"])
+        if output_format not in BASKET_OUTPUT_FORMATS:
+            return {"success": False, "error": f"Unsupported output_format: {output_format}, options: {'|'.join(BASKET_OUTPUT_FORMATS)}"}
+        commodity_codes = list(dict.fromkeys(code.strip().upper() for code in commodity_codes or []))
+        metals = list(dict.fromkeys(metal.strip().lower() for metal in metals or []))
+        if not commodity_codes and not metals:
+            return {"success": False, "error": "At least one commodity code or metal is required"}
+        base_currency = base_currency.upper()
+        currencies = list(dict.fromkeys(currency.upper() for currency in currencies or [base_currency]))
+
+        try:
+            others = [currency for currency in currencies if currency != base_currency]
+            snapshot, fx_results = await asyncio.gather(
+                self._get_snapshot(commodity_codes, metals, base_currency),
+                asyncio.gather(*[self._get_fx_rate(base_currency, currency) for currency in others]),
+            )
+
+            fx_rates = {base_currency: _UNIT_RATE}
+            direct = []
+            for currency, fx_result in zip(others, fx_results):
+                if fx_result["success"]:
+                    fx_rates[currency] = fx_result["data"]
+                else:
+                    logger.warning(f"No exchange rate {base_currency}->{currency}, fetching prices directly: {fx_result['error']}")
+                    direct.append(currency)
+
+            # 没有汇率的货币直接按该货币获取报价
+            direct_snapshots = await asyncio.gather(*[self._get_snapshot(commodity_codes, metals, currency) for currency in direct])
+            for currency in direct:
+                fx_rates[currency] = _UNIT_RATE
+
+            rows: List[Dict[str, Any]] = []
+            errors: List[str] = list(snapshot["errors"])
+            for currency in currencies:
+                if currency in direct:
+                    currency_snapshot = direct_snapshots[direct.index(currency)]
+                    errors.extend(currency_snapshot["errors"])
+                    rate = 1.0
+                else:
+                    currency_snapshot = snapshot
+                    rate = fx_rates[currency]["rate"]
+                for row in currency_snapshot["rows"]:
+                    rows.append(
+                        {
+                            **row,
+                            "currency": currency,
+                            **{column: row[column] * rate if row[column] is not None else None for column in PRICE_COLUMNS},
+                        }
+                    )
+
+            if not rows:
+                return {"success": False, "error": "; ".join(errors) or "No prices returned"}
+
+            table: Any = rows
+            if output_format != "records":
+                table = _basket_columns(rows, output_format)
+            return {
+                "success": True,
+                "data": {
+                    "base_currency": base_currency,
+                    "fx_rates": {currency: dict(fx_rates[currency]) for currency in currencies},
+                    "table": table,
+                    "errors": errors,
+                },
+            }
+
+        except Exception as e:
+            error_msg = f"Error occurred while getting basket prices: {str(e)}"
+            logger.error(error_msg)
+            logger.exception(e)
+            return {"success": False, "error": error_msg}
+
+    async def _get_snapshot(self, commodity_codes: List[str], metals: List[str], currency: str) -> Dict[str, Any]:
+        """一次获取所有商品和金属在 currency 下的报价，返回 {"rows": 表格行（不含 currency）, "errors": 失败信息}"""
+        from .client import get_client
+
+        client = get_client()
+
+        async def no_result() -> Dict[str, Any]:
+            return {"success": True, "data": {}}
+
+        commodity_result, metal_result = await asyncio.gather(
+            client.commodities.get_commodities_price(",".join(commodity_codes), currency) if commodity_codes else no_result(),
+            client.metal.get_metal_price(currency) if metals else no_result(),
+        )
+
+        rows = []
+        errors = []
+        if commodity_result["success"]:
+            rates = commodity_result["data"].get("rates", {})
+            for code in commodity_codes:
+                quote = rates.get(code)
+                if not isinstance(quote, dict):
+                    errors.append(f"commodity {code} in {currency}: no price returned")
+                    continue
+                rows.append(
+                    {
+                        "symbol": code,
+                        "kind": "commodity",
+                        "current": _to_float(quote.get("current")),
+                        "open": _to_float(quote.get("open")),
+                        "high": _to_float(quote.get("high")),
+                        "low": _to_float(quote.get("low")),
+                        "prev": _to_float(quote.get("prev")),
+                        "bid": None,
+                    }
+                )
+        else:
+            errors.append(f"commodity prices in {currency}: {commodity_result['error']}")
+
+        if metal_result["success"]:
+            quotes = metal_result["data"].get("data", {})
+            for metal in metals:
+                quote = quotes.get(metal)
+                if not isinstance(quote, dict) or "mid" not in quote:
+                    errors.append(f"metal {metal} in {currency}: no price returned")
+                    continue
+                rows.append(
+                    {
+                        "symbol": metal,
+                        "kind": "metal",
+                        "current": _to_float(quote.get("mid")),
+                        "open": None,
+                        "high": _to_float(quote.get("high")),
+                        "low": _to_float(quote.get("low")),
+                        "prev": None,
+                        "bid": _to_float(quote.get("bid")),
+                    }
+                )
+        else:
+            errors.append(f"metal prices in {currency}: {metal_result['error']}")
+
+        return {"rows": rows, "errors": errors}
+
+    async def _get_fx_rate(self, base_currency: str, quote_currency: str) -> Dict[str, Any]:
+        """
+        base_currency 到 quote_currency 的汇率
+
+        上游没有汇率接口，用同一时刻金属在两种货币下的中间价之比推算。汇率本身不缓存，
+        与 metal.get_metal_price 的报价同样新（默认缓存 60 秒），不会比表格中的金属价格更旧
+        """
+        from .client import get_client
+
+        client = get_client()
+        base_result, quote_result = await asyncio.gather(
+            client.metal.get_metal_price(base_currency), client.metal.get_metal_price(quote_currency)
+        )
+        for result in (base_result, quote_result):
+            if not result["success"]:
+                return result
+
+        base_quotes = base_result["data"].get("data", {})
+        quote_quotes = quote_result["data"].get("data", {})
+        for metal in (*_FX_REFERENCE_METALS, *base_quotes):
+            base_mid = _to_float(base_quotes.get(metal, {}).get("mid"))
+            quote_mid = _to_float(quote_quotes.get(metal, {}).get("mid"))
+            if base_mid and quote_mid:
+                timestamp = quote_quotes[metal].get("originalTime") or base_quotes[metal].get("originalTime")
+                return {"success": True, "data": {"rate": quote_mid / base_mid, "reference": metal, "timestamp": timestamp}}
+        return {"success": False, "error": f"No common metal quote to derive {base_currency}->{quote_currency}"}
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _basket_columns(rows: List[Dict[str, Any]], output_format: str) -> Any:
+    """
+    把表格行转换为列式数据
+
+    Args:
+        rows: 表格行
+        output_format: numpy 或 pandas
+
+    Returns:
+        Any: numpy 时为 {列名: ndarray}，缺失的价格为 NaN；pandas 时为 DataFrame
+    """
+    import numpy as np
+
+    columns: Dict[str, Any] = {name: np.asarray([row[name] for row in rows], dtype=object) for name in ("symbol", "kind", "currency")}
+    for name in PRICE_COLUMNS:
+        columns[name] = np.asarray([np.nan if row[name] is None else row[name] for row in rows], dtype=np.float64)
+
+    if output_format == "pandas":
+        import pandas as pd
+
+        return pd.DataFrame(columns)
+    return columns
@@ -0,0 +1,216 @@
+"""
+按上游 host 限流
+
+所有数据源都经由同一个外部 API 代理，但通过 X-Original-Host 访问不同的上游，各自有独立的配额。
+每个 host 一个令牌桶，收到 429 时按 Retry-After（没有时指数退避）暂停该 host 的请求并降低速率，
+之后请求成功时逐步恢复到配置的速率。没有配置速率的 host 不主动限流，只在收到 429 后暂停。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("data_sources_rate_limit")
+
+# 没有 Retry-After 时的初始退避时间和上限（秒）
+_INITIAL_BACKOFF = 1.0
+_MAX_BACKOFF = 60.0
+# 限流后速率降为原来的比例，以及每次成功后恢复的比例（相对配置速率）
+_DECREASE_FACTOR = 0.5
+_RECOVER_STEP = 0.1
+# 速率下限相对配置速率的比例
+_MIN_RATE_RATIO = 0.1
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    请求按到达顺序预占令牌，令牌不足时等待补充；被限流时在 blocked_until 之前不放行任何请求
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数，即稳定状态下每秒允许的请求数，为 None 时不限速，只在被限流后暂停
+            burst: 桶容量，即允许的突发请求数
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._backoff = _INITIAL_BACKOFF
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预占一个令牌
+
+        Returns:
+            float: 需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                return max(0.0, self._blocked_until - now)
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> float:
+        """
+        收到 429 时调用，暂停放行并降低速率
+
+        Args:
+            retry_after: 上游要求等待的秒数，为 None 时使用指数退避
+
+        Returns:
+            float: 暂停的秒数
+        """
+        with self._lock:
+            delay = retry_after if retry_after is not None else self._backoff
+            self._backoff = min(_MAX_BACKOFF, self._backoff * 2)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            if self.rate is not None:
+                self.rate = max(self.base_rate * _MIN_RATE_RATIO, self.rate * _DECREASE_FACTOR)
+                # 清空积攒的令牌，恢复后不会立即突发
+                self._tokens = min(self._tokens, 0.0)
+            return delay
+
+    def on_success(self):
+        """请求成功时调用，逐步恢复速率"""
+        if self.rate == self.base_rate and self._backoff == _INITIAL_BACKOFF:
+            return
+        with self._lock:
+            self._backoff = _INITIAL_BACKOFF
+            if self.rate is not None:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * _RECOVER_STEP)
+
+
+class RateLimiter:
+    """按 host 管理令牌桶"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None, default_limit: Optional[Dict[str, Any]] = None):
+        """
+        初始化限流器
+
+        Args:
+            limits: host -> {"rate": 每秒请求数, "burst": 突发请求数}
+            default_limit: 未单独配置的 host 使用的限制，为 None 时这些 host 不主动限流，只在收到 429 后暂停
+        """
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RateLimiter":
+        """根据数据源配置创建限流器"""
+        return cls(limits=config.get("rate_limits"), default_limit=config.get("default_rate_limit"))
+
+    def get_bucket(self, host: str) -> TokenBucket:
+        """获取 host 对应的令牌桶，没有配置速率的 host 得到不限速的令牌桶"""
+        if host in self._buckets:
+            return self._buckets[host]
+        with self._lock:
+            if host not in self._buckets:  # Double-check
+                limit = self.limits.get(host, self.default_limit) or {}
+                self._buckets[host] = TokenBucket(limit.get("rate") or None, limit.get("burst", 1))
+                self._stats[host] = {"requests": 0, "throttled": 0, "waited": 0.0}
+            return self._buckets[host]
+
+    async def acquire(self, host: str):
+        """
+        等待 host 的令牌
+
+        Args:
+            host: 上游 host（X-Original-Host）
+        """
+        bucket = self.get_bucket(host)
+        wait = bucket.reserve()
+        stats = self._stats[host]
+        stats["requests"] += 1
+        if wait > 0:
+            stats["waited"] += wait
+            await asyncio.sleep(wait)
+
+    def record(self, host: str, status: int, retry_after: Optional[str] = None):
+        """
+        记录响应状态，429 时退避
+
+        Args:
+            host: 上游 host
+            status: HTTP 状态码
+            retry_after: 响应头 Retry-After 的原始值
+        """
+        bucket = self.get_bucket(host)
+        if status == 429:
+            delay = bucket.on_throttled(parse_retry_after(retry_after))
+            self._stats[host]["throttled"] += 1
+            if bucket.rate is None:
+                logger.warning(f"{host} 触发限流，暂停 {delay:.1f}s")
+            else:
+                logger.warning(f"{host} 触发限流，暂停 {delay:.1f}s，速率降为 {bucket.rate:.2f}/s")
+        elif status < 400:
+            bucket.on_success()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各 host 的限流统计
+
+        Returns:
+            Dict[str, Dict[str, float]]: host -> 请求数、被限流次数、累计等待秒数、当前速率（不限速时为 0）
+        """
+        with self._lock:
+            result = {}
+            for host, stats in self._stats.items():
+                result[host] = {**stats, "rate": self._buckets[host].rate or 0.0}
+            return result
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头，支持秒数和 HTTP 日期两种格式
+
+    Returns:
+        Optional[float]: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter() -> RateLimiter:
+    """
+    获取默认的限流器，供未绑定到 ApiClient 的数据源使用，不主动限流，只在收到 429 后暂停
+
+    Returns:
+        RateLimiter: 默认限流器
+    """
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_limiter_lock:
+            if _default_limiter is None:  # Double-check
+                _default_limiter = RateLimiter()
+    return _default_limiter
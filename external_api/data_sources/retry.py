@@ -0,0 +1,235 @@
+"""
+数据源请求的重试与对冲
+
+- 可重试的错误（超时、连接错误、429 和 5xx）按带抖动的指数退避重试，每个方法可以配置自己的重试次数
+- 非幂等的请求只发送一次
+- 开启对冲时，请求在该方法近期 p95 延迟内还没有返回，就再发出一个相同的请求，取先成功的结果
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger("data_sources_retry")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# 每个方法保留的延迟样本数
+_LATENCY_WINDOW = 200
+
+
+class RetryPolicy:
+    """单个方法的重试与对冲策略"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.2,
+    ):
+        """
+        初始化策略
+
+        Args:
+            max_attempts: 最多尝试次数（含第一次），1 表示不重试
+            base_delay: 第一次重试前的退避上限（秒），之后每次翻倍
+            max_delay: 退避时间上限（秒）
+            hedge: 是否发送对冲请求
+            hedge_quantile: 超过该分位的延迟时发送对冲请求
+            hedge_min_samples: 延迟样本少于该数量时不对冲
+            hedge_min_delay: 发送对冲请求前的最短等待时间（秒）
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], base: Optional["RetryPolicy"] = None) -> "RetryPolicy":
+        """由配置字典创建策略，未配置的字段沿用 base"""
+        values = dict(vars(base)) if base is not None else {}
+        values.update(data)
+        return cls(**values)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        第 attempt 次失败后的退避时间，使用 full jitter
+
+        Args:
+            attempt: 已失败的次数，从 1 开始
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """判断错误是否可以重试，支持 aiohttp 和 httpx 的异常"""
+    if type(error).__module__.startswith("httpx"):
+        import httpx
+
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS
+        return isinstance(error, httpx.TransportError)
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if not type(error).__module__.startswith("aiohttp"):
+        return False
+
+    import aiohttp
+
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUS
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+class RetryExecutor:
+    """按方法执行重试与对冲，并记录各方法的延迟"""
+
+    def __init__(self, default_policy: Optional[RetryPolicy] = None, policies: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        初始化
+
+        Args:
+            default_policy: 默认策略
+            policies: 按 "数据源名称.方法名" 或 "数据源名称" 覆盖的策略字段
+        """
+        self.default_policy = default_policy or RetryPolicy()
+        self._policies = {key: RetryPolicy.from_dict(value, self.default_policy) for key, value in (policies or {}).items()}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "hedged": 0, "hedge_wins": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryExecutor":
+        """根据数据源配置创建"""
+        return cls(RetryPolicy.from_dict(config.get("retry_policy", {})), config.get("retry_policies"))
+
+    def get_policy(self, key: Optional[str]) -> RetryPolicy:
+        """按方法、数据源、默认的顺序查找策略"""
+        if key:
+            policy = self._policies.get(key) or self._policies.get(key.split(".", 1)[0])
+            if policy is not None:
+                return policy
+        return self.default_policy
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]], idempotent: bool = True) -> Any:
+        """
+        执行请求，失败时按策略重试
+
+        Args:
+            key: 策略和延迟统计使用的键，通常为 "数据源名称.方法名"
+            call: 无参的协程函数，每次调用发送一次请求
+            idempotent: 请求是否幂等，非幂等请求不重试也不对冲
+
+        Returns:
+            Any: call 的结果
+
+        Raises:
+            Exception: 最后一次尝试的错误
+        """
+        policy = self.get_policy(key)
+        attempts = policy.max_attempts if idempotent else 1
+        self._count("requests")
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._attempt(key, call, policy, hedge=idempotent and policy.hedge)
+            except Exception as e:
+                if attempt >= attempts or not is_retryable(e):
+                    raise
+                delay = policy.backoff(attempt)
+                self._count("retries")
+                logger.info(f"{key} 第 {attempt} 次请求失败，{delay:.2f}s 后重试: {e!r}")
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, key: str, call: Callable[[], Awaitable[Any]], policy: RetryPolicy, hedge: bool) -> Any:
+        start = time.monotonic()
+        threshold = self._hedge_delay(key, policy) if hedge else None
+        if threshold is None:
+            result = await call()
+            self._record(key, time.monotonic() - start)
+            return result
+
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if not done:
+                # 超过分位延迟仍未返回，发出对冲请求
+                self._count("hedged")
+                pending.add(asyncio.ensure_future(call()))
+
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        self._record(key, time.monotonic() - start)
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error  # type: ignore[misc]
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, key: str, policy: RetryPolicy) -> Optional[float]:
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None or len(samples) < policy.hedge_min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * policy.hedge_quantile))
+        return max(policy.hedge_min_delay, ordered[index])
+
+    def _record(self, key: str, latency: float):
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None:
+                samples = self._latencies[key] = deque(maxlen=_LATENCY_WINDOW)
+            samples.append(latency)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取重试统计
+
+        Returns:
+            Dict[str, int]: 请求数、重试次数、发出的对冲请求数、对冲请求先返回的次数
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+_default_executor: Optional[RetryExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_default_retry_executor() -> RetryExecutor:
+    """
+    获取默认的重试执行器，供未绑定到 ApiClient 的数据源使用
+
+    Returns:
+        RetryExecutor: 默认重试执行器
+    """
+    global _default_executor
+    if _default_executor is None:
+        with _default_executor_lock:
+            if _default_executor is None:  # Double-check
+                _default_executor = RetryExecutor()
+    return _default_executor
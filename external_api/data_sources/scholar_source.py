@@ -4,12 +4,14 @@
 
 import asyncio
 import logging
-import math
-from typing import Any, Dict, Optional
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
 
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
+from .pagination import gather_pages, iter_pages, plan_pages
 
 logger = logging.getLogger("scholar_source")
 
@@ -23,6 +25,7 @@ class ScholarSource(BaseAPI):
     def __init__(self, config: Dict[str, Any]):
         """Initialize the academic data source"""
         self.timeout = config["timeout"]
+        self.max_concurrency = config.get("fan_out_concurrency", 8)
         self.proxy_url = config["external_api_proxy_url"]
         self.headers = {
             "X-Original-Host": config["serper_base_url"],
@@ -49,6 +52,7 @@ class ScholarSource(BaseAPI):
         """
         return {"name": self.source_name, "description": "Scholar paper search, works like google scholar"}
 
+    @cached(ttl=86400)
     async def _fetch_scholar_page(
         self,
         query: str,
@@ -79,10 +83,7 @@ class ScholarSource(BaseAPI):
         request_url = f"{self.proxy_url}/scholar"
 
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.post(request_url, headers=self.headers, json=payload, timeout=self.timeout) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+            data = await self._request_json("POST", request_url, headers=self.headers, json=payload, timeout=self.timeout, idempotent=True)
 
             organic = data.get("organic", [])
 
@@ -142,6 +143,9 @@ class ScholarSource(BaseAPI):
                                 "citedBy": "...",
                                 "pdfUrl": "..."
                             }
+                        ],
+                        "missing_pages": [          # Pages that failed, results may be incomplete or empty if every page failed
+                            {"page": 3, "error": "..."}
                         ]
                     }
                 }
@@ -167,57 +171,91 @@ class ScholarSource(BaseAPI):
             if num_results > 500:
                 num_results = 500
 
-            # 计算分页
-            MAX_PAGE_SIZE = 20  # 最大每页数量,api有限制
-            page_size = min(num_results, MAX_PAGE_SIZE)
-            total_pages = math.ceil(num_results / page_size)
-
-            # 并发请求所有页面
-            tasks = []
-            for page in range(1, total_pages + 1):
-                # 最后一页可能需要调整数量
-                if page == total_pages and num_results % page_size != 0:
-                    current_page_size = num_results % page_size
-                else:
-                    current_page_size = page_size
-
-                tasks.append(
-                    self._fetch_scholar_page(
-                        query=query,
-                        page_size=current_page_size,
-                        page=page,
-                        start_year=start_year,
-                        end_year=end_year,
-                    )
+            async def fetch_page(page):
+                return await self._fetch_scholar_page(
+                    query=query, page_size=page[1], page=page[0], start_year=start_year, end_year=end_year
                 )
 
-            # 等待所有请求完成
-            results = await asyncio.gather(*tasks)
-
-            # 合并结果
-            all_papers = []
-            has_error = False
-            error_msgs = []
-            successful_pages = 0
-
-            for i, result in enumerate(results):
-                page_num = i + 1
-                if result["success"]:
-                    page_results = result["data"]
-                    all_papers.extend(page_results)
-                    successful_pages += 1
-                else:
-                    has_error = True
-                    error_msgs.append(f"Page {page_num}: {result['error']}")
-
-            # 如果有部分失败，记录错误但仍返回成功获取的数据
-            if has_error:
-                logger.warning(f"Some scholar pages failed: {', '.join(error_msgs)}")
+            # 有限并发请求所有页面，每页只在 RetryExecutor 中按方法的策略重试可重试的错误
+            page_results = await gather_pages(fetch_page, plan_pages(num_results, 20), self.max_concurrency)
+
+            # 有失败的页时记录错误，仍返回成功获取的数据；所有页都失败时同样返回成功和空结果，失败的页见 missing_pages
+            if page_results.missing_pages:
+                logger.warning(f"Some scholar pages failed: {page_results.missing_pages}")
 
             # 限制返回数量
-            all_papers = all_papers[:num_results]
+            all_papers = page_results.data[:num_results]
 
-            return {"success": True, "data": {"papers": all_papers}}
+            return {"success": True, "data": {"papers": all_papers, "missing_pages": page_results.missing_pages}}
         except Exception as e:
             logger.error(f"search_scholar error: {e}")
             return {"success": False, "error": str(e)}
+
+    async def iter_scholar(
+        self,
+        query: str,
+        num_results: int = 10,
+        start_year: Optional[str] = None,
+        end_year: Optional[str] = None,
+        prefetch: int = 2,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream academic papers page by page, in the same order as search_scholar.
+        While a page is consumed, the next `prefetch` pages are already being requested; pages beyond that are only
+        requested as iteration reaches them. Close the iterator when stopping early (e.g. with contextlib.aclosing),
+        so that the pages still being requested are cancelled.
+        A page that fails is yielded as {"success": False, "error": "...", "page": 3} in place of its papers,
+        papers never contain a "success" key.
+
+        Args:
+            query(str): Search keywords.
+            num_results(int): Maximum number of results to yield, default is 10, max is 500.
+            start_year(str): Start year, YYYY, default is None.
+            end_year(str): End year, YYYY, default is None.
+            prefetch(int): Number of pages requested ahead of the one being consumed, default is 2.
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Papers, each in the same format as the items of search_scholar's "papers":
+                {
+                    "title": "...",
+                    "snippet": "...",
+                    "link": "...",
+                    "publicationInfo": "...",
+                    "year": "...",
+                    "citedBy": "...",
+                    "pdfUrl": "..."
+                }
+        """
+
+        # Example:
+        #     >>> from contextlib import aclosing
+        #     >>> from external_api.data_sources.client import get_client
+        #     >>> client = get_client()
+        #     >>> async with aclosing(client.scholar.iter_scholar(query="machine learning", num_results=100)) as papers:
+        #     ...     async for paper in papers:
+        #     ...         if "success" in paper:
+        #     ...             print(f"Page {paper['page']} failed: {paper['error']}")
+        #     ...             continue
+        #     ...         print(paper["title"])
+        #     ...         if "transformer" in paper["title"].lower():
+        #     ...             break
+        num_results = min(num_results, 500)
+
+        async def fetch_page(page):
+            return await self._fetch_scholar_page(
+                query=query, page_size=page[1], page=page[0], start_year=start_year, end_year=end_year
+            )
+
+        count = 0
+        # 调用方关闭本迭代器时立即关闭 iter_pages，取消提前发出的请求
+        async with aclosing(iter_pages(fetch_page, plan_pages(num_results, 20), prefetch)) as pages:
+            async for (page, _), result in pages:
+                if not result["success"]:
+                    logger.warning(f"iter_scholar page {page} failed: {result['error']}")
+                    yield {"success": False, "error": result["error"], "page": page}
+                    continue
+                for paper in result["data"]:
+                    yield paper
+                    count += 1
+                    if count >= num_results:
+                        return
@@ -0,0 +1,244 @@
+"""
+共享的 aiohttp 会话管理
+
+每个事件循环持有一个带连接池的 ClientSession，所有数据源复用同一组 keep-alive 连接，
+避免每次请求都重新建立 TCP/TLS 连接。使用 httpx 的数据源同样按事件循环共享一个 AsyncClient。
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("data_sources_session")
+
+
+class SessionManager:
+    """
+    按事件循环管理共享的 aiohttp.ClientSession
+
+    aiohttp 的会话和连接器绑定在创建它们的事件循环上，因此每个事件循环各自持有一个会话；
+    事件循环关闭前（asyncio.run 结束时的 shutdown_asyncgens）会在该循环上关闭对应的会话和 httpx 客户端。
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30,
+        ttl_dns_cache: Optional[int] = 300,
+        unix_socket: Optional[str] = None,
+        timeout: float = 60,
+        http2: bool = False,
+    ):
+        """
+        初始化会话管理器
+
+        Args:
+            limit: 连接池总连接数上限
+            limit_per_host: 单个 host 的连接数上限
+            keepalive_timeout: 空闲连接保活时间（秒）
+            ttl_dns_cache: DNS 缓存时间（秒），None 表示永久缓存
+            unix_socket: Unix domain socket 路径，设置后所有请求都经由该 socket 发送
+            timeout: httpx 客户端的默认超时时间（秒）
+            http2: httpx 客户端是否启用 HTTP/2，需要安装 h2，未安装时使用 HTTP/1.1
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+        self.http2 = http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("未安装 h2，httpx 客户端使用 HTTP/1.1")
+            self.http2 = False
+        self._httpx_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+        # 每个事件循环一个在循环关闭前关闭会话的异步生成器，需要持有强引用，事件循环只保存弱引用
+        self._shutdown_hooks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        _managers.add(self)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SessionManager":
+        """根据数据源配置创建会话管理器"""
+        return cls(
+            limit=config.get("pool_limit", 100),
+            limit_per_host=config.get("pool_limit_per_host", 20),
+            keepalive_timeout=config.get("keepalive_timeout", 30),
+            ttl_dns_cache=config.get("dns_cache_ttl", 300),
+            timeout=config.get("timeout", 60),
+            http2=config.get("http2", False),
+        )
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        获取当前事件循环对应的共享会话，不存在或已关闭时新建
+
+        必须在事件循环中调用
+
+        Returns:
+            aiohttp.ClientSession: 共享会话，调用方不应关闭它
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                session = aiohttp.ClientSession(connector=self._create_connector(), trust_env=self.unix_socket is None)
+                self._sessions[loop] = session
+                self._prune_closed_loops()
+                self._register_shutdown_hook(loop)
+        return session
+
+    def get_httpx_client(self) -> "httpx.AsyncClient":
+        """
+        获取当前事件循环对应的共享 httpx 客户端，不存在或已关闭时新建
+
+        连接池的大小和保活时间与 aiohttp 会话一致，必须在事件循环中调用
+
+        Returns:
+            httpx.AsyncClient: 共享客户端，调用方不应关闭它
+        """
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._httpx_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    http2=self.http2,
+                    timeout=httpx.Timeout(self.timeout),
+                    limits=httpx.Limits(
+                        max_connections=self.limit,
+                        max_keepalive_connections=self.limit_per_host,
+                        keepalive_expiry=self.keepalive_timeout,
+                    ),
+                    transport=httpx.AsyncHTTPTransport(uds=self.unix_socket) if self.unix_socket else None,
+                    trust_env=self.unix_socket is None,
+                )
+                self._httpx_clients[loop] = client
+                self._register_shutdown_hook(loop)
+        return client
+
+    def _register_shutdown_hook(self, loop: asyncio.AbstractEventLoop):
+        """
+        在事件循环关闭前关闭该循环上的会话和 httpx 客户端
+
+        事件循环会记录运行中的异步生成器，并在 shutdown_asyncgens（asyncio.run 结束时调用）中逐个 aclose，
+        此时循环仍在运行，可以正常 await 关闭。调用方需持有 self._lock
+        """
+        if loop in self._shutdown_hooks:
+            return
+        hook = self._close_on_shutdown()
+        # 同步驱动到 yield，首次迭代时事件循环登记该生成器
+        try:
+            hook.asend(None).send(None)
+        except StopIteration:
+            pass
+        self._shutdown_hooks[loop] = hook
+
+    async def _close_on_shutdown(self):
+        try:
+            yield
+        finally:
+            await self.close()
+
+    def _create_connector(self) -> aiohttp.BaseConnector:
+        """创建带连接池的连接器"""
+        if self.unix_socket:
+            return aiohttp.UnixConnector(
+                path=self.unix_socket,
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=True,
+        )
+
+    async def close(self):
+        """关闭当前事件循环对应的会话和 httpx 客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+            client = self._httpx_clients.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    def close_all(self):
+        """
+        关闭所有会话，供进程退出时调用
+
+        仍可运行的事件循环上的会话正常关闭；已关闭的事件循环上的会话无法再 await 关闭，只丢弃引用，
+        正常情况下它们已在事件循环关闭前被关闭
+        """
+        with self._lock:
+            items = list(self._sessions.items())
+            self._sessions.clear()
+            clients = list(self._httpx_clients.items())
+            self._httpx_clients.clear()
+
+        for loop, client in clients:
+            # 已关闭或正在运行的事件循环上无法关闭 httpx 客户端，交给进程退出释放
+            if client.is_closed or loop.is_closed() or loop.is_running():
+                continue
+            try:
+                loop.run_until_complete(client.aclose())
+            except Exception as e:
+                logger.warning(f"关闭 httpx 客户端失败: {e}")
+
+        for loop, session in items:
+            if session.closed or loop.is_closed() or loop.is_running():
+                continue
+            try:
+                loop.run_until_complete(session.close())
+            except Exception as e:
+                logger.warning(f"关闭会话失败: {e}")
+
+    def _prune_closed_loops(self):
+        """丢弃已关闭事件循环遗留的会话和客户端"""
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            self._sessions.pop(loop)
+        for loop in [loop for loop in self._httpx_clients if loop.is_closed()]:
+            self._httpx_clients.pop(loop)
+
+
+_managers: "weakref.WeakSet[SessionManager]" = weakref.WeakSet()
+_default_manager: Optional[SessionManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_default_session_manager() -> SessionManager:
+    """
+    获取默认的会话管理器，供未绑定到 ApiClient 的数据源使用
+
+    Returns:
+        SessionManager: 默认会话管理器
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:  # Double-check
+                _default_manager = SessionManager()
+    return _default_manager
+
+
+@atexit.register
+def _close_all_managers():
+    for manager in list(_managers):
+        manager.close_all()
@@ -0,0 +1,137 @@
+"""
+数据源调用的单飞去重
+
+同一事件循环上，数据源、方法和参数都相同的调用同时进行时，只有第一个调用（leader）真正执行，
+其余调用（follower）等待同一个结果。有 follower 时每个调用方（包括 leader）各自得到 share_result 的浅拷贝，
+更深层的对象共享，调用方不应修改。与响应缓存不同，结果不会在调用结束后保留。
+
+响应缓存已经合并进行中的相同调用，因此单飞代理只处理未缓存（或缓存时间配置为 0）的方法。
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from .base import BaseAPI
+from .cache import make_call_key, share_result
+from .call_context import current_method
+
+
+class SingleFlight:
+    """按调用键合并进行中的相同调用"""
+
+    def __init__(self):
+        # 调用键 -> (任务, [follower 数])
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[asyncio.Future, List[int]]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行调用，已有相同键的调用在进行中时等待其结果
+
+        Args:
+            key: 调用键
+            call: 无参的协程函数
+
+        Returns:
+            Any: 调用结果；有 follower 时每个调用方得到各自的浅拷贝，任务本身的结果不交给任何调用方
+        """
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+        entry = inflight.get(key)
+        if entry is not None:
+            task, followers = entry
+            followers[0] += 1
+            self._count("followers")
+            return share_result(await asyncio.shield(task))
+
+        self._count("leaders")
+        task = asyncio.ensure_future(call())
+        followers = [0]
+        inflight[key] = (task, followers)
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+        # leader 被取消时，调用仍然继续，follower 不受影响
+        result = await asyncio.shield(task)
+        # 任务结束后不会再有 follower 加入，没有 follower 时不必复制
+        return share_result(result) if followers[0] else result
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取去重统计
+
+        Returns:
+            Dict[str, int]: leaders 为真正执行的调用数，followers 为被合并的调用数
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+class SingleFlightSource:
+    """
+    数据源的代理，公开的协程方法经过 SingleFlight 去重，其余属性直接转发给数据源
+
+    __class__ 返回数据源的类，isinstance(proxy, BaseAPI) 等类型检查与直接使用数据源一致
+    """
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> type:
+        return type(self._source)
+
+    def __init__(self, source: BaseAPI, single_flight: SingleFlight):
+        self._source = source
+        self._single_flight = single_flight
+        self._methods: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._source, name)
+        if name.startswith("_") or not inspect.iscoroutinefunction(attr):
+            return attr
+
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = self._wrap(name, attr)
+        return method
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        method_key = f"{self._source.source_name}.{name}"
+        signature = inspect.signature(getattr(type(self._source), name))
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            # 记录当前方法，方法内创建的任务同样继承，供重试策略按方法查找配置
+            token = current_method.set(method_key)
+            try:
+                if self._is_cached(name, method):
+                    # 响应缓存已经合并进行中的相同调用
+                    return await method(*args, **kwargs)
+                key = make_call_key(method_key, signature, (self._source, *args), kwargs)
+                if key is None:
+                    return await method(*args, **kwargs)
+                return await self._single_flight.do(key, lambda: method(*args, **kwargs))
+            finally:
+                current_method.reset(token)
+
+        return wrapper
+
+    def _is_cached(self, name: str, method: Callable) -> bool:
+        ttl = getattr(method, "_cache_ttl", None)
+        if ttl is None:
+            return False
+        cache = self._source._get_response_cache()
+        return cache is not None and cache.get_ttl(f"{self._source.source_name}.{name}", ttl) > 0
+
+    def __dir__(self):
+        return dir(self._source)
+
+    def __repr__(self) -> str:
+        return f"<SingleFlightSource {self._source!r}>"
@@ -2,16 +2,22 @@
 TripAdvisor Officical API data source implementation
 """
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-import httpx
+from typing import Any, Dict, List, Optional, Tuple
 
 from .base import BaseAPI
+from .cache import cached
+from .geo_cache import SpatialCache, destination_point, initial_bearing
 
 logger = logging.getLogger("tripadvisor_official_source")
 
+LOCATION_BUNDLE_PARTS = ("details", "reviews", "photos")
+# nearby_search 结果的 distance 单位为英里，bearing 为相对查询中心的八方位
+_METERS_PER_MILE = 1609.344
+_COMPASS_POINTS = ("north", "northeast", "east", "southeast", "south", "southwest", "west", "northwest")
+
 
 class TripAdvisorSource(BaseAPI):
     """TripAdvisor official API data source"""
@@ -27,6 +33,8 @@ class TripAdvisorSource(BaseAPI):
             "X-Biz-Id":"matrix-agent",
             "X-Request-Timeout": str(config["timeout"]-5),
         }
+        self.max_concurrency = config.get("fan_out_concurrency", 8)
+        self._nearby_cache = SpatialCache.from_config(config.get("nearby_cache", {}))
 
 
     async def _make_api_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -36,11 +44,16 @@ class TripAdvisorSource(BaseAPI):
         if params is None:
             params = {}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, params=params)
+        async def send() -> Dict[str, Any]:
+            client = self._get_httpx_client()
+            host = await self._acquire_rate_limit(self.headers)
+            response = await client.get(url, headers=self.headers, params=params, timeout=self.timeout)
+            self._record_rate_limit(host, response.status_code, response.headers.get("Retry-After"))
             response.raise_for_status()
             return response.json()
 
+        return await self._with_retry(send)
+
     @property
     def source_name(self) -> str:
         return "tripadvisor"
@@ -52,6 +65,7 @@ class TripAdvisorSource(BaseAPI):
             "description": "TripAdvisor official API data source, provides location info, reviews, and image search from TripAdvisor.",
         }
 
+    @cached(ttl=86400)
     async def search_locations(
         self,
         searchQuery: str,
@@ -127,6 +141,8 @@ class TripAdvisorSource(BaseAPI):
     ) -> Dict[str, Any]:
         """
         Search for locations near a specific latitude/longitude.
+        Queries within about 100 metres (by default) of a recent query with the same language and category reuse its results:
+        distance and bearing are recomputed from the new point, and only the locations the earlier query certainly covers are returned.
 
         Args:
             latitude(float): Latitude coordinate
@@ -163,6 +179,17 @@ class TripAdvisorSource(BaseAPI):
         if category:
             params["category"] = category
 
+        # 地图平移时中心点往往只移动几十米，附近已有结果时按新的中心点重新计算距离和方位，不再请求
+        namespace = (language, category)
+        nearby = self._nearby_cache.get(namespace, latitude, longitude)
+        if nearby is not None:
+            locations = []
+            for distance, item_latitude, item_longitude, location in nearby:
+                location["distance"] = str(distance / _METERS_PER_MILE)
+                location["bearing"] = _compass_point(initial_bearing(latitude, longitude, item_latitude, item_longitude))
+                locations.append(location)
+            return {"success": True, "data": locations}
+
         try:
             data = await self._make_api_request("location/nearby_search", params)
             if not data:
@@ -171,12 +198,18 @@ class TripAdvisorSource(BaseAPI):
             if not data.get("data", None):
                 return {"success": False, "error": "No data returned from Tripadvisor API"}
 
+            positions = [_locate(latitude, longitude, location) for location in data["data"]]
+            # 有结果无法定位时不缓存，复用时无法按新的中心点重新计算
+            if all(positions):
+                located = [(*position, location) for position, location in zip(positions, data["data"])]
+                self._nearby_cache.put(namespace, latitude, longitude, located)
             return {"success": True, "data": data.get("data", [])}
 
         except Exception as e:
             logger.error(f"Error searching nearby locations: {e}")
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=86400)
     async def get_location_details(
         self,
         locationId: int,
@@ -286,6 +319,7 @@ class TripAdvisorSource(BaseAPI):
             logger.error(f"Error getting location details: {e}")
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=3600)
     async def get_location_reviews(
         self,
         locationId: int,
@@ -359,6 +393,7 @@ class TripAdvisorSource(BaseAPI):
             logger.error(f"Error getting location reviews: {e}")
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=86400)
     async def get_location_photos(
         self,
         locationId: int,
@@ -412,6 +447,78 @@ class TripAdvisorSource(BaseAPI):
             logger.error(f"Error getting location photos: {e}")
             return {"success": False, "error": str(e)}
 
+    async def get_location_bundle(
+        self,
+        location_ids: List[str],
+        parts: Optional[List[str]] = None,
+        language: str = "en",
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get details, reviews and/or photos of many locations in one call, e.g. to render a list of locations.
+        All requests are sent concurrently; a failed part does not fail the other parts or locations.
+
+        Args:
+            location_ids(List[str]): Tripadvisor location IDs (strings or integers)
+            parts(Optional[List[str]]): Parts to fetch, options: details, reviews, photos, default is all of them
+            language(str): Language code (default: 'en')
+            max_concurrency(Optional[int]): Maximum number of requests sent at the same time, default: 8
+
+        Returns:
+            Dict[str, Any]: Dictionary containing one entry per location, in the order of location_ids, e.g.
+            {
+                "success": True,               # Whether successful, False only if every request failed
+                "data": {
+                    "locations": [
+                        {
+                            "location_id": "13189438", # Location ID
+                            "details": {...},  # Same as data of get_location_details, null if failed or not requested
+                            "reviews": [...],  # Same as data of get_location_reviews, null if failed or not requested
+                            "photos": [...],   # Same as data of get_location_photos, null if failed or not requested
+                            "errors": {        # Error message of each failed part
+                                "reviews": "..."
+                            }
+                        }
+                    ]
+                }
+            }
+        """
+        parts = list(dict.fromkeys(parts or LOCATION_BUNDLE_PARTS))
+        unknown = [part for part in parts if part not in LOCATION_BUNDLE_PARTS]
+        if unknown:
+            return {"success": False, "error": f"Unsupported parts: {unknown}, options: {'|'.join(LOCATION_BUNDLE_PARTS)}"}
+
+        fetchers = {
+            "details": self.get_location_details,
+            "reviews": self.get_location_reviews,
+            "photos": self.get_location_photos,
+        }
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+        async def fetch(location_id: str, part: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await fetchers[part](location_id, language)
+                except Exception as e:
+                    logger.error(f"Error getting location {part}: {e}")
+                    return {"success": False, "error": str(e)}
+
+        # 统一转为字符串，同一地点不论传入整数还是字符串都命中同一缓存
+        ids = list(dict.fromkeys(str(location_id) for location_id in location_ids))
+        requests = [(location_id, part) for location_id in ids for part in parts]
+        results = await asyncio.gather(*[fetch(location_id, part) for location_id, part in requests])
+
+        locations = {location_id: {"location_id": location_id, **{part: None for part in parts}, "errors": {}} for location_id in ids}
+        for (location_id, part), result in zip(requests, results):
+            if result["success"]:
+                locations[location_id][part] = result["data"]
+            else:
+                locations[location_id]["errors"][part] = result["error"]
+
+        if requests and not any(result["success"] for result in results):
+            return {"success": False, "error": results[0]["error"]}
+        return {"success": True, "data": {"locations": list(locations.values())}}
+
     def _parse_reviews(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Parse location review data"""
         reviews = []
@@ -575,6 +682,28 @@ class TripAdvisorSource(BaseAPI):
             return date_str
 
 
+def _locate(latitude: float, longitude: float, location: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """
+    由 nearby_search 结果中相对查询中心的 distance 和 bearing 推算位置
+
+    bearing 只有八个方位，推算的位置有角度误差；中心点移动 offset 米后，重新计算的距离误差不超过约 0.4 * offset
+
+    Returns:
+        Optional[Tuple[float, float]]: (纬度, 经度)，缺少或无法解析 distance、bearing 时返回 None
+    """
+    try:
+        distance = float(location["distance"]) * _METERS_PER_MILE
+        bearing = _COMPASS_POINTS.index(str(location["bearing"]).lower()) * 45.0
+    except (KeyError, TypeError, ValueError):
+        return None
+    return destination_point(latitude, longitude, bearing, distance)
+
+
+def _compass_point(bearing: float) -> str:
+    """方位角（度）对应的八方位"""
+    return _COMPASS_POINTS[round(bearing / 45.0) % 8]
+
+
 async def main():
     from external_api.data_sources.client import get_client
 
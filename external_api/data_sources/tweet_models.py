@@ -0,0 +1,299 @@
+"""
+推文的紧凑表示
+
+TwitterSource 在 output_format="typed" 时返回这里的 slots dataclass 而不是嵌套字典：
+同一作者的多条推文共享同一个 TwitterUser 对象（由 UserPool 驻留），需要原有字典结构时调用 to_dict()。
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DateFormatter = Callable[[Optional[str]], Optional[str]]
+
+# 上游缺少 user_id 时的用户 id，与字典输出中的 str(None) 一致；这样的用户各自独立，不参与驻留
+MISSING_USER_ID = str(None)
+
+
+@dataclass(slots=True)
+class TwitterUser:
+    """Twitter 用户，字段与 TwitterSource.get_user_info 返回的 data 一致"""
+
+    id: str
+    username: Optional[str]
+    name: Optional[str]
+    created_at: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    url: Optional[str] = None
+    profile_image_url: Optional[str] = None
+    profile_banner_url: Optional[str] = None
+    followers_count: int = 0
+    following_count: int = 0
+    tweet_count: int = 0
+    listed_count: int = 0
+    like_count: int = 0
+    verified: bool = False
+    blue_verified: bool = False
+    private: bool = False
+    bot: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 get_user_info 的 data 结构"""
+        return {
+            "id": self.id,
+            "username": self.username,
+            "name": self.name,
+            "created_at": self.created_at,
+            "description": self.description,
+            "location": self.location,
+            "url": self.url,
+            "profile_image_url": self.profile_image_url,
+            "profile_banner_url": self.profile_banner_url,
+            "public_metrics": {
+                "followers_count": self.followers_count,
+                "following_count": self.following_count,
+                "tweet_count": self.tweet_count,
+                "listed_count": self.listed_count,
+                "like_count": self.like_count,
+            },
+            "verified": self.verified,
+            "blue_verified": self.blue_verified,
+            "private": self.private,
+            "bot": self.bot,
+        }
+
+    def to_author_dict(self) -> Dict[str, Any]:
+        """转换为 search_tweets 中 author 的结构"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "username": self.username,
+            "followers_count": self.followers_count,
+            "is_verified": self.verified,
+            "is_blue_verified": self.blue_verified,
+        }
+
+
+@dataclass(slots=True)
+class PublicMetrics:
+    """推文的公开指标"""
+
+    retweet_count: int = 0
+    reply_count: int = 0
+    like_count: int = 0
+    quote_count: int = 0
+    view_count: int = 0
+    bookmark_count: int = 0
+
+    @classmethod
+    def from_raw(cls, result: Dict[str, Any]) -> "PublicMetrics":
+        return cls(
+            retweet_count=result.get("retweet_count", 0),
+            reply_count=result.get("reply_count", 0),
+            like_count=result.get("favorite_count", 0),
+            quote_count=result.get("quote_count", 0),
+            view_count=result.get("views", 0),
+            bookmark_count=result.get("bookmark_count", 0),
+        )
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "retweet_count": self.retweet_count,
+            "reply_count": self.reply_count,
+            "like_count": self.like_count,
+            "quote_count": self.quote_count,
+            "view_count": self.view_count,
+            "bookmark_count": self.bookmark_count,
+        }
+
+
+@dataclass(slots=True)
+class Tweet:
+    """
+    推文
+
+    search_tweets 返回的推文 language 为 None、referenced 为 None，to_dict() 时作者放在 author 字段；
+    get_user_tweets 返回的推文作者放在 user 字段
+    """
+
+    id: str
+    created_at: Optional[str]
+    text: str
+    author: TwitterUser
+    public_metrics: PublicMetrics
+    media_urls: Tuple[str, ...] = ()
+    video_urls: Tuple[str, ...] = ()
+    language: Optional[str] = None
+    referenced: Optional["ReferencedTweet"] = None
+    from_search: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 search_tweets / get_user_tweets 中推文的字典结构"""
+        if self.from_search:
+            return {
+                "id": self.id,
+                "created_at": self.created_at,
+                "text": self.text,
+                "media_urls": list(self.media_urls),
+                "video_urls": list(self.video_urls),
+                "author": self.author.to_author_dict(),
+                "public_metrics": self.public_metrics.to_dict(),
+            }
+
+        tweet = {
+            "id": self.id,
+            "created_at": self.created_at,
+            "text": self.text,
+            "language": self.language,
+            "media_urls": list(self.media_urls),
+            "video_urls": list(self.video_urls),
+            "public_metrics": self.public_metrics.to_dict(),
+            "user": self.author.to_dict(),
+        }
+        if self.referenced is not None:
+            tweet["referenced_tweets"] = self.referenced.to_dict()
+        return tweet
+
+
+@dataclass(slots=True)
+class ReferencedTweet:
+    """被回复、转发或引用的推文，回复只有 id"""
+
+    type: str
+    id: str
+    tweet: Optional[Tweet] = None
+    quoted: Optional["ReferencedTweet"] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.tweet is None:
+            return {"type": self.type, "id": self.id}
+        referenced = {"type": self.type, **self.tweet.to_dict()}
+        if self.quoted is not None:
+            referenced["quoted_status"] = self.quoted.to_dict()
+        return referenced
+
+
+class UserPool:
+    """
+    按用户 id 驻留 TwitterUser，同一用户的推文共享一个对象
+
+    以第一次见到的用户信息为准，同一批结果中粉丝数等计数的细微变化会被忽略
+    """
+
+    __slots__ = ("_users", "_format_date")
+
+    def __init__(self, format_date: DateFormatter):
+        """
+        Args:
+            format_date: 日期格式化函数，与 TwitterSource._format_date 一致
+        """
+        self._users: Dict[str, TwitterUser] = {}
+        self._format_date = format_date
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def user(self, data: Dict[str, Any]) -> TwitterUser:
+        """由用户详情（get_user_info / 推文中的 user 字段）获取用户，缺少 user_id 的用户不驻留"""
+        user_id = str(data.get("user_id"))
+        user = self._users.get(user_id) if user_id != MISSING_USER_ID else None
+        if user is None:
+            user = TwitterUser(
+                id=user_id,
+                username=data.get("username"),
+                name=data.get("name"),
+                created_at=self._format_date(data.get("creation_date")),
+                description=data.get("description"),
+                location=data.get("location"),
+                url=data.get("external_url"),
+                profile_image_url=data.get("profile_pic_url"),
+                profile_banner_url=data.get("profile_banner_url"),
+                followers_count=data.get("follower_count", 0),
+                following_count=data.get("following_count", 0),
+                tweet_count=data.get("number_of_tweets", 0),
+                listed_count=data.get("listed_count", 0),
+                like_count=data.get("favourites_count", 0),
+                verified=data.get("is_verified", False),
+                blue_verified=data.get("is_blue_verified", False),
+                private=data.get("is_private", False),
+                bot=data.get("bot", False),
+            )
+            if user_id != MISSING_USER_ID:
+                self._users[user_id] = user
+        return user
+
+    def intern(self, user: TwitterUser) -> TwitterUser:
+        """返回池中同一 id 的用户，池中没有时加入并返回 user 本身；缺少 id 的用户原样返回"""
+        if user.id == MISSING_USER_ID:
+            return user
+        return self._users.setdefault(user.id, user)
+
+    def intern_tweet(self, tweet: Tweet) -> Tweet:
+        """
+        返回作者（包括引用推文的作者）替换为池中用户的推文，用于合并分别解析的多页结果
+
+        不修改传入的推文，它可能来自响应缓存
+        """
+        return replace(tweet, author=self.intern(tweet.author), referenced=self._intern_referenced(tweet.referenced))
+
+    def _intern_referenced(self, referenced: Optional["ReferencedTweet"]) -> Optional["ReferencedTweet"]:
+        if referenced is None:
+            return None
+        return replace(
+            referenced,
+            tweet=self.intern_tweet(referenced.tweet) if referenced.tweet is not None else None,
+            quoted=self._intern_referenced(referenced.quoted),
+        )
+
+    def search_tweet(self, result: Dict[str, Any]) -> Tweet:
+        """解析 search_tweets 接口返回的推文"""
+        return Tweet(
+            id=str(result.get("tweet_id")),
+            created_at=self._format_date(result.get("creation_date")),
+            text=result.get("text", ""),
+            author=self.user(result.get("user", {})),
+            public_metrics=PublicMetrics.from_raw(result),
+            media_urls=tuple(result["media_urls"]) if isinstance(result.get("media_urls"), list) else (),
+            video_urls=tuple(result["video_urls"]) if isinstance(result.get("video_urls"), list) else (),
+            from_search=True,
+        )
+
+    def timeline_tweet(self, result: Dict[str, Any], with_ref: bool = True) -> Tweet:
+        """解析 get_user_tweets 接口返回的推文，with_ref 为 True 时同时解析被引用的推文"""
+        tweet = Tweet(
+            id=str(result.get("tweet_id")),
+            created_at=self._format_date(result.get("creation_date")),
+            text=result.get("text", ""),
+            author=self.user(result.get("user", {})),
+            public_metrics=PublicMetrics.from_raw(result),
+            media_urls=_as_urls(result.get("media_url")),
+            video_urls=_as_urls(result.get("video_url")),
+            language=result.get("language"),
+        )
+        if with_ref:
+            tweet.referenced = self._referenced(result)
+        return tweet
+
+    def _referenced(self, result: Dict[str, Any]) -> Optional[ReferencedTweet]:
+        if result.get("in_reply_to_status_id"):
+            return ReferencedTweet(type="reply", id=str(result.get("in_reply_to_status_id", "")))
+        if result.get("retweet_tweet_id") and result.get("retweet_status"):
+            retweet = result.get("retweet_status", {})
+            referenced = ReferencedTweet(type="retweet", id=str(retweet.get("tweet_id")), tweet=self.timeline_tweet(retweet, False))
+            if retweet.get("quoted_status"):
+                quoted = retweet.get("quoted_status", {})
+                referenced.quoted = ReferencedTweet(type="quote", id=str(quoted.get("tweet_id")), tweet=self.timeline_tweet(quoted, False))
+            return referenced
+        if result.get("quoted_status_id") and result.get("quoted_status"):
+            quoted = result.get("quoted_status", {})
+            return ReferencedTweet(type="quote", id=str(quoted.get("tweet_id")), tweet=self.timeline_tweet(quoted, False))
+        return None
+
+
+def _as_urls(value: Any) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    if isinstance(value, list):
+        return tuple(value)
+    return (value,)
+
@@ -6,14 +6,19 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Union
 
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
+from .pagination import iter_cursor_pages
+from .tweet_models import Tweet, UserPool
 
 logger = logging.getLogger("twitter_source")
 
+TWEET_OUTPUT_FORMATS = ("dict", "typed")
+
 
 class TwitterSource(BaseAPI):
     """Twitter data source"""
@@ -41,6 +46,7 @@ class TwitterSource(BaseAPI):
             "description": "Twitter data source, providing tweet search, user info retrieval, and user tweet list retrieval",
         }
 
+    @cached(ttl=300)
     async def search_tweets(
         self,
         query: str,
@@ -52,6 +58,7 @@ class TwitterSource(BaseAPI):
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         cursor: Optional[str] = None,
+        output_format: str = "dict",
     ) -> Dict[str, Any]:
         """
         Search for tweets.
@@ -66,6 +73,7 @@ class TwitterSource(BaseAPI):
             start_date (Optional[str]): Start date, format: YYYY-MM-DD, default is None
             end_date (Optional[str]): End date, format: YYYY-MM-DD, default is None
             cursor (Optional[str]): Pagination cursor, used to get next page results, default is None for first page
+            output_format (str): Shape of "tweets", options: dict|typed, default: dict. typed returns compact Tweet objects whose authors are shared between tweets, call tweet.to_dict() to get the dict below
 
         Returns:
             Dict[str, Any]: Dictionary containing tweet search results, e.g.
@@ -123,6 +131,9 @@ class TwitterSource(BaseAPI):
         #     ... else:
         #     ...     print(f"Search failed: {result['error']}")
         # """
+        if output_format not in TWEET_OUTPUT_FORMATS:
+            return {"success": False, "error": f"Unsupported output_format: {output_format}, options: {'|'.join(TWEET_OUTPUT_FORMATS)}"}
+
         try:
             # 构建查询参数
             params = {
@@ -148,11 +159,7 @@ class TwitterSource(BaseAPI):
             request_url = f"{self.proxy_url}/search/search"
 
             # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout, content_type=None)
 
             # API返回的是JSON字符串，需要先解析
             if isinstance(data, str):
@@ -164,12 +171,17 @@ class TwitterSource(BaseAPI):
             if "results" not in data:
                 raise ValueError(f"Missing results field in API response: {data}")
 
+            pool = UserPool(self._format_date) if output_format == "typed" else None
             tweets = []
             for result in data["results"]:
                 if not isinstance(result, dict):
                     logger.warning(f"Skipping invalid tweet data: {result}")
                     continue
 
+                if pool is not None:
+                    tweets.append(pool.search_tweet(result))
+                    continue
+
                 tweet = {
                     "id": str(result.get("tweet_id")),
                     "created_at": self._format_date(result.get("creation_date")),
@@ -214,6 +226,7 @@ class TwitterSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=3600)
     async def get_user_info(self, username: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get detailed information about a Twitter user.
@@ -273,11 +286,7 @@ class TwitterSource(BaseAPI):
                 params["user_id"] = user_id
 
             # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout, content_type=None)
 
             # 解析响应数据
             if isinstance(data, str):
@@ -303,8 +312,16 @@ class TwitterSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    @cached(ttl=300)
     async def get_user_tweets(
-        self, username: str, limit: int = 10, user_id: Optional[str] = None, include_replies: bool = False, include_pinned: bool = False
+        self,
+        username: str,
+        limit: int = 10,
+        user_id: Optional[str] = None,
+        include_replies: bool = False,
+        include_pinned: bool = False,
+        cursor: Optional[str] = None,
+        output_format: str = "dict",
     ) -> Dict[str, Any]:
         """
         Get a list of tweets from a Twitter user.
@@ -315,6 +332,8 @@ class TwitterSource(BaseAPI):
             user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
             include_replies (bool): Whether to include reply tweets, default is False
             include_pinned (bool): Whether to include pinned tweets, default is False
+            cursor (Optional[str]): Pagination cursor, used to get next page results, default is None for first page
+            output_format (str): Shape of "tweets", options: dict|typed, default: dict. typed returns compact Tweet objects whose authors are shared between tweets, call tweet.to_dict() to get the dict below
 
         Returns:
             Dict[str, Any]: Dictionary containing user tweet list, e.g.
@@ -368,6 +387,9 @@ class TwitterSource(BaseAPI):
         #     ... else:
         #     ...     print(f"Failed to get tweets: {result['error']}")
         # """
+        if output_format not in TWEET_OUTPUT_FORMATS:
+            return {"success": False, "error": f"Unsupported output_format: {output_format}, options: {'|'.join(TWEET_OUTPUT_FORMATS)}"}
+
         try:
             # 构建请求URL
             request_url = f"{self.proxy_url}/user/tweets"
@@ -382,13 +404,11 @@ class TwitterSource(BaseAPI):
 
             if user_id:
                 params["user_id"] = user_id
+            if cursor:
+                params["continuation_token"] = cursor
 
             # 使用aiohttp发送异步请求
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # 解析响应
-                    data = await response.json(content_type=None)
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout, content_type=None)
 
             # 解析响应数据
             if isinstance(data, str):
@@ -400,11 +420,11 @@ class TwitterSource(BaseAPI):
             if "results" not in data:
                 raise ValueError(f"Missing results field in API response: {data}")
 
-            tweets = []
-            for result in data["results"]:
-                tweet = self._parse_tweet_with_ref(result)
-
-                tweets.append(tweet)
+            if output_format == "typed":
+                pool = UserPool(self._format_date)
+                tweets = [pool.timeline_tweet(result) for result in data["results"]]
+            else:
+                tweets = [self._parse_tweet_with_ref(result) for result in data["results"]]
 
             return {
                 "success": True,
@@ -425,6 +445,132 @@ class TwitterSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": error_msg}
 
+    async def iter_search_tweets(
+        self,
+        query: str,
+        max_tweets: int = 1000,
+        min_retweets: Optional[int] = None,
+        min_likes: Optional[int] = None,
+        min_replies: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        stop_before: Optional[str] = None,
+        output_format: str = "dict",
+    ) -> AsyncIterator[Union[Dict[str, Any], Tweet]]:
+        """
+        Stream tweets matching a search, following pagination cursors automatically.
+        Use it with `async for tweet in client.twitter.iter_search_tweets(...)`, the next page is requested while the current one is processed.
+
+        Args:
+            query (str): Search keyword, e.g. "Tesla" or "#TSLA"
+            max_tweets (int): Maximum number of tweets to yield, default is 1000
+            min_retweets (Optional[int]): Minimum number of retweets, default is None
+            min_likes (Optional[int]): Minimum number of likes, default is None
+            min_replies (Optional[int]): Minimum number of replies, default is None
+            start_date (Optional[str]): Start date, format: YYYY-MM-DD, default is None
+            end_date (Optional[str]): End date, format: YYYY-MM-DD, default is None
+            stop_before (Optional[str]): Skip tweets created before this date (YYYY-MM-DD) and stop once a whole page is older, default is None
+            output_format (str): dict|typed, default: dict, same as search_tweets. With typed, tweets of the same author share one author object across all pages
+
+        Returns:
+            AsyncIterator[Union[Dict[str, Any], Tweet]]: Tweets without duplicates, each in the same format as the items of search_tweets's "tweets"
+        """
+
+        async def fetch_page(cursor: Optional[str]) -> Dict[str, Any]:
+            return await self.search_tweets(
+                query=query,
+                limit=100,
+                min_retweets=min_retweets,
+                min_likes=min_likes,
+                min_replies=min_replies,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+                output_format=output_format,
+            )
+
+        async for tweet in self._iter_tweets(fetch_page, max_tweets, stop_before, output_format):
+            yield tweet
+
+    async def iter_user_tweets(
+        self,
+        username: str,
+        max_tweets: int = 1000,
+        user_id: Optional[str] = None,
+        include_replies: bool = False,
+        stop_before: Optional[str] = None,
+        output_format: str = "dict",
+    ) -> AsyncIterator[Union[Dict[str, Any], Tweet]]:
+        """
+        Stream tweets of a Twitter user from newest to oldest, following pagination cursors automatically.
+        Use it with `async for tweet in client.twitter.iter_user_tweets(...)`, the next page is requested while the current one is processed.
+
+        Args:
+            username (str): Twitter username without @ symbol
+            max_tweets (int): Maximum number of tweets to yield, default is 1000
+            user_id (Optional[str]): Twitter user ID, default is None, if provided user_id, username will be ignored
+            include_replies (bool): Whether to include reply tweets, default is False
+            stop_before (Optional[str]): Stop at tweets created before this date, format: YYYY-MM-DD, default is None
+            output_format (str): dict|typed, default: dict, same as get_user_tweets. With typed, tweets of the same author share one author object across all pages
+
+        Returns:
+            AsyncIterator[Union[Dict[str, Any], Tweet]]: Tweets without duplicates, each in the same format as the items of get_user_tweets's "tweets"
+        """
+
+        async def fetch_page(cursor: Optional[str]) -> Dict[str, Any]:
+            return await self.get_user_tweets(
+                username=username,
+                limit=100,
+                user_id=user_id,
+                include_replies=include_replies,
+                cursor=cursor,
+                output_format=output_format,
+            )
+
+        async for tweet in self._iter_tweets(fetch_page, max_tweets, stop_before, output_format):
+            yield tweet
+
+    async def _iter_tweets(
+        self,
+        fetch_page: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+        max_tweets: int,
+        stop_before: Optional[str],
+        output_format: str = "dict",
+    ) -> AsyncIterator[Union[Dict[str, Any], Tweet]]:
+        """沿游标逐页产出推文，按 id 去重，达到数量或整页都早于 stop_before 时结束"""
+        # 每页单独解析（且可能来自缓存的副本），typed 模式下跨页再驻留一次作者
+        pool = UserPool(self._format_date) if output_format == "typed" else None
+        seen_ids: Set[str] = set()
+        count = 0
+        async for result in iter_cursor_pages(fetch_page, lambda page: page["data"].get("cursor")):
+            if not result["success"]:
+                logger.warning(f"Stop iterating tweets, page failed: {result['error']}")
+                return
+
+            new_tweets = 0
+            older_tweets = 0
+            for tweet in result["data"]["tweets"]:
+                if pool is not None:
+                    tweet_id, created_at = tweet.id, tweet.created_at
+                else:
+                    tweet_id, created_at = tweet["id"], tweet.get("created_at")
+                if tweet_id in seen_ids:
+                    continue
+                seen_ids.add(tweet_id)
+                new_tweets += 1
+                # created_at 为 YYYY-MM-DD HH:MM:SS，可以直接和日期字符串比较
+                if stop_before and (created_at or "") < stop_before:
+                    older_tweets += 1
+                    continue
+                yield pool.intern_tweet(tweet) if pool is not None else tweet
+                count += 1
+                if count >= max_tweets:
+                    return
+
+            # 没有新推文说明游标在打转，整页都过早说明已经越过时间范围
+            if new_tweets == 0 or (stop_before and older_tweets == new_tweets):
+                return
+
     def _format_date(self, date_str: Optional[str]) -> Optional[str]:
         """Format date string"""
         if not date_str:
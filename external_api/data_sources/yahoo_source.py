@@ -4,15 +4,19 @@ Yahoo Finance data source implementation
 
 import asyncio
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
 from .base import BaseAPI
+from .cache import cached
 
 logger = logging.getLogger("yahoo_finance_source")
 
+# 价格数据的输出格式: 逐行字典 / NumPy 列数组 / pandas DataFrame
+PRICE_OUTPUT_FORMATS = ("records", "numpy", "pandas")
+
 
 class YahooFinanceSource(BaseAPI):
     """Yahoo Finance API data source implementation"""
@@ -24,6 +28,7 @@ class YahooFinanceSource(BaseAPI):
             config: Configuration dictionary containing API settings
         """
         self._timeout = config["timeout"]
+        self._max_concurrency = config.get("fan_out_concurrency", 8)
         self.proxy_url = config["external_api_proxy_url"]
         if proxy_url:
             self.proxy_url = proxy_url
@@ -53,6 +58,7 @@ class YahooFinanceSource(BaseAPI):
             "description": "Yahoo Finance data source, providing stock price and company information query and stock related news query",
         }
 
+    @cached(ttl=300)
     async def get_stock_price(
         self,
         symbol: str,
@@ -60,6 +66,7 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        output_format: str = "records",
     ) -> Dict[str, Any]:
         """Get stock price data. Please set start_date, end_date, interval reasonably to avoid getting too much data,
         which could cause request timeout or performance issues.
@@ -70,6 +77,11 @@ class YahooFinanceSource(BaseAPI):
             end_date: End date in YYYY-MM-DD format
             interval: Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events: Event type, options: capitalGain|div|split|earn|history, default: empty
+            output_format: Shape of "prices", options: records|numpy|pandas, default: records.
+                records is a list of per-bar dicts as shown below; numpy is a dict of column arrays
+                (date as datetime64[s] in the exchange's local time, open/high/low/close as float64 with NaN for missing bars,
+                volume as int64 with 0 for missing bars); pandas is a DataFrame with the same columns.
+                Prefer numpy or pandas for intraday intervals over long ranges
 
         Returns:
             Dict[str, Any]: Dictionary containing stock price data, e.g.
@@ -98,6 +110,9 @@ class YahooFinanceSource(BaseAPI):
                 }
             }
         """
+        if output_format not in PRICE_OUTPUT_FORMATS:
+            return {"success": False, "error": f"Unsupported output_format: {output_format}, options: {'|'.join(PRICE_OUTPUT_FORMATS)}"}
+
         try:
             # Convert date string to timestamp
             start_timestamp = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
@@ -125,11 +140,7 @@ class YahooFinanceSource(BaseAPI):
             request_url = f"{self.proxy_url}/stock/v3/get-chart"
 
             # Send request using aiohttp
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                    response.raise_for_status()
-                    # Parse the response
-                    data = await response.json()
+            data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             # Check if there is an error in API response
             if data.get("chart", {}).get("error"):
@@ -137,19 +148,24 @@ class YahooFinanceSource(BaseAPI):
 
             # Parse response data
             chart_data = data["chart"]["result"][0]
-            timestamps = chart_data["timestamp"]
-            quote = chart_data["indicators"]["quote"][0]
+            timestamps = chart_data.get("timestamp") or []
+            # 两种输出格式都按交易所当地时间确定日期，与运行环境的时区无关
+            gmtoffset = chart_data.get("meta", {}).get("gmtoffset") or 0
+            quote = _align_quote(chart_data["indicators"]["quote"][0], len(timestamps), symbol)
+
+            if output_format != "records":
+                return {"success": True, "data": {"symbol": symbol, "prices": _price_columns(timestamps, quote, output_format, gmtoffset)}}
 
             # Build price data list
             prices = []
             for i, timestamp in enumerate(timestamps):
                 price_data = {
-                    "date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"),
+                    "date": datetime.fromtimestamp(timestamp + gmtoffset, tz=timezone.utc).strftime("%Y-%m-%d"),
                     "open": quote["open"][i],
                     "high": quote["high"][i],
                     "low": quote["low"][i],
                     "close": quote["close"][i],
-                    "volume": int(quote["volume"][i]),
+                    "volume": int(quote["volume"][i] or 0),
                 }
                 prices.append(price_data)
 
@@ -168,6 +184,7 @@ class YahooFinanceSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": f"Unknown error: {str(e)}"}
 
+    @cached(ttl=600)
     async def get_stock_news(self, symbol: str, region: str = "US", snippet_count: int = 10) -> Dict[str, Any]:
         """获取股票相关的新闻数据
         Args:
@@ -204,57 +221,56 @@ class YahooFinanceSource(BaseAPI):
 
             # 发送POST请求
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    # 使用POST请求，并设置空数据体
-                    async with session.post(
-                        request_url,
-                        headers=self.headers,
-                        params=params,
-                        data="",  # load_more 逻辑，先不适配
-                        timeout=self._timeout,
-                    ) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
-                        # 提取并处理新闻数据 - 根据实际响应格式调整
-                        stream_items = []
-                        # 检查响应结构中的main.stream路径
-                        if data.get("data") and data["data"].get("main") and data["data"]["main"].get("stream"):
-                            stream_items = data["data"]["main"]["stream"]
-
-                        # 转换为简化的新闻对象列表
-                        simple_news = []
-                        for stream_item in stream_items:
-                            content = stream_item.get("content", {})
-                            if not content:
-                                continue
-
-                            # 获取链接
-                            link = ""
-                            click_through_url = content.get("clickThroughUrl", {})
-                            if click_through_url and click_through_url.get("url"):
-                                link = click_through_url["url"]
-
-                            # 获取发布者
-                            publisher = ""
-                            if content.get("provider") and content["provider"].get("displayName"):
-                                publisher = content["provider"]["displayName"]
-
-                            # 创建简化的新闻项
-                            news_item = {
-                                "title": content.get("title", ""),
-                                "publisher": publisher,
-                                "publish_date": content.get("pubDate", ""),
-                                "link": link,
-                                "uuid": content.get("id", ""),
-                                "content_type": content.get("contentType", ""),
-                                "thumbnail": self._extract_thumbnail(content.get("thumbnail", {})),
-                                "tickers": self._extract_tickers(content.get("finance", {})),
-                            }
-                            simple_news.append(news_item)
-
-                        # 返回结构化的新闻列表
-                        return {"success": True, "data": {"symbol": symbol, "simple_news": simple_news}}
+                # 使用POST请求，并设置空数据体
+                data = await self._request_json(
+                    "POST",
+                    request_url,
+                    headers=self.headers,
+                    params=params,
+                    data="",  # load_more 逻辑，先不适配
+                    timeout=self._timeout,
+                    idempotent=True,  # 只读查询，可以重试
+                )
+
+                # 提取并处理新闻数据 - 根据实际响应格式调整
+                stream_items = []
+                # 检查响应结构中的main.stream路径
+                if data.get("data") and data["data"].get("main") and data["data"]["main"].get("stream"):
+                    stream_items = data["data"]["main"]["stream"]
+
+                # 转换为简化的新闻对象列表
+                simple_news = []
+                for stream_item in stream_items:
+                    content = stream_item.get("content", {})
+                    if not content:
+                        continue
+
+                    # 获取链接
+                    link = ""
+                    click_through_url = content.get("clickThroughUrl", {})
+                    if click_through_url and click_through_url.get("url"):
+                        link = click_through_url["url"]
+
+                    # 获取发布者
+                    publisher = ""
+                    if content.get("provider") and content["provider"].get("displayName"):
+                        publisher = content["provider"]["displayName"]
+
+                    # 创建简化的新闻项
+                    news_item = {
+                        "title": content.get("title", ""),
+                        "publisher": publisher,
+                        "publish_date": content.get("pubDate", ""),
+                        "link": link,
+                        "uuid": content.get("id", ""),
+                        "content_type": content.get("contentType", ""),
+                        "thumbnail": self._extract_thumbnail(content.get("thumbnail", {})),
+                        "tickers": self._extract_tickers(content.get("finance", {})),
+                    }
+                    simple_news.append(news_item)
+
+                # 返回结构化的新闻列表
+                return {"success": True, "data": {"symbol": symbol, "simple_news": simple_news}}
 
             except asyncio.TimeoutError:
                 error_msg = f"请求超时 (timeout={self._timeout}秒)"
@@ -315,6 +331,7 @@ class YahooFinanceSource(BaseAPI):
                     tickers.append(ticker_data["symbol"])
         return tickers
 
+    @cached(ttl=3600)
     async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Get basic stock information
 
@@ -356,10 +373,7 @@ class YahooFinanceSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -416,8 +430,11 @@ class YahooFinanceSource(BaseAPI):
         end_date: str,
         interval: str = "1d",
         events: str = "",
+        max_concurrency: Optional[int] = None,
+        symbol_timeout: Optional[float] = None,
+        output_format: str = "records",
     ) -> Dict[str, Any]:
-        """Get price data for multiple stocks
+        """Get price data for multiple stocks, requesting them concurrently
 
         Args:
             symbols(List[str]): Stock code list
@@ -425,9 +442,12 @@ class YahooFinanceSource(BaseAPI):
             end_date(str): End date in YYYY-MM-DD format
             interval(str): Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
             events(str): Event type, options: capitalGain|div|split|earn|history, default: empty
+            max_concurrency(Optional[int]): Maximum number of stocks requested at the same time, default: 8
+            symbol_timeout(Optional[float]): Timeout in seconds for each stock, a timed out stock is reported in failed_symbols
+            output_format(str): Shape of each stock's "prices", options: records|numpy|pandas, default: records, same as get_stock_price
 
         Returns:
-            Dict[str, Any]: Dictionary containing stock price data, e.g.
+            Dict[str, Any]: Dictionary containing stock price data, stocks keep the order of symbols, e.g.
             {
                 "success": true,               # Whether successful
                 "data": {                      # If successful, contains following fields
@@ -466,24 +486,20 @@ class YahooFinanceSource(BaseAPI):
         """
 
         try:
+            results: Dict[int, Dict[str, Any]] = {}
+            async for index, result in self._iter_stocks_price(
+                symbols, start_date, end_date, interval, events, max_concurrency, symbol_timeout, output_format
+            ):
+                results[index] = result
+
             stocks_data = []
             failed_symbols = []
-
-            # Iterate over stock code list to get data for each stock
-            for symbol in symbols:
-                try:
-                    result = await self.get_stock_price(
-                        symbol=symbol, start_date=start_date, end_date=end_date, interval=interval, events=events
-                    )
-                    if result["success"]:
-                        stocks_data.append(result["data"])
-                    else:
-                        failed_symbols.append((symbol, result["error"]))
-                        logger.warning(f"Failed to get data for stock {symbol}: {result['error']}")
-                except Exception as e:
-                    failed_symbols.append((symbol, str(e)))
-                    logger.error(f"Error occurred while getting data for stock {symbol}: {str(e)}")
-                    logger.exception(e)
+            for index, symbol in enumerate(symbols):
+                result = results[index]
+                if result["success"]:
+                    stocks_data.append(result["data"])
+                else:
+                    failed_symbols.append((symbol, result["error"]))
 
             # If all stocks fail to get data
             if len(failed_symbols) == len(symbols):
@@ -505,6 +521,97 @@ class YahooFinanceSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": str(e)}
 
+    async def iter_multiple_stocks_price(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        interval: str = "1d",
+        events: str = "",
+        max_concurrency: Optional[int] = None,
+        symbol_timeout: Optional[float] = None,
+        output_format: str = "records",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream price data for multiple stocks, yielding each stock as soon as its data arrives.
+        Use it with `async for result in yahoo_finance.iter_multiple_stocks_price(...)`.
+
+        Args:
+            symbols(List[str]): Stock code list
+            start_date(str): Start date in YYYY-MM-DD format
+            end_date(str): End date in YYYY-MM-DD format
+            interval(str): Time interval, options: 1m|2m|5m|15m|30m|60m|1d|1wk|1mo, default: 1d
+            events(str): Event type, options: capitalGain|div|split|earn|history, default: empty
+            max_concurrency(Optional[int]): Maximum number of stocks requested at the same time, default: 8
+            symbol_timeout(Optional[float]): Timeout in seconds for each stock
+            output_format(str): Shape of each stock's "prices", options: records|numpy|pandas, default: records, same as get_stock_price
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: One result per stock in completion order, e.g.
+            {
+                "symbol": "AAPL",              # Stock code
+                "success": true,               # Whether successful
+                "data": {                      # If successful, same as data of get_stock_price
+                    "symbol": "AAPL",
+                    "prices": [...]
+                },
+                "error": "..."                 # If failed, error message
+            }
+        """
+        async for index, result in self._iter_stocks_price(
+            symbols, start_date, end_date, interval, events, max_concurrency, symbol_timeout, output_format
+        ):
+            yield {"symbol": symbols[index], **result}
+
+    async def _iter_stocks_price(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        interval: str,
+        events: str,
+        max_concurrency: Optional[int],
+        symbol_timeout: Optional[float],
+        output_format: str = "records",
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """并发获取多只股票的价格，按完成顺序产出 (下标, 结果)，提前退出时取消未完成的请求"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self._max_concurrency))
+        timeout = symbol_timeout or self._timeout
+
+        async def fetch(index: int, symbol: str) -> Tuple[int, Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(
+                        self.get_stock_price(
+                            symbol=symbol,
+                            start_date=start_date,
+                            end_date=end_date,
+                            interval=interval,
+                            events=events,
+                            output_format=output_format,
+                        ),
+                        timeout,
+                    )
+                    if not result["success"]:
+                        logger.warning(f"Failed to get data for stock {symbol}: {result['error']}")
+                except asyncio.TimeoutError:
+                    error_msg = f"Request timeout (timeout={timeout}s)"
+                    logger.warning(f"Failed to get data for stock {symbol}: {error_msg}")
+                    result = {"success": False, "error": error_msg}
+                except Exception as e:
+                    logger.error(f"Error occurred while getting data for stock {symbol}: {str(e)}")
+                    logger.exception(e)
+                    result = {"success": False, "error": str(e)}
+                return index, result
+
+        tasks = [asyncio.ensure_future(fetch(index, symbol)) for index, symbol in enumerate(symbols)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @cached(ttl=3600)
     async def get_stock_insights(self, symbol: str) -> Dict[str, Any]:
         """Get stock insight data, including technical analysis, valuation, and company snapshot
 
@@ -568,16 +675,12 @@ class YahooFinanceSource(BaseAPI):
             params = {"symbol": symbol}
 
             # Send request
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                try:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-                except asyncio.TimeoutError:
-                    return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
-                except aiohttp.ClientError as e:
-                    return {"success": False, "error": f"HTTP request error: {str(e)}"}
+            try:
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
+            except asyncio.TimeoutError:
+                return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
+            except aiohttp.ClientError as e:
+                return {"success": False, "error": f"HTTP request error: {str(e)}"}
 
             # Check if there is an error in API response
             if data.get("finance", {}).get("error"):
@@ -634,6 +737,7 @@ class YahooFinanceSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=3600)
     async def get_stock_statistics(self, symbol: str, region: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
         """Get stock statistics data, including valuation metrics, financial ratios, and shareholder information
 
@@ -709,16 +813,12 @@ class YahooFinanceSource(BaseAPI):
                 params["lang"] = lang
 
             # Send request
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                try:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        # Check response status
-                        response.raise_for_status()
-                        data = await response.json()
-                except asyncio.TimeoutError:
-                    return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
-                except aiohttp.ClientError as e:
-                    return {"success": False, "error": f"HTTP request error: {str(e)}"}
+            try:
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
+            except asyncio.TimeoutError:
+                return {"success": False, "error": f"Request timeout (timeout={self._timeout}s)"}
+            except aiohttp.ClientError as e:
+                return {"success": False, "error": f"HTTP request error: {str(e)}"}
 
             # Check if there is an error in API response
             if data.get("quoteSummary", {}).get("error"):
@@ -772,6 +872,7 @@ class YahooFinanceSource(BaseAPI):
             logger.exception(e)
             return {"success": False, "error": str(e)}
 
+    @cached(ttl=86400)
     async def get_financial_data(self, symbol: str) -> Dict[str, Any]:
         """Get stock financial data
 
@@ -852,10 +953,7 @@ class YahooFinanceSource(BaseAPI):
 
             # Send request
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(request_url, headers=self.headers, params=params, timeout=self._timeout) as response:
-                        response.raise_for_status()
-                        data = await response.json()
+                data = await self._request_json("GET", request_url, headers=self.headers, params=params, timeout=self._timeout)
 
             except asyncio.TimeoutError:
                 error_msg = f"Request timeout (timeout={self._timeout}s)"
@@ -928,3 +1026,57 @@ class YahooFinanceSource(BaseAPI):
             logger.error(error_msg)
             logger.exception(e)
             return {"success": False, "error": error_msg}
+
+
+QUOTE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _align_quote(quote: Dict[str, Any], length: int, symbol: str) -> Dict[str, List[Optional[float]]]:
+    """
+    把 indicators.quote 的各字段对齐到 timestamp 的长度，缺少的字段或元素补 null，多余的元素截断
+
+    Args:
+        quote: indicators.quote[0]
+        length: timestamp 数组的长度
+        symbol: 股票代码，用于日志
+
+    Returns:
+        Dict[str, List[Optional[float]]]: 各字段都与 timestamp 等长的 quote
+    """
+    aligned = {}
+    for field in QUOTE_FIELDS:
+        values = quote.get(field) or []
+        if len(values) != length:
+            logger.warning(f"{symbol} quote.{field} has {len(values)} values for {length} timestamps")
+            values = list(values[:length]) + [None] * (length - len(values))
+        aligned[field] = values
+    return aligned
+
+
+def _price_columns(timestamps: List[int], quote: Dict[str, List[Optional[float]]], output_format: str, gmtoffset: int = 0) -> Any:
+    """
+    直接由 timestamp 和 indicators.quote 数组构建列式价格数据，避免逐行创建字典
+
+    Args:
+        timestamps: K 线时间戳（秒）
+        quote: 经 _align_quote 对齐的 indicators.quote[0]，缺失的 K 线为 null
+        output_format: numpy 或 pandas
+        gmtoffset: 交易所相对 UTC 的偏移（秒），date 列为交易所当地时间，与 records 格式的日期一致
+
+    Returns:
+        Any: numpy 时为 {列名: ndarray}，pandas 时为 DataFrame
+    """
+    import numpy as np
+
+    columns = {"date": (np.asarray(timestamps, dtype=np.int64) + gmtoffset).astype("datetime64[s]")}
+    for field in ("open", "high", "low", "close"):
+        # None 转换为 NaN
+        columns[field] = np.asarray(quote[field], dtype=np.float64)
+    volume = np.asarray(quote["volume"], dtype=np.float64)
+    columns["volume"] = np.nan_to_num(volume, nan=0).astype(np.int64)
+
+    if output_format == "pandas":
+        import pandas as pd
+
+        return pd.DataFrame(columns)
+    return columns
@@ -2,17 +2,39 @@ import asyncio
 import json
 import os
 import uuid
-from typing import Any, Dict, List, Optional, cast
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, cast
 
 import aiohttp
 from pydantic import BaseModel
 
+from external_api.data_sources.session import SessionManager
+
 ENV_AGENT_NAME = "AGENT_NAME"
 ENV_FUNC_SERVER_PORT = "FUNC_SERVER_PORT"
+ENV_FUNC_SERVER_SOCKET = "FUNC_SERVER_SOCKET"
+ENV_FUNC_BATCH_WINDOW_MS = "FUNC_BATCH_WINDOW_MS"
 MCP_FUNCTION_LIST_JSON_FILE = "mcp_function_list.json"
 
 SERVER_PORT = 12306
 PROXY_TIMEOUT = 3600
+# 同一时刻到函数服务的最大连接数
+PROXY_POOL_LIMIT = 64
+# 单次批量请求最多合并的调用数
+BATCH_MAX_SIZE = 64
+
+# 所有 FunctionProxy 共享的会话管理器，按 unix socket 路径区分（None 表示走 TCP）
+_session_managers: Dict[Optional[str], SessionManager] = {}
+
+
+def get_function_session_manager(unix_socket: Optional[str] = None) -> SessionManager:
+    """获取访问函数服务的共享会话管理器，进程退出时统一关闭"""
+    manager = _session_managers.get(unix_socket)
+    if manager is None:
+        manager = _session_managers.setdefault(
+            unix_socket, SessionManager(limit=PROXY_POOL_LIMIT, limit_per_host=PROXY_POOL_LIMIT, unix_socket=unix_socket)
+        )
+    return manager
 
 
 class ToolResult(BaseModel):
@@ -31,7 +53,11 @@ class FunctionProxy:
         self.params_len = len(self.params)
         self.agent_name: str = os.environ.get(ENV_AGENT_NAME, "")
         self.server_port = SERVER_PORT
+        # 函数服务监听了 unix socket 时优先使用，省去本地 TCP 开销
+        self.server_socket: Optional[str] = os.environ.get(ENV_FUNC_SERVER_SOCKET) or None
         self.timeout: int = PROXY_TIMEOUT
+        # 大于 0 时，窗口期内的并发调用会合并为一次批量请求（秒）
+        self.batch_window: float = float(os.environ.get(ENV_FUNC_BATCH_WINDOW_MS) or 0) / 1000
 
     def get_server_url(self):
         if self.server_port == 0:
@@ -39,6 +65,18 @@ class FunctionProxy:
         return f"http://localhost:{self.server_port}"
 
     async def __call__(self, *args, **kwargs) -> ToolResult:
+        request = self._build_request(args, kwargs)
+
+        # 发出请求前的拦截
+        tool_result = self._intercept_request(self.name, request)
+        if tool_result is not None:
+            return tool_result
+
+        if self.batch_window > 0:
+            return await _get_batcher(self).submit(self, request)
+        return await self._execute(request)
+
+    def _build_request(self, args: Sequence[Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
         call_params = kwargs.copy()
         args_len = len(args)
 
@@ -50,7 +88,7 @@ class FunctionProxy:
                 if i < self.params_len:
                     call_params[self.params[i]["name"]] = args[i]
 
-        request = {
+        return {
             "request_id": str(uuid.uuid4()),
             "function_name": self.origin_name or self.name,
             "function_kind": self.kind,
@@ -58,32 +96,43 @@ class FunctionProxy:
             "parameters": call_params,
         }
 
-        # 发出请求前的拦截
-        tool_result = self._intercept_request(self.name, request)
-        if tool_result is not None:
-            return tool_result
-
+    async def _execute(self, request: Dict[str, Any]) -> ToolResult:
         timeout = aiohttp.ClientTimeout(total=self.timeout)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            try:
-                async with session.post(f"{self.get_server_url()}/execute", json=request) as response:
-                    if response.status != 200:
-                        return ToolResult(is_error=True, message=f"Function call failed: {await response.text()}")
-
-                    result = await response.json()
-                    if result.get("is_error", False):
-                        return ToolResult(is_error=True, message=result.get("message", "Unknown error"))
-
-                    tool_result = ToolResult(is_error=False, message=result.get("message", "succeed"))
-                    return self._intercept_response(self.name, request, tool_result)
-            except asyncio.TimeoutError:
-                error_msg = f"Timeout when calling function {self.name}"
-                return ToolResult(is_error=True, message=error_msg)
-            except Exception as e:
-                import traceback
-
-                error_msg = f"Error: {str(e)}\nTraceback:\n{traceback.format_exc()}"
-                return ToolResult(is_error=True, message=error_msg)
+        try:
+            session = self._get_session()
+            async with session.post(f"{self.get_server_url()}/execute", json=request, timeout=timeout) as response:
+                if response.status != 200:
+                    return ToolResult(is_error=True, message=f"Function call failed: {await response.text()}")
+
+                result = await response.json()
+                return self._to_tool_result(request, result)
+        except Exception as e:
+            return self._error_result(e)
+
+    def _to_tool_result(self, request: Dict[str, Any], result: Dict[str, Any]) -> ToolResult:
+        if result.get("is_error", False):
+            return ToolResult(is_error=True, message=result.get("message", "Unknown error"))
+
+        tool_result = ToolResult(is_error=False, message=result.get("message", "succeed"))
+        return self._intercept_response(self.name, request, tool_result)
+
+    def _error_result(self, e: Exception) -> ToolResult:
+        if isinstance(e, asyncio.TimeoutError):
+            error_msg = f"Timeout when calling function {self.name}"
+            return ToolResult(is_error=True, message=error_msg)
+
+        import traceback
+
+        error_msg = f"Error: {str(e)}\nTraceback:\n{traceback.format_exc()}"
+        return ToolResult(is_error=True, message=error_msg)
+
+    def _get_socket_path(self) -> Optional[str]:
+        if self.server_socket and os.path.exists(self.server_socket):
+            return self.server_socket
+        return None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        return get_function_session_manager(self._get_socket_path()).get_session()
 
     def _intercept_request(self, function_name: str, request: Dict[str, Any]) -> Optional[ToolResult]:
         if self.kind == "agent" and self.agent_name and "planner" not in self.agent_name:
@@ -108,3 +157,136 @@ def load_function_proxys(file_path: str) -> tuple[List[Dict[str, Any]], Dict[str
             proxies[function_info["name"]] = FunctionProxy(function_info)
 
     return function_list, proxies
+
+
+# 不支持批量接口的函数服务，键为 (服务地址, unix socket 路径)
+_batch_unsupported: Set[Tuple[str, Optional[str]]] = set()
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str], float], _CallBatcher]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class _CallBatcher:
+    """在时间窗口内收集并发的函数调用，合并为一次批量请求"""
+
+    def __init__(self, window: float, max_size: int = BATCH_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._pending: List[Tuple[FunctionProxy, Dict[str, Any], asyncio.Future]] = []
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, proxy: FunctionProxy, request: Dict[str, Any]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((proxy, request, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._handle is None:
+            self._handle = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        task = asyncio.ensure_future(self._send(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, pending: List[Tuple[FunctionProxy, Dict[str, Any], asyncio.Future]]):
+        try:
+            results = await _post_batch([(proxy, request) for proxy, request, _ in pending])
+        except Exception as e:
+            # 任何异常都不能让等待中的调用方一直挂起
+            results = [proxy._error_result(e) for proxy, _, _ in pending]
+        for (_, _, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _get_batcher(proxy: FunctionProxy) -> _CallBatcher:
+    loop = asyncio.get_running_loop()
+    batchers = _batchers.setdefault(loop, {})
+    key = (proxy.get_server_url(), proxy._get_socket_path(), proxy.batch_window)
+    batcher = batchers.get(key)
+    if batcher is None:
+        batcher = batchers[key] = _CallBatcher(proxy.batch_window)
+    return batcher
+
+
+async def _post_batch(calls: List[Tuple[FunctionProxy, Dict[str, Any]]]) -> List[ToolResult]:
+    """
+    把同一函数服务上的多个调用合并成一次 /execute_batch 请求，并按 request_id 拆分结果
+
+    函数服务不支持批量接口时退回并发的单次调用
+    """
+    proxy = calls[0][0]
+    server_key = (proxy.get_server_url(), proxy._get_socket_path())
+    if len(calls) == 1 or server_key in _batch_unsupported:
+        return list(await asyncio.gather(*[p._execute(request) for p, request in calls]))
+
+    timeout = aiohttp.ClientTimeout(total=max(p.timeout for p, _ in calls))
+    try:
+        session = proxy._get_session()
+        payload = {"requests": [request for _, request in calls]}
+        async with session.post(f"{proxy.get_server_url()}/execute_batch", json=payload, timeout=timeout) as response:
+            if response.status in (404, 405):
+                body = None
+            elif response.status != 200:
+                error_msg = f"Function call failed: {await response.text()}"
+                return [ToolResult(is_error=True, message=error_msg) for _ in calls]
+            else:
+                body = await response.json()
+    except Exception as e:
+        return [p._error_result(e) for p, _ in calls]
+
+    if body is None:
+        # 该函数服务没有批量接口，之后对它都直接走单次调用
+        _batch_unsupported.add(server_key)
+        return list(await asyncio.gather(*[p._execute(request) for p, request in calls]))
+
+    if not isinstance(body, dict) or not isinstance(body.get("results"), list):
+        error_msg = f"Invalid batch response: {str(body)[:200]}"
+        return [ToolResult(is_error=True, message=error_msg) for _ in calls]
+
+    results = {item.get("request_id"): item for item in body["results"] if isinstance(item, dict)}
+    tool_results = []
+    for p, request in calls:
+        result = results.get(request["request_id"])
+        if result is None:
+            tool_results.append(ToolResult(is_error=True, message=f"No result returned for function {p.name}"))
+        else:
+            tool_results.append(p._to_tool_result(request, result))
+    return tool_results
+
+
+async def execute_many(calls: Sequence[Tuple[FunctionProxy, Sequence[Any], Dict[str, Any]]]) -> List[ToolResult]:
+    """
+    在一次往返中执行多个函数调用
+
+    Args:
+        calls: (proxy, args, kwargs) 列表，参数含义与直接调用 proxy(*args, **kwargs) 相同
+
+    Returns:
+        List[ToolResult]: 与 calls 顺序一致的调用结果
+    """
+    results: List[Optional[ToolResult]] = [None] * len(calls)
+    groups: Dict[Tuple[str, Optional[str]], List[Tuple[int, FunctionProxy, Dict[str, Any]]]] = {}
+    for i, (proxy, args, kwargs) in enumerate(calls):
+        request = proxy._build_request(args, kwargs)
+        tool_result = proxy._intercept_request(proxy.name, request)
+        if tool_result is not None:
+            results[i] = tool_result
+            continue
+        key = (proxy.get_server_url(), proxy._get_socket_path())
+        groups.setdefault(key, []).append((i, proxy, request))
+
+    batches = [[(proxy, request) for _, proxy, request in group] for group in groups.values()]
+    for group, batch_results in zip(groups.values(), await asyncio.gather(*[_post_batch(batch) for batch in batches])):
+        for (i, _, _), result in zip(group, batch_results):
+            results[i] = result
+    return cast(List[ToolResult], results)
@@ -0,0 +1,173 @@
+"""
+响应缓存的测试
+"""
+
+import asyncio
+from typing import Any, Dict, List
+
+from external_api.data_sources.base import BaseAPI
+from external_api.data_sources.cache import ResponseCache, cache_max_age, cached
+
+
+class CountingSource(BaseAPI):
+    """每次真正执行都计数的数据源"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.calls = 0
+
+    @property
+    def source_name(self) -> str:
+        return "counting"
+
+    def get_api_info(self) -> Dict[str, Any]:
+        return {"name": self.source_name, "description": "test"}
+
+    @cached(ttl=60)
+    async def get_items(self, key: str, fail: bool = False) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if fail:
+            return {"success": False, "error": "boom"}
+        return {"success": True, "data": {"key": key, "items": [1, 2]}}
+
+
+def _source(**cache_kwargs) -> CountingSource:
+    source = CountingSource()
+    source.bind_response_cache(ResponseCache(**cache_kwargs))
+    return source
+
+
+def test_hit_and_equivalent_arguments_share_one_call():
+    source = _source()
+
+    async def main():
+        first = await source.get_items("a")
+        second = await source.get_items(key="a", fail=False)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second
+    assert source.calls == 1
+    assert source._response_cache.stats()["hits"] == 1
+
+
+def test_concurrent_calls_are_coalesced():
+    source = _source()
+
+    async def main():
+        return await asyncio.gather(*[source.get_items("a") for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert source.calls == 1
+    assert all(result == results[0] for result in results)
+    assert source._response_cache.stats()["coalesced"] == 4
+
+
+def test_failures_are_not_cached():
+    source = _source()
+
+    async def main():
+        await source.get_items("a", fail=True)
+        await source.get_items("a", fail=True)
+
+    asyncio.run(main())
+    assert source.calls == 2
+
+
+def test_callers_can_modify_result_and_data_without_touching_cache():
+    source = _source()
+
+    async def main():
+        first = await source.get_items("a")
+        first["success"] = False
+        first["data"]["key"] = "changed"
+        return await source.get_items("a")
+
+    second = asyncio.run(main())
+    assert second == {"success": True, "data": {"key": "a", "items": [1, 2]}}
+
+
+def test_ttl_override_and_lru_bound():
+    source = _source(max_entries=1, ttls={"counting.get_items": 0})
+
+    async def main():
+        await source.get_items("a")
+        await source.get_items("a")
+
+    asyncio.run(main())
+    assert source.calls == 2
+
+    source = _source(max_entries=1)
+
+    async def evict():
+        await source.get_items("a")
+        await source.get_items("b")
+        await source.get_items("a")
+
+    asyncio.run(evict())
+    assert source.calls == 3
+    assert source._response_cache.stats()["evictions"] == 2
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = _source(path=path), _source(path=path)
+
+    async def main():
+        await first.get_items("a")
+        return await second.get_items("a")
+
+    result = asyncio.run(main())
+    assert result["data"]["key"] == "a"
+    assert second.calls == 0
+    assert second._response_cache.stats()["disk_hits"] == 1
+
+
+def test_load_is_cancelled_only_when_every_waiter_is_cancelled():
+    cache = ResponseCache()
+    outcomes: List[str] = []
+
+    async def loader():
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            outcomes.append("cancelled")
+            raise
+        outcomes.append("finished")
+        return {"success": True, "data": {}}
+
+    async def main():
+        first = asyncio.ensure_future(cache.get_or_load("a", 60, loader))
+        second = asyncio.ensure_future(cache.get_or_load("a", 60, loader))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await second
+
+        lone = asyncio.ensure_future(cache.get_or_load("b", 60, loader))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0.01)
+        # 取消后的调用重新加载
+        return await cache.get_or_load("b", 60, loader)
+
+    assert asyncio.run(main()) == {"success": True, "data": {}}
+    assert outcomes == ["finished", "cancelled", "finished"]
+
+
+def test_max_age_rejects_older_entries_without_evicting_them():
+    source = _source()
+
+    async def main():
+        await source.get_items("a")
+        await asyncio.sleep(0.05)
+        token = cache_max_age.set(0.02)
+        try:
+            fresh = await source.get_items("a")
+        finally:
+            cache_max_age.reset(token)
+        await source.get_items("a")
+        return fresh
+
+    assert asyncio.run(main())["data"]["key"] == "a"
+    assert source.calls == 2
+    assert source._response_cache.stats()["hits"] == 1
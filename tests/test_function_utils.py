@@ -0,0 +1,120 @@
+"""
+FunctionProxy 批量调用的测试，使用本地的替身函数服务
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from external_api.function_utils import FunctionProxy, execute_many
+
+FUNCTION_INFO = {"name": "echo", "parameters": [{"name": "text"}]}
+
+
+class StandInServer:
+    """替身函数服务，记录收到的请求，batch_response 不为 None 时 /execute_batch 固定返回它"""
+
+    def __init__(self, batch_status: int = 200, batch_response: Optional[Any] = None):
+        self.batch_status = batch_status
+        self.batch_response = batch_response
+        self.calls: List[str] = []
+
+    async def execute(self, request: web.Request) -> web.Response:
+        self.calls.append("execute")
+        body = await request.json()
+        return web.json_response(_echo(body))
+
+    async def execute_batch(self, request: web.Request) -> web.Response:
+        self.calls.append("execute_batch")
+        if self.batch_status != 200:
+            return web.Response(status=self.batch_status)
+        if self.batch_response is not None:
+            return web.json_response(self.batch_response)
+        body = await request.json()
+        # 打乱顺序，结果应按 request_id 对应
+        return web.json_response({"results": [_echo(item) for item in reversed(body["requests"])]})
+
+    @asynccontextmanager
+    async def run(self):
+        app = web.Application()
+        app.router.add_post("/execute", self.execute)
+        app.router.add_post("/execute_batch", self.execute_batch)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        try:
+            yield site._server.sockets[0].getsockname()[1]
+        finally:
+            await runner.cleanup()
+
+
+def _echo(request: Dict[str, Any]) -> Dict[str, Any]:
+    return {"request_id": request["request_id"], "is_error": False, "message": request["parameters"]["text"]}
+
+
+def _proxy(port: int, batch_window: float = 0) -> FunctionProxy:
+    proxy = FunctionProxy(FUNCTION_INFO)
+    proxy.server_port = port
+    proxy.server_socket = None
+    proxy.batch_window = batch_window
+    return proxy
+
+
+def test_execute_many_uses_one_batch_request():
+    server = StandInServer()
+
+    async def main():
+        async with server.run() as port:
+            proxy = _proxy(port)
+            return await execute_many([(proxy, (f"t{i}",), {}) for i in range(5)])
+
+    results = asyncio.run(main())
+    assert [result.message for result in results] == [f"t{i}" for i in range(5)]
+    assert not any(result.is_error for result in results)
+    assert server.calls == ["execute_batch"]
+
+
+def test_batch_window_coalesces_concurrent_calls():
+    server = StandInServer()
+
+    async def main():
+        async with server.run() as port:
+            proxy = _proxy(port, batch_window=0.02)
+            return await asyncio.gather(*[proxy(f"t{i}") for i in range(4)])
+
+    results = asyncio.run(main())
+    assert [result.message for result in results] == ["t0", "t1", "t2", "t3"]
+    assert server.calls == ["execute_batch"]
+
+
+def test_invalid_batch_body_resolves_every_caller():
+    server = StandInServer(batch_response=["not", "a", "dict"])
+
+    async def main():
+        async with server.run() as port:
+            proxy = _proxy(port, batch_window=0.02)
+            return await asyncio.wait_for(asyncio.gather(*[proxy(f"t{i}") for i in range(3)]), timeout=5)
+
+    results = asyncio.run(main())
+    assert all(result.is_error for result in results)
+
+
+def test_batch_fallback_is_per_server():
+    without_batch = StandInServer(batch_status=404)
+    with_batch = StandInServer()
+
+    async def main():
+        async with without_batch.run() as port_a, with_batch.run() as port_b:
+            first = await execute_many([(_proxy(port_a), ("a",), {}), (_proxy(port_a), ("b",), {})])
+            second = await execute_many([(_proxy(port_a), ("c",), {}), (_proxy(port_a), ("d",), {})])
+            third = await execute_many([(_proxy(port_b), ("e",), {}), (_proxy(port_b), ("f",), {})])
+            return first + second + third
+
+    results = asyncio.run(main())
+    assert [result.message for result in results] == ["a", "b", "c", "d", "e", "f"]
+    # 404 之后只对该服务退回单次调用，另一个服务仍走批量接口
+    assert without_batch.calls == ["execute_batch", "execute", "execute", "execute", "execute"]
+    assert with_batch.calls == ["execute_batch"]
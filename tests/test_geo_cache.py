@@ -0,0 +1,90 @@
+"""
+按地理位置复用查询结果的测试
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from external_api.data_sources.geo_cache import SpatialCache, destination_point, distance_meters, initial_bearing
+from external_api.data_sources.tripadvisor_source import TripAdvisorSource
+
+CENTER = (22.08, 113.49)
+
+
+def _around(bearings_and_distances) -> List[tuple]:
+    items = []
+    for index, (bearing, distance) in enumerate(bearings_and_distances):
+        latitude, longitude = destination_point(*CENTER, bearing, distance)
+        items.append((latitude, longitude, {"name": f"p{index}", "distance": distance}))
+    return items
+
+
+def test_destination_point_round_trip():
+    latitude, longitude = destination_point(*CENTER, 135.0, 1000.0)
+    assert distance_meters(*CENTER, latitude, longitude) == pytest.approx(1000.0, rel=1e-6)
+    assert initial_bearing(*CENTER, latitude, longitude) == pytest.approx(135.0, abs=0.01)
+
+
+def test_hit_recomputes_distances_and_keeps_only_covered_items():
+    cache = SpatialCache(reuse_radius=100)
+    # 覆盖半径为 1000 米
+    cache.put("ns", *CENTER, _around([(0, 300), (180, 350), (0, 1000), (180, 980)]))
+
+    # 向北移动 60 米，距新中心点 1000 - 60 米以内的结果一定完整
+    shifted = destination_point(*CENTER, 0, 60)
+    nearby = cache.get("ns", *shifted)
+    assert [item["name"] for *_, item in nearby] == ["p0", "p1", "p2"]
+    assert [distance for distance, *_ in nearby] == pytest.approx([240, 410, 940], abs=0.5)
+    # 南边 980 米处的结果距新中心点 1040 米，超出范围
+
+
+def test_far_query_misses_and_results_are_copies():
+    cache = SpatialCache(reuse_radius=100)
+    cache.put("ns", *CENTER, _around([(90, 500)]))
+    assert cache.get("ns", *destination_point(*CENTER, 0, 150)) is None
+    assert cache.get("other", *CENTER) is None
+
+    nearby = cache.get("ns", *CENTER)
+    nearby[0][3]["name"] = "changed"
+    assert cache.get("ns", *CENTER)[0][3]["name"] == "p0"
+    assert cache.stats()["hits"] == 2
+
+
+class StubTripAdvisorSource(TripAdvisorSource):
+    def __init__(self, locations: List[Dict[str, Any]]):
+        super().__init__({"timeout": 30, "external_api_proxy_url": "http://proxy", "tripadvisor_base_url": "ta.example"})
+        self.locations = locations
+        self.requests: List[Optional[Dict[str, Any]]] = []
+
+    async def _make_api_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.requests.append(params)
+        return {"data": [dict(location) for location in self.locations]}
+
+
+def test_search_nearby_locations_reuses_results_from_the_new_center():
+    mile = 1609.344
+    source = StubTripAdvisorSource(
+        [
+            {"location_id": "1", "name": "north", "distance": str(400 / mile), "bearing": "north"},
+            {"location_id": "2", "name": "south", "distance": str(300 / mile), "bearing": "south"},
+            {"location_id": "3", "name": "edge", "distance": str(2000 / mile), "bearing": "east"},
+        ]
+    )
+
+    async def main():
+        first = await source.search_nearby_locations(*CENTER)
+        second = await source.search_nearby_locations(*destination_point(*CENTER, 0, 80))
+        second["data"][0]["name"] = "changed"
+        third = await source.search_nearby_locations(*destination_point(*CENTER, 0, 80))
+        return first, second, third
+
+    first, second, third = asyncio.run(main())
+    assert len(source.requests) == 1
+    assert [location["name"] for location in first["data"]] == ["north", "south", "edge"]
+    # 东边 2000 米处的结果距新中心点超过 2000 - 80 米，不一定完整，不返回
+    assert [location["name"] for location in third["data"]] == ["north", "south"]
+    assert float(third["data"][0]["distance"]) * mile == pytest.approx(320, abs=1)
+    assert float(third["data"][1]["distance"]) * mile == pytest.approx(380, abs=1)
+    assert [location["bearing"] for location in third["data"]] == ["north", "south"]
@@ -0,0 +1,78 @@
+"""
+分页搜索与逐页迭代的测试，上游请求由替身代替
+"""
+
+import asyncio
+from contextlib import aclosing
+from typing import Any, Dict, List, Set
+
+from external_api.data_sources.cache import ResponseCache
+from external_api.data_sources.scholar_source import ScholarSource
+
+CONFIG = {"timeout": 30, "external_api_proxy_url": "http://proxy", "serper_base_url": "serper.example"}
+
+
+class StubScholarSource(ScholarSource):
+    """每页返回 page_size 篇论文，failing_pages 中的页抛出异常，第一页之后的页耗时 delay；记录开始、完成和被取消的页"""
+
+    def __init__(self, failing_pages: Set[int] = frozenset(), delay: float = 0.01):
+        super().__init__(CONFIG)
+        self.failing_pages = failing_pages
+        self.delay = delay
+        self.started: List[int] = []
+        self.finished: List[int] = []
+        self.cancelled: List[int] = []
+        self.bind_response_cache(ResponseCache())
+
+    async def _request_json(self, method: str, url: str, **kwargs) -> Any:
+        page = kwargs["json"]["page"]
+        self.started.append(page)
+        try:
+            await asyncio.sleep(self.delay if page > 1 else 0.01)
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        self.finished.append(page)
+        if page in self.failing_pages:
+            raise RuntimeError(f"page {page} unavailable")
+        return {"organic": [{"title": f"p{page}-{i}"} for i in range(kwargs["json"]["num"])]}
+
+
+def test_iter_scholar_yields_in_order_and_reports_failed_pages():
+    source = StubScholarSource(failing_pages={2})
+
+    async def main():
+        return [item async for item in source.iter_scholar("q", num_results=60)]
+
+    items = asyncio.run(main())
+    assert [item["title"] for item in items[:20]] == [f"p1-{i}" for i in range(20)]
+    assert items[20] == {"success": False, "error": "page 2 unavailable", "page": 2}
+    assert [item["title"] for item in items[21:]] == [f"p3-{i}" for i in range(20)]
+
+
+def test_closing_iter_scholar_cancels_prefetched_pages():
+    source = StubScholarSource(delay=1.0)
+
+    async def main():
+        async with aclosing(source.iter_scholar("q", num_results=200, prefetch=2)) as papers:
+            async for _ in papers:
+                break
+        # 在事件循环结束（会取消所有剩余任务）之前检查
+        await asyncio.sleep(0.05)
+        return list(source.started), list(source.finished), sorted(source.cancelled)
+
+    assert asyncio.run(main()) == ([1, 2, 3], [1], [2, 3])
+
+
+def test_search_scholar_keeps_partial_and_all_failed_results():
+    source = StubScholarSource(failing_pages={2})
+    result = asyncio.run(source.search_scholar("q", num_results=40))
+    assert result["success"]
+    assert len(result["data"]["papers"]) == 20
+    assert result["data"]["missing_pages"] == [{"page": 2, "error": "page 2 unavailable"}]
+
+    source = StubScholarSource(failing_pages={1, 2})
+    result = asyncio.run(source.search_scholar("q", num_results=40))
+    assert result["success"]
+    assert result["data"]["papers"] == []
+    assert [item["page"] for item in result["data"]["missing_pages"]] == [1, 2]
@@ -0,0 +1,55 @@
+"""
+Pinterest 逐页迭代的测试，上游请求由替身代替
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from external_api.data_sources.pinterest_source import PinterestSource
+
+
+class StubPinterestSource(PinterestSource):
+    """按游标返回预设的页，游标为 None 表示第一页"""
+
+    def __init__(self, pages: Dict[Optional[str], Dict[str, Any]]):
+        super().__init__({"timeout": 30, "external_api_proxy_url": "http://proxy", "pinterest_base_url": "pinterest.example"})
+        self.pages = pages
+        self.cursors: List[Optional[str]] = []
+
+    async def _fetch_pins_page(self, keyword: str, num: int, nextPageCursor: Optional[str], sort: str) -> Dict[str, Any]:
+        self.cursors.append(nextPageCursor)
+        return self.pages[nextPageCursor]
+
+
+def _page(pins: List[Dict[str, Any]], cursor: Optional[str] = None) -> Dict[str, Any]:
+    return {"success": True, "data": {"data": pins, "nextPageCursor": cursor}}
+
+
+def _collect(source: PinterestSource, **kwargs) -> List[Dict[str, Any]]:
+    async def main():
+        return [pin async for pin in source.iter_pins("cats", **kwargs)]
+
+    return asyncio.run(main())
+
+
+def test_unknown_fields_are_reported_without_raising():
+    source = StubPinterestSource({})
+    items = _collect(source, fields=["id", "colour"])
+    assert len(items) == 1
+    assert items[0]["success"] is False
+    assert "colour" in items[0]["error"]
+    assert source.cursors == []
+
+
+def test_pins_are_deduplicated_and_failed_page_is_reported():
+    source = StubPinterestSource(
+        {
+            None: _page([{"id": "1"}, {"id": "2"}, {}], "c2"),
+            # 重复的 id 只产出一次，没有 id 的 pin 不互相去重
+            "c2": _page([{"id": "2"}, {"id": "3"}, {}], "c3"),
+            "c3": {"success": False, "error": "upstream down"},
+        }
+    )
+    items = _collect(source, fields=["id"])
+    assert items == [{"id": "1"}, {"id": "2"}, {"id": ""}, {"id": "3"}, {"id": ""}, {"success": False, "error": "upstream down"}]
+    assert source.cursors == [None, "c2", "c3"]
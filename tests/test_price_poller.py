@@ -0,0 +1,131 @@
+"""
+价格订阅的测试，上游报价由替身代替
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from external_api.data_sources.cache import cache_max_age
+from external_api.data_sources.price_poller import PriceSubscriptionManager
+
+
+class StubManager(PriceSubscriptionManager):
+    """依次返回 responses 中的结果，用完后重复最后一个；记录每次轮询时的 cache_max_age"""
+
+    def __init__(self, responses: List[Dict[str, Any]], **kwargs):
+        super().__init__(**kwargs)
+        self.responses = list(responses)
+        self.fetches: List[Tuple[str, Tuple[str, ...], str, Optional[float]]] = []
+
+    async def _fetch(self, kind: str, symbols: Tuple[str, ...], currency: str) -> Dict[str, Any]:
+        self.fetches.append((kind, symbols, currency, cache_max_age.get()))
+        if len(self.responses) > 1:
+            return self.responses.pop(0)
+        return self.responses[0]
+
+
+def _gold(mid: float) -> Dict[str, Any]:
+    return {"success": True, "data": {"base_currency": "USD", "data": {"gold": {"mid": mid}, "silver": {"mid": 30.0}}}}
+
+
+async def _next(subscription) -> Dict[str, Any]:
+    return await asyncio.wait_for(subscription.__anext__(), timeout=1)
+
+
+def test_subscribers_share_one_poller_and_only_changes_are_published():
+    manager = StubManager([_gold(1.0), _gold(1.0), _gold(2.0)], interval=0.01)
+
+    async def main():
+        first = manager.subscribe("metal", ["Gold"])
+        second = manager.subscribe("metal", ["gold "])
+        updates = [await _next(first), await _next(first), await _next(second), await _next(second)]
+        stats = manager.stats()
+        await manager.close()
+        return updates, stats
+
+    updates, stats = asyncio.run(main())
+    assert [update["data"]["prices"] for update in updates] == [{"gold": {"mid": 1.0}}, {"gold": {"mid": 2.0}}] * 2
+    assert list(stats) == ["metal:gold:USD@0.01s"]
+    assert stats["metal:gold:USD@0.01s"]["subscribers"] == 2
+    assert stats["metal:gold:USD@0.01s"]["published"] == 2
+    # 轮询只接受本轮间隔内的缓存结果
+    assert {fetch[3] for fetch in manager.fetches} == {0.01}
+
+
+def test_new_subscriber_gets_last_successful_update_only():
+    manager = StubManager([_gold(1.0), {"success": False, "error": "upstream down"}], interval=0.01)
+
+    async def main():
+        first = manager.subscribe("metal", ["gold"])
+        assert (await _next(first))["success"]
+        assert not (await _next(first))["success"]
+        late = manager.subscribe("metal", ["gold"])
+        replayed = await _next(late)
+        await manager.close()
+        return replayed
+
+    replayed = asyncio.run(main())
+    assert replayed["success"]
+    assert replayed["data"]["prices"] == {"gold": {"mid": 1.0}}
+
+
+def test_slow_subscriber_drops_oldest_updates():
+    manager = StubManager([_gold(float(mid)) for mid in range(1, 6)], interval=0.005, queue_size=2)
+
+    async def main():
+        subscription = manager.subscribe("metal", ["gold"])
+        while manager.stats()["metal:gold:USD@0.005s"]["published"] < 5:
+            await asyncio.sleep(0.005)
+        updates = [await _next(subscription), await _next(subscription)]
+        await manager.close()
+        return subscription.dropped, updates
+
+    dropped, updates = asyncio.run(main())
+    assert dropped == 3
+    assert [update["data"]["prices"]["gold"]["mid"] for update in updates] == [4.0, 5.0]
+
+
+def test_close_ends_subscriptions_and_stops_polling():
+    manager = StubManager([_gold(1.0)], interval=0.01)
+
+    async def main():
+        subscription = manager.subscribe("metal")
+        await _next(subscription)
+        poller = next(iter(manager._pollers.values()))
+        await manager.close()
+        rest = [update async for update in subscription]
+        await asyncio.sleep(0.03)
+        return rest, poller, len(manager.fetches)
+
+    rest, poller, fetches = asyncio.run(main())
+    assert rest == []
+    assert poller._task is None and not poller.subscribers
+    assert manager._pollers == {}
+    assert fetches == 1
+
+
+def test_last_subscriber_leaving_stops_the_poller():
+    manager = StubManager([_gold(1.0)], interval=0.01)
+
+    async def main():
+        async with manager.subscribe("metal", ["gold"]) as subscription:
+            await _next(subscription)
+        return dict(manager._pollers)
+
+    assert asyncio.run(main()) == {}
+
+
+def test_invalid_arguments_yield_one_error_update():
+    manager = StubManager([_gold(1.0)])
+
+    async def main():
+        return [
+            [update async for update in manager.subscribe("stocks")],
+            [update async for update in manager.subscribe("commodities", [])],
+            [update async for update in manager.subscribe("metal", interval=-1)],
+        ]
+
+    results = asyncio.run(main())
+    assert all(len(updates) == 1 and not updates[0]["success"] for updates in results)
+    assert "Unsupported kind" in results[0][0]["error"]
+    assert manager.fetches == [] and manager._pollers == {}
@@ -0,0 +1,67 @@
+"""
+组合报价的测试，商品和金属数据源由替身代替
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from external_api.data_sources import client as client_module
+from external_api.data_sources.pricing_source import PricingSource
+
+# 各货币下的金价，EUR = 0.9 USD
+GOLD_MID = {"USD": 2000.0, "EUR": 1800.0}
+
+
+class StubMetal:
+    def __init__(self):
+        self.calls: List[str] = []
+
+    async def get_metal_price(self, currency: str) -> Dict[str, Any]:
+        self.calls.append(currency)
+        if currency not in GOLD_MID:
+            return {"success": False, "error": f"no quotes in {currency}"}
+        quote = {"mid": GOLD_MID[currency], "bid": GOLD_MID[currency] - 1, "high": None, "low": None, "originalTime": "2025-04-25 17:00:00"}
+        return {"success": True, "data": {"base_currency": currency, "data": {"gold": quote}}}
+
+
+@pytest.fixture
+def metal(monkeypatch):
+    metal = StubMetal()
+    monkeypatch.setattr(client_module, "get_client", lambda: SimpleNamespace(metal=metal, commodities=None))
+    return metal
+
+
+def test_fx_rates_carry_reference_and_timestamp(metal):
+    source = PricingSource({"timeout": 30})
+    result = asyncio.run(source.get_basket_prices(metals=["gold"], currencies=["USD", "EUR"]))
+
+    assert result["success"]
+    fx_rates = result["data"]["fx_rates"]
+    assert fx_rates["USD"] == {"rate": 1.0, "reference": None, "timestamp": None}
+    assert fx_rates["EUR"]["rate"] == pytest.approx(0.9)
+    assert fx_rates["EUR"]["reference"] == "gold"
+    assert fx_rates["EUR"]["timestamp"] == "2025-04-25 17:00:00"
+    assert [row["current"] for row in result["data"]["table"]] == pytest.approx([2000.0, 1800.0])
+
+
+def test_fx_rate_follows_metal_quotes_without_its_own_cache(metal):
+    source = PricingSource({"timeout": 30})
+
+    async def main():
+        await source.get_basket_prices(metals=["gold"], currencies=["USD", "EUR"])
+        await source.get_basket_prices(metals=["gold"], currencies=["USD", "EUR"])
+
+    asyncio.run(main())
+    # 每次都重新由金属报价（在真实环境中经 60 秒的响应缓存）推算汇率
+    assert metal.calls.count("EUR") == 2
+
+
+def test_currency_without_rate_is_fetched_directly(metal):
+    source = PricingSource({"timeout": 30})
+    result = asyncio.run(source.get_basket_prices(metals=["gold"], currencies=["USD", "JPY"]))
+
+    assert result["data"]["fx_rates"]["JPY"] == {"rate": 1.0, "reference": None, "timestamp": None}
+    assert result["data"]["errors"] == ["metal prices in JPY: no quotes in JPY"]
@@ -0,0 +1,59 @@
+"""
+按 host 限流的测试
+"""
+
+import asyncio
+import time
+
+from external_api.data_sources.rate_limit import RateLimiter, TokenBucket, parse_retry_after
+
+
+def test_unconfigured_hosts_are_not_paced_until_throttled():
+    limiter = RateLimiter()
+
+    async def burst():
+        started = time.monotonic()
+        await asyncio.gather(*[limiter.acquire("a.example") for _ in range(50)])
+        return time.monotonic() - started
+
+    assert asyncio.run(burst()) < 0.05
+    assert limiter.stats()["a.example"] == {"requests": 50, "throttled": 0, "waited": 0.0, "rate": 0.0}
+
+    limiter.record("a.example", 429, "0.2")
+    assert 0.1 < limiter.get_bucket("a.example").reserve() <= 0.2
+    # 其他 host 不受影响
+    assert limiter.get_bucket("b.example").reserve() == 0.0
+
+
+def test_unconfigured_host_backs_off_exponentially_and_resets_on_success():
+    bucket = TokenBucket(None)
+    assert bucket.on_throttled() == 1.0
+    assert bucket.on_throttled() == 2.0
+    bucket.on_success()
+    assert bucket.on_throttled() == 1.0
+    assert bucket.rate is None
+
+
+def test_configured_host_is_paced_and_slows_down_after_429():
+    limiter = RateLimiter(limits={"a.example": {"rate": 10, "burst": 2}})
+    bucket = limiter.get_bucket("a.example")
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert 0.09 < bucket.reserve() <= 0.1
+
+    limiter.record("a.example", 429)
+    assert bucket.rate == 5
+    bucket.on_success()
+    assert bucket.rate == 6
+
+
+def test_default_limit_applies_to_unlisted_hosts():
+    limiter = RateLimiter(default_limit={"rate": 1, "burst": 1})
+    assert limiter.get_bucket("a.example").rate == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,121 @@
+"""
+请求重试与对冲的测试，使用本地的替身上游服务
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from external_api.data_sources.base import BaseAPI
+from external_api.data_sources.retry import RetryExecutor, RetryPolicy
+from external_api.data_sources.single_flight import SingleFlight, SingleFlightSource
+
+
+class FlakyServer:
+    """替身上游，前 failures 次请求返回 503，之后返回 {"ok": True}"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.methods: List[str] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.methods.append(request.method)
+        if len(self.methods) <= self.failures:
+            return web.Response(status=503)
+        return web.json_response({"ok": True})
+
+    @asynccontextmanager
+    async def run(self):
+        app = web.Application()
+        app.router.add_route("*", "/query", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        try:
+            yield f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/query"
+        finally:
+            await runner.cleanup()
+
+
+class QuerySource(BaseAPI):
+    def __init__(self, config: Dict[str, Any] = None):
+        self.url = ""
+
+    @property
+    def source_name(self) -> str:
+        return "query"
+
+    def get_api_info(self) -> Dict[str, Any]:
+        return {"name": self.source_name, "description": "test"}
+
+    async def search(self, idempotent: Any = True) -> Dict[str, Any]:
+        return await self._request_json("POST", self.url, json={}, idempotent=idempotent)
+
+
+def _source(url: str, policies: Dict[str, Dict[str, Any]] = None) -> QuerySource:
+    source = QuerySource()
+    source.url = url
+    source.bind_retry_executor(RetryExecutor(RetryPolicy(max_attempts=3, base_delay=0), policies))
+    return source
+
+
+def test_read_only_post_is_retried():
+    server = FlakyServer(failures=2)
+
+    async def main():
+        async with server.run() as url:
+            return await _source(url).search()
+
+    assert asyncio.run(main()) == {"ok": True}
+    assert server.methods == ["POST"] * 3
+
+
+def test_post_is_sent_once_unless_marked_idempotent():
+    server = FlakyServer(failures=1)
+
+    async def main():
+        async with server.run() as url:
+            await _source(url).search(idempotent=None)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(main())
+    assert server.methods == ["POST"]
+
+
+def test_policy_is_looked_up_by_the_current_method():
+    server = FlakyServer(failures=2)
+    policies = {"query.search": {"max_attempts": 1}}
+
+    async def main():
+        async with server.run() as url:
+            source = _source(url, policies)
+            proxy = SingleFlightSource(source, SingleFlight())
+            with pytest.raises(aiohttp.ClientResponseError):
+                await proxy.search()
+            # 直接调用数据源时按数据源的策略
+            return await source.search()
+
+    assert asyncio.run(main()) == {"ok": True}
+    assert len(server.methods) == 3
+
+
+def test_slow_request_is_hedged():
+    executor = RetryExecutor(RetryPolicy(hedge=True, hedge_min_samples=1, hedge_min_delay=0.01))
+    delays = [0, 1.0, 0]
+
+    async def call():
+        await asyncio.sleep(delays.pop(0))
+        return "done"
+
+    async def main():
+        await executor.run("query.search", call)
+        return await asyncio.wait_for(executor.run("query.search", call), timeout=0.5)
+
+    assert asyncio.run(main()) == "done"
+    stats = executor.stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
@@ -0,0 +1,81 @@
+"""
+单飞去重的测试
+"""
+
+import asyncio
+from typing import Any, Dict
+
+from external_api.data_sources.base import BaseAPI
+from external_api.data_sources.cache import ResponseCache
+from external_api.data_sources.single_flight import SingleFlight, SingleFlightSource
+
+from .test_cache import CountingSource
+
+
+class UncachedSource(BaseAPI):
+    def __init__(self, config: Dict[str, Any] = None):
+        self.calls = 0
+
+    @property
+    def source_name(self) -> str:
+        return "uncached"
+
+    def get_api_info(self) -> Dict[str, Any]:
+        return {"name": self.source_name, "description": "test"}
+
+    async def get_items(self, key: str) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"success": True, "data": {"key": key, "items": [1, 2]}}
+
+
+def test_leader_mutation_does_not_reach_followers():
+    single_flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        return {"success": True, "data": {"items": [1, 2]}}
+
+    async def leader():
+        result = await single_flight.do("k", call)
+        result["data"]["items"] = result["data"]["items"] + ["LEADER-MUTATION"]
+        return result
+
+    async def main():
+        leading = asyncio.create_task(leader())
+        await asyncio.sleep(0)
+        follower = await single_flight.do("k", call)
+        return follower, await leading
+
+    follower, leader_result = asyncio.run(main())
+    assert follower["data"]["items"] == [1, 2]
+    assert leader_result["data"]["items"] == [1, 2, "LEADER-MUTATION"]
+    assert single_flight.stats() == {"leaders": 1, "followers": 1}
+
+
+def test_proxy_merges_uncached_calls_and_passes_isinstance():
+    source = UncachedSource()
+    proxy = SingleFlightSource(source, SingleFlight())
+
+    async def main():
+        return await asyncio.gather(*[proxy.get_items("a") for _ in range(4)], proxy.get_items("b"))
+
+    results = asyncio.run(main())
+    assert source.calls == 2
+    assert [result["data"]["key"] for result in results] == ["a", "a", "a", "a", "b"]
+    assert isinstance(proxy, BaseAPI) and isinstance(proxy, UncachedSource)
+
+
+def test_proxy_leaves_cached_methods_to_the_response_cache():
+    source = CountingSource()
+    source.bind_response_cache(ResponseCache())
+    single_flight = SingleFlight()
+    proxy = SingleFlightSource(source, single_flight)
+
+    async def main():
+        return await asyncio.gather(*[proxy.get_items("a") for _ in range(4)])
+
+    asyncio.run(main())
+    assert source.calls == 1
+    assert single_flight.stats() == {"leaders": 0, "followers": 0}
+    assert source._response_cache.stats()["coalesced"] == 3
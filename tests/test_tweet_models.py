@@ -0,0 +1,27 @@
+"""
+推文紧凑表示的测试
+"""
+
+from external_api.data_sources.tweet_models import MISSING_USER_ID, UserPool
+
+
+def _pool() -> UserPool:
+    return UserPool(lambda date: date)
+
+
+def test_users_with_same_id_share_one_object():
+    pool = _pool()
+    first = pool.user({"user_id": 1, "username": "a"})
+    second = pool.user({"user_id": "1", "username": "a"})
+    assert first is second
+    assert len(pool) == 1
+
+
+def test_users_without_id_are_not_interned():
+    pool = _pool()
+    first = pool.user({"username": "a"})
+    second = pool.user({"username": "b"})
+    assert first.id == second.id == MISSING_USER_ID
+    assert (first.username, second.username) == ("a", "b")
+    assert pool.intern(second) is second
+    assert len(pool) == 0